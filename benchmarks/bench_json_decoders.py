@@ -0,0 +1,145 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Compare the JSON decoders installed on the bodies of typical API
+responses. Run from this directory:
+
+    python bench_json_decoders.py
+"""
+
+import base64
+import json
+import os
+import timeit
+import tracemalloc
+
+import sys
+sys.path.insert(0, '../')
+sys.path.insert(0, '../tests')
+
+import smartwaiver
+import factory
+
+
+class BenchResponse:
+
+    def __init__(self, content):
+        self.status_code = 200
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def response_bodies():
+    """Returns the bodies to decode, by name"""
+
+    summaries = json.loads(factory.api_response_waivers(0))
+    summaries['waivers'] = [factory.waiver_summary() for _ in range(100)]
+
+    waiver_pdf = json.loads(factory.api_response_waiver())
+    waiver_pdf['waiver']['pdf'] = base64.b64encode(os.urandom(2 * 1024 * 1024)).decode('ascii')
+
+    return [
+        ('template', factory.api_response_template().encode('utf-8')),
+        ('100 summaries', json.dumps(summaries).encode('utf-8')),
+        ('waiver', factory.api_response_waiver().encode('utf-8')),
+        ('waiver with 2MB PDF', json.dumps(waiver_pdf).encode('utf-8')),
+    ]
+
+
+def bench(function, seconds=0.5):
+    """Returns the average seconds per call of a function"""
+
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * seconds / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=3, number=number)) / number
+
+
+def process_time(body, decoder):
+    """Returns the average seconds to process a response with a decoder"""
+    return bench(lambda: smartwaiver.responses.SmartwaiverResponse(BenchResponse(body), decoder=decoder))
+
+
+# The SDK type for the data of each response type
+_types = {
+    'template': smartwaiver.types.SmartwaiverTemplate,
+    'waivers': smartwaiver.types.SmartwaiverWaiverSummary,
+    'waiver': smartwaiver.types.SmartwaiverWaiver,
+}
+
+
+def build_objects(body, decoder):
+    """Process a response and create the SDK objects from it, as the client
+    does. The response is returned as well, as the client keeps it as the
+    last response.
+    """
+
+    response = smartwaiver.responses.SmartwaiverResponse(BenchResponse(body), decoder=decoder)
+    cls = _types[response.type]
+    if isinstance(response.response_data, list):
+        return response, [cls._load(data, response.metadata) for data in response.response_data]
+    return response, cls._load(response.response_data, response.metadata)
+
+
+def retained(body, decoder):
+    """Returns the bytes held by the response and the objects created from it"""
+
+    tracemalloc.start()
+    try:
+        # Kept alive until the memory is measured
+        objects = build_objects(body, decoder)
+        size = tracemalloc.get_traced_memory()[0]
+        del objects
+        return size
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    names = smartwaiver.decoders.available_decoders()
+    print('Decoders installed: ' + ', '.join(names))
+    print()
+
+    print('{:<22} {:<10} {:>12} {:>12} {:>9}'.format('body', 'decoder', 'decode us', 'response us', 'speedup'))
+    for body_name, body in response_bodies():
+        timings = []
+        for name in names:
+            decoder = smartwaiver.decoders.get_decoder(name)
+            timings.append((name, bench(lambda: decoder(body)), process_time(body, decoder)))
+
+        # The standard library decoder is always installed
+        baseline = dict((name, process) for name, decode, process in timings)['json']
+        for name, decode, process in timings:
+            print('{:<22} {:<10} {:>12.1f} {:>12.1f} {:>8.2f}x'.format(
+                body_name, name, decode * 1e6, process * 1e6, baseline / process))
+        print()
+
+    # The typed decoder creates the objects while decoding, the others after
+    print('{:<22} {:<10} {:>12} {:>9} {:>12}'.format('body', 'decoder', 'objects us', 'speedup', 'retained KB'))
+    for body_name, body in response_bodies():
+        timings = []
+        for name in names + ['typed']:
+            decoder = smartwaiver.decoders.get_decoder(name)
+            timings.append((name, bench(lambda: build_objects(body, decoder)), retained(body, decoder)))
+
+        baseline = dict((name, build) for name, build, size in timings)['json']
+        for name, build, size in timings:
+            print('{:<22} {:<10} {:>12.1f} {:>8.2f}x {:>12.1f}'.format(
+                body_name, name, build * 1e6, baseline / build, size / 1024))
+        print()
+
+if __name__ == '__main__':
+    main()
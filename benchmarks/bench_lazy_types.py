@@ -0,0 +1,86 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Compare creating waivers and summaries eagerly and lazily, both on their
+own and when a few fields are read afterwards. Run from this directory:
+
+    python bench_lazy_types.py
+"""
+
+
+import sys
+sys.path.insert(0, '../')
+sys.path.insert(0, '../tests')
+
+import smartwaiver
+import factory
+
+from bench_json_decoders import bench
+
+
+def summaries(count):
+    """Returns the data of a list of summaries"""
+    return [factory.waiver_summary() for _ in range(count)]
+
+
+def waivers(count, participants):
+    """Returns the data of a list of waivers, each with several participants"""
+
+    data = []
+    for _ in range(count):
+        waiver = factory.waiver()
+        waiver['participants'] = [factory.participant() for _ in range(participants)]
+        data.append(waiver)
+    return data
+
+
+def create(cls, data, lazy):
+    return [cls(item, lazy=lazy) for item in data]
+
+
+def create_and_read(cls, data, lazy):
+    return [(obj.waiver_id, obj.created_on) for obj in create(cls, data, lazy)]
+
+
+def create_and_read_all(cls, data, lazy):
+    objects = create(cls, data, lazy)
+    for obj in objects:
+        obj.validate()
+    return objects
+
+
+def main():
+    cases = [
+        ('10000 summaries', smartwaiver.types.SmartwaiverWaiverSummary, summaries(10000)),
+        ('1000 waivers, 1 participant', smartwaiver.types.SmartwaiverWaiver, waivers(1000, 1)),
+        ('1000 waivers, 10 participants', smartwaiver.types.SmartwaiverWaiver, waivers(1000, 10)),
+    ]
+    scenarios = [
+        ('create', create),
+        ('create, read 2 fields', create_and_read),
+        ('create, read all', create_and_read_all),
+    ]
+
+    print('{:<32} {:<24} {:>10} {:>10} {:>9}'.format('data', 'scenario', 'eager ms', 'lazy ms', 'speedup'))
+    for case_name, cls, data in cases:
+        for scenario_name, scenario in scenarios:
+            eager = bench(lambda: scenario(cls, data, False))
+            lazy = bench(lambda: scenario(cls, data, True))
+            print('{:<32} {:<24} {:>10.2f} {:>10.2f} {:>8.2f}x'.format(
+                case_name, scenario_name, eager * 1e3, lazy * 1e3, eager / lazy))
+        print()
+
+
+if __name__ == '__main__':
+    main()
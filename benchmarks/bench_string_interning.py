@@ -0,0 +1,141 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Measure the memory held by a large set of summaries and waivers created
+from decoded responses, with and without a string pool. Run from this
+directory, optionally with the number of summaries:
+
+    python bench_string_interning.py [500000]
+"""
+
+import gc
+import json
+import time
+import tracemalloc
+
+import sys
+sys.path.insert(0, '../')
+sys.path.insert(0, '../tests')
+
+import smartwaiver
+import factory
+
+from bench_json_decoders import BenchResponse
+
+# The templates, tags and custom fields the waivers are spread over
+TEMPLATES = [('template' + str(i), 'Demo Waiver ' + str(i)) for i in range(5)]
+TAGS = ['Green Team', 'Blue Team', 'Beginner', 'Returning']
+QUESTIONS = ['How did you hear about this company?', 'Have you done this before?']
+
+
+def summary_pages(count):
+    """Returns the bodies of pages of 100 summaries, as the API sends them"""
+
+    pages = []
+    for start in range(0, count, 100):
+        response = json.loads(factory.api_response_waivers(0))
+        for i in range(start, min(start + 100, count)):
+            summary = factory.waiver_summary()
+            summary['waiverId'] = 'waiver' + str(i)
+            summary['templateId'], summary['title'] = TEMPLATES[i % len(TEMPLATES)]
+            summary['tags'] = [TAGS[i % len(TAGS)]]
+            response['waivers'].append(summary)
+        pages.append(json.dumps(response).encode('utf-8'))
+    return pages
+
+
+def waiver_bodies(count, participants):
+    """Returns the bodies of waiver responses, each with several participants"""
+
+    bodies = []
+    for i in range(count):
+        response = json.loads(factory.api_response_waiver())
+        waiver = response['waiver']
+        waiver['waiverId'] = 'waiver' + str(i)
+        waiver['templateId'], waiver['title'] = TEMPLATES[i % len(TEMPLATES)]
+        waiver['customWaiverFields'] = dict(('field' + str(j), {'value': 'Yes', 'displayText': question})
+                                            for j, question in enumerate(QUESTIONS))
+        waiver['participants'] = []
+        for j in range(participants):
+            participant = factory.participant()
+            participant['tags'] = [TAGS[(i + j) % len(TAGS)]]
+            waiver['participants'].append(participant)
+        bodies.append(json.dumps(response).encode('utf-8'))
+    return bodies
+
+
+def load_summaries(pages, pool):
+    summaries = []
+    for body in pages:
+        response = smartwaiver.responses.SmartwaiverResponse(BenchResponse(body), decoder=json.loads)
+        summaries.extend(smartwaiver.types.SmartwaiverWaiverSummary._load(summary, response.metadata,
+                                                                          string_pool=pool)
+                         for summary in response.response_data)
+    return summaries
+
+
+def load_waivers(bodies, pool):
+    waivers = []
+    for body in bodies:
+        response = smartwaiver.responses.SmartwaiverResponse(BenchResponse(body), decoder=json.loads)
+        waivers.append(smartwaiver.types.SmartwaiverWaiver._load(response.response_data, response.metadata,
+                                                                 string_pool=pool))
+    return waivers
+
+
+def measure(load, bodies, pool):
+    """Returns the bytes held by the objects loaded, and the seconds taken
+    to load them outside of tracemalloc
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        objects = load(bodies, pool)
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del objects
+
+    if pool is not None:
+        pool.clear()
+    start = time.perf_counter()
+    load(bodies, pool)
+    return size, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    cases = [
+        (str(count) + ' summaries', load_summaries, summary_pages(count)),
+        (str(count // 10) + ' waivers, 3 participants', load_waivers, waiver_bodies(count // 10, 3)),
+    ]
+
+    print('{:<30} {:<8} {:>10} {:>10} {:>8} {:>8}'.format('data', 'pool', 'held MB', 'saved MB', 'saved', 'secs'))
+    for name, load, bodies in cases:
+        baseline, elapsed = measure(load, bodies, None)
+        print('{:<30} {:<8} {:>10.1f} {:>10} {:>8} {:>8.2f}'.format(name, 'none', baseline / 2 ** 20, '', '',
+                                                                   elapsed))
+
+        pool = smartwaiver.interning.SmartwaiverStringPool()
+        size, elapsed = measure(load, bodies, pool)
+        saved = baseline - size
+        print('{:<30} {:<8} {:>10.1f} {:>10.1f} {:>7.0f}% {:>8.2f}'.format(
+            name, str(len(pool)) + ' str', size / 2 ** 20, saved / 2 ** 20, 100 * saved / baseline, elapsed))
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Compare turning pages of summaries into columns for a report by creating
+summary objects first, against getting the columns directly. Run from this
+directory:
+
+    python bench_summary_columns.py
+"""
+
+import gc
+import tracemalloc
+
+import sys
+sys.path.insert(0, '../')
+sys.path.insert(0, '../tests')
+
+import smartwaiver
+import factory
+
+from bench_json_decoders import bench
+
+
+def summaries(count):
+    """Returns the data of a list of summaries, with different IDs"""
+
+    data = []
+    for i in range(count):
+        summary = factory.waiver_summary()
+        summary['waiverId'] = 'waiver' + str(i)
+        data.append(summary)
+    return data
+
+
+def objects_to_columns(data):
+    """Create the summary objects, then copy each field into a column"""
+
+    objects = [smartwaiver.types.SmartwaiverWaiverSummary(summary) for summary in data]
+    return dict((name, [getattr(summary, name) for summary in objects]) for name in smartwaiver.columnar.COLUMNS)
+
+
+def columnar(data):
+    return smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(data)
+
+
+def objects_filter(data):
+    objects = [smartwaiver.types.SmartwaiverWaiverSummary(summary) for summary in data]
+    return [summary.waiver_id for summary in objects if summary.verified]
+
+
+def columnar_filter(data):
+    return columnar(data).where(verified=True).column('waiver_id')
+
+
+def retained(function, data):
+    """Returns the bytes held by the result of a function"""
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        # Kept alive until the memory is measured
+        result = function(data)
+        size = tracemalloc.get_traced_memory()[0]
+        del result
+        return size
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    scenarios = [
+        ('to columns', objects_to_columns, columnar),
+        ('filter verified IDs', objects_filter, columnar_filter),
+    ]
+
+    print('{:<16} {:<20} {:>10} {:>12} {:>9}'.format('summaries', 'scenario', 'objects ms', 'columnar ms',
+                                                    'speedup'))
+    for count in [1000, 10000]:
+        data = summaries(count)
+        for name, objects, columns in scenarios:
+            slow = bench(lambda: objects(data))
+            fast = bench(lambda: columns(data))
+            print('{:<16} {:<20} {:>10.2f} {:>12.2f} {:>8.2f}x'.format(count, name, slow * 1e3, fast * 1e3,
+                                                                       slow / fast))
+    print()
+
+    data = summaries(10000)
+    created = retained(lambda d: [smartwaiver.types.SmartwaiverWaiverSummary(summary) for summary in d], data)
+    print('10000 summaries held as objects: {:>8.1f} KB'.format(created / 1024))
+    print('10000 summaries held as columns: {:>8.1f} KB'.format(retained(columnar, data) / 1024))
+
+
+if __name__ == '__main__':
+    main()
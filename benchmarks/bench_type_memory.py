@@ -0,0 +1,71 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Measure the memory each SDK object takes, not counting the strings and
+lists it shares with the data it was created from. Run from this directory:
+
+    python bench_type_memory.py
+"""
+
+import gc
+import tracemalloc
+
+import sys
+sys.path.insert(0, '../')
+sys.path.insert(0, '../tests')
+
+import smartwaiver
+import factory
+
+# The number of objects of each type to create
+COUNT = 10000
+
+
+def type_data():
+    """Returns the class and the data to create it from, by name"""
+
+    return [
+        ('SmartwaiverCustomField', smartwaiver.types.SmartwaiverCustomField, factory.custom_field()),
+        ('SmartwaiverGuardian', smartwaiver.types.SmartwaiverGuardian, factory.guardian()),
+        ('SmartwaiverParticipant', smartwaiver.types.SmartwaiverParticipant, factory.participant()),
+        ('SmartwaiverTemplate', smartwaiver.types.SmartwaiverTemplate, factory.template()),
+        ('SmartwaiverWaiverSummary', smartwaiver.types.SmartwaiverWaiverSummary, factory.waiver_summary()),
+        ('SmartwaiverWaiver', smartwaiver.types.SmartwaiverWaiver, factory.waiver()),
+        ('SmartwaiverWebhook', smartwaiver.types.SmartwaiverWebhook, factory.webhook()),
+    ]
+
+
+def bytes_per_object(cls, data):
+    """Returns the average bytes allocated to create one object"""
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        objects = [cls(data) for _ in range(COUNT)]
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    # Less the list holding them
+    return (size - sys.getsizeof(objects)) / len(objects)
+
+
+def main():
+    print('{:<26} {:>14}'.format('type', 'bytes/object'))
+    for name, cls, data in type_data():
+        print('{:<26} {:>14.0f}'.format(name, bytes_per_object(cls, data)))
+
+
+if __name__ == '__main__':
+    main()
@@ -10,5 +10,11 @@ setup(
   download_url='https://github.com/smartwaivercom/python-sdk/tarball/4.0.1',
   keywords=['api', 'smartwaiver', 'sdk'],
   classifiers=[],
-  install_requires=['requests']
+  install_requires=['requests'],
+  extras_require={
+    'async': ['aiohttp'],
+    'fastjson': ['orjson'],
+    'arrow': ['pyarrow'],
+    'pandas': ['pandas']
+  }
 )
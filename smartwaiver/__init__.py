@@ -12,33 +12,490 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from functools import partial
 from platform import python_version
+import threading
+import time
 from urllib.parse import urlencode
 
 import requests
+import urllib3
 
+import smartwaiver.cache
+import smartwaiver.columnar
+import smartwaiver.dataframes
+import smartwaiver.decoders
 import smartwaiver.exceptions
+import smartwaiver.export
+import smartwaiver.interning
+import smartwaiver.mirror
+import smartwaiver.pagination
+import smartwaiver.pdf
+import smartwaiver.ratelimit
 import smartwaiver.responses
+import smartwaiver.retry
+import smartwaiver.sync
+import smartwaiver.tables
 import smartwaiver.types
 
 
+def _is_read_timeout(err):
+    """Returns whether a connection error from requests is a read that timed
+    out after the response had started, which requests does not raise as a
+    Timeout
+    """
+    return bool(err.args) and isinstance(err.args[0], urllib3.exceptions.ReadTimeoutError)
+
+
 class Smartwaiver():
 
     _version = '4.0.1'
 
-    def __init__(self, api_key):
+    def __init__(self, api_key, session=None, pool_connections=10, pool_maxsize=10, keep_alive=True,
+                 retry_policy=None, rate_limiter=None, connect_timeout=10.0, read_timeout=60.0, deadline=None,
+                 template_cache=None, waiver_cache=None, json_decoder='auto', lazy=False, string_pool=None):
         """Creates a new Smartwaiver object.
 
+        Every request made by this object goes through a single pooled HTTP
+        session, so connections to the API server are reused between calls.
+        Call :meth:`close` (or use the object as a context manager) to release
+        the pooled connections when done.
+
         :param api_key: The API Key for the account
         :type api_key: ``string``
+
+        :param session: An existing session to send requests through instead of creating one
+        :type session: requests.Session
+
+        :param pool_connections: The number of host connection pools to cache
+        :type pool_connections: ``integer``
+
+        :param pool_maxsize: The maximum number of connections to keep open per host
+        :type pool_maxsize: ``integer``
+
+        :param keep_alive: Whether to keep connections open between requests
+        :type keep_alive: ``boolean``
+
+        :param retry_policy: When to retry failed requests, by default requests are not retried
+        :type retry_policy: smartwaiver.retry.SmartwaiverRetryPolicy
+
+        :param rate_limiter: A rate limiter every request (including retries) must pass through
+        :type rate_limiter: smartwaiver.ratelimit.SmartwaiverRateLimiter
+
+        :param connect_timeout: Seconds to wait for a connection to the API server (None to wait forever)
+        :type connect_timeout: ``float``
+
+        :param read_timeout: Seconds to wait for the API server to send data (None to wait forever)
+        :type read_timeout: ``float``
+
+        :param deadline: Seconds each call may take in total, including retries (None for no limit, best-effort while a slow body is read)
+        :type deadline: ``float``
+
+        :param template_cache: A cache for the responses of the template endpoints, by default they are not cached
+        :type template_cache: smartwaiver.cache.SmartwaiverResponseCache
+
+        :param waiver_cache: A cache on disk for signed waivers, by default they are not cached
+        :type waiver_cache: smartwaiver.cache.SmartwaiverWaiverCache
+
+        :param json_decoder: The JSON decoder for responses: 'auto' for the fastest one installed, a name from :data:`smartwaiver.decoders.AUTO_ORDER`, 'typed' (not with lazy or string_pool), or a function
+        :type json_decoder: ``string``
+
+        :param lazy: Whether waivers and waiver summaries load each field the first time it is used, rather than all of them when created (see :meth:`smartwaiver.types.SmartwaiverType.validate`)
+        :type lazy: ``boolean``
+
+        :param string_pool: A pool to share repeated strings, such as template IDs, titles and tags, between the objects created
+        :type string_pool: smartwaiver.interning.SmartwaiverStringPool
         """
 
-        self._last_response = None
+        # The last response and deadline are kept per thread so one object can be shared
+        self._local = threading.local()
         self._headers = {
             'user-agent': 'SmartwaiverSDK:' + self._version + '-python:' + python_version(),
             'sw-api-key': api_key
         }
 
+        if not keep_alive:
+            self._headers['connection'] = 'close'
+
+        # Only close the session on exit if we were the ones to create it
+        self._owns_session = session is None
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self._session = session
+
+        self._retry_policy = retry_policy
+        self._retry_stats = retry.SmartwaiverRetryStats()
+        self._rate_limiter = rate_limiter
+
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._deadline = deadline
+
+        self._template_cache = template_cache
+        self._waiver_cache = waiver_cache
+        self._json_decoder = decoders.get_decoder(json_decoder)
+        self._lazy = lazy
+        self._string_pool = string_pool
+
+        # The typed decoder creates the objects before the client sees them
+        if self._json_decoder is decoders.decode_typed and (lazy or string_pool is not None):
+            raise ValueError("The 'typed' JSON decoder cannot be used with lazy or string_pool")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the pooled connections held by this object. A session passed
+        in by the caller is left open.
+        """
+
+        if self._owns_session:
+            self._session.close()
+
+    @property
+    def session(self):
+        """Get the HTTP session that all requests are sent through
+
+        :return: The session used for requests to the API server
+        :rtype: requests.Session
+        """
+        return self._session
+
+    @contextmanager
+    def with_deadline(self, deadline):
+        """Set the deadline for calls made by the current thread inside a with
+        block, replacing the deadline given to the constructor
+
+        :param deadline: Seconds each call may take in total, including retries (None for no limit)
+        :type deadline: ``float``
+        """
+
+        previous = getattr(self._local, 'deadline', self._deadline)
+        self._local.deadline = deadline
+        try:
+            yield self
+        finally:
+            self._local.deadline = previous
+
+    @property
+    def retry_stats(self):
+        """Get the counters for how many requests have been retried and how
+        long was spent waiting between attempts
+
+        :return: The retry counters for this object
+        :rtype: smartwaiver.retry.SmartwaiverRetryStats
+        """
+        return self._retry_stats
+
+    @property
+    def template_cache(self):
+        """Get the cache used for the template endpoints
+
+        :return: The template cache, or None if templates are not cached
+        :rtype: smartwaiver.cache.SmartwaiverResponseCache
+        """
+        return self._template_cache
+
+    @property
+    def waiver_cache(self):
+        """Get the disk cache used for signed waivers
+
+        :return: The waiver cache, or None if waivers are not cached
+        :rtype: smartwaiver.cache.SmartwaiverWaiverCache
+        """
+        return self._waiver_cache
+
+    @property
+    def json_decoder(self):
+        """Returns the function responses are decoded with
+
+        :return: The JSON decode function
+        :rtype: ``callable``
+        """
+        return self._json_decoder
+
+    @property
+    def string_pool(self):
+        """Returns the pool repeated strings are shared through, if any
+
+        :return: The string pool
+        :rtype: smartwaiver.interning.SmartwaiverStringPool
+        """
+        return self._string_pool
+
+    def _api_request(self, method, url, **kwargs):
+        """Send a request to the API server and process the response
+
+        :param method: The HTTP method to use
+        :type method: ``string``
+
+        :param url: The URL to send the request to
+        :type url: ``string``
+
+        :return: The processed response from the server
+        :rtype: smartwaiver.responses.SmartwaiverResponse
+        """
+
+        start = time.monotonic()
+        response = self._request(method, url, **kwargs)
+        api_response = responses.SmartwaiverResponse(response, time.monotonic() - start, self._json_decoder)
+        self._local.last_response = api_response
+
+        return api_response
+
+    def _cached_api_request(self, url):
+        """Send a GET request through the template cache. A fresh cached
+        response is used without a request, a stale one is checked with the
+        server and only downloaded again if it has changed.
+
+        :param url: The URL to send the request to
+        :type url: ``string``
+
+        :return: The processed response from the server (or the cache)
+        :rtype: smartwaiver.responses.SmartwaiverResponse
+        """
+
+        cache = self._template_cache
+        if cache is None:
+            return self._api_request('GET', url)
+
+        entry = cache.get(url)
+        if entry is not None and entry.is_fresh():
+            self._local.last_response = entry.value
+            return entry.value
+
+        start = time.monotonic()
+        response = self._request('GET', url, headers=entry.validators() if entry is not None else None)
+
+        if entry is not None and response.status_code == 304:
+            revalidated = cache.revalidate(url)
+            api_response = revalidated.value if revalidated is not None else entry.value
+        else:
+            api_response = responses.SmartwaiverResponse(response, time.monotonic() - start, self._json_decoder)
+            cache.put(url, api_response, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+        self._local.last_response = api_response
+        return api_response
+
+    def _cached_waiver_request(self, waiver_id, pdf):
+        """Get a waiver through the waiver cache. A waiver with the PDF that
+        needs refreshing is refreshed from the waiver without the PDF, so the
+        PDF is not downloaded again.
+
+        :param waiver_id: The Unique identifier of the waiver to retrieve
+        :type waiver_id: ``string``
+
+        :param pdf: Whether to include the Base64 Encoded PDF
+        :type pdf: ``boolean``
+
+        :return: The processed response from the server (or the cache)
+        :rtype: smartwaiver.responses.SmartwaiverResponse
+        """
+
+        cache = self._waiver_cache
+        url = SmartwaiverRoutes.get_waiver(waiver_id, pdf)
+        if cache is None:
+            return self._api_request('GET', url)
+
+        entry = cache.get(waiver_id, pdf)
+        if entry is not None and entry.is_fresh():
+            api_response = cache.load(entry, self._json_decoder)
+            self._local.last_response = api_response
+            return api_response
+
+        if entry is not None and pdf:
+            current = self._api_request('GET', SmartwaiverRoutes.get_waiver(waiver_id, False))
+            api_response = cache.refresh(waiver_id, entry, current, self._json_decoder)
+        else:
+            api_response = self._api_request('GET', url)
+            cache.put(waiver_id, pdf, api_response.response.text)
+
+        self._local.last_response = api_response
+        return api_response
+
+    def _record_exhausted(self, method, attempt, status_code=None):
+        """Count a request that is giving up on a retryable failure
+
+        :param method: The HTTP method of the request
+        :type method: ``string``
+
+        :param attempt: The number of attempts made
+        :type attempt: ``integer``
+
+        :param status_code: The status code of the last response, or None if the server could not be reached
+        :type status_code: ``integer``
+        """
+
+        if attempt > 1 and self._retry_policy.is_retryable(method, status_code):
+            self._retry_stats.record_exhausted()
+
+    def _should_retry(self, method, attempt, status_code=None):
+        """Returns whether a failed request should be sent again, counting it
+        as exhausted if not
+
+        :param method: The HTTP method of the request
+        :type method: ``string``
+
+        :param attempt: The number of attempts made
+        :type attempt: ``integer``
+
+        :param status_code: The status code of the response, or None if the server could not be reached
+        :type status_code: ``integer``
+
+        :return: Whether to retry the request
+        :rtype: ``boolean``
+        """
+
+        if self._retry_policy is None:
+            return False
+
+        if not self._retry_policy.should_retry(method, attempt, status_code):
+            self._record_exhausted(method, attempt, status_code)
+            return False
+
+        return True
+
+    def _request(self, method, url, **kwargs):
+        """Send a request to the API server through the pooled session,
+        retrying according to the retry policy until the deadline
+
+        :param method: The HTTP method to use
+        :type method: ``string``
+
+        :param url: The URL to send the request to
+        :type url: ``string``
+
+        :return: The response from the server
+        :rtype: requests.Response
+        """
+
+        start = time.monotonic()
+        deadline = getattr(self._local, 'deadline', self._deadline)
+
+        attempt = 0
+        while True:
+            attempt += 1
+
+            # A call that cannot be sent before its deadline fails without
+            # reaching the server, so it is not retried
+            remaining = self._wait_to_send(start, deadline)
+            try:
+                response = self._send(method, url, start, remaining, **kwargs)
+            except (exceptions.SmartwaiverTimeoutException, requests.exceptions.ConnectionError):
+                if not self._should_retry(method, attempt):
+                    raise
+                delay = self._retry_policy.backoff(attempt)
+            else:
+                if not self._should_retry(method, attempt, response.status_code):
+                    return response
+                delay = self._retry_policy.backoff(attempt, response.headers.get('Retry-After'))
+
+                # Hand a streamed connection back to the pool before retrying
+                response.close()
+
+            # Don't start a retry that could not finish before the deadline
+            elapsed = time.monotonic() - start
+            if deadline is not None and elapsed + delay >= deadline:
+                raise exceptions.SmartwaiverTimeoutException(
+                    None, 'Deadline of ' + str(deadline) + 's exceeded after ' + str(attempt) + ' attempts',
+                    elapsed, deadline)
+
+            self._retry_stats.record_retry(delay)
+            time.sleep(delay)
+
+    def _wait_to_send(self, start, deadline):
+        """Wait until the rate limiter allows a request, unless the request
+        could then not be sent before the deadline
+
+        :param start: The time the call started (from time.monotonic)
+        :type start: ``float``
+
+        :param deadline: Seconds the call may take in total, or None for no limit
+        :type deadline: ``float``
+
+        :return: The seconds left before the deadline, or None for no limit
+        :rtype: ``float``
+        """
+
+        if self._rate_limiter is not None:
+            # Don't wait for a token that would only be free after the deadline
+            timeout = None if deadline is None else deadline - (time.monotonic() - start)
+            if self._rate_limiter.acquire(timeout) is None:
+                elapsed = time.monotonic() - start
+                raise exceptions.SmartwaiverTimeoutException(
+                    None, 'Deadline of ' + str(deadline) + 's exceeded waiting for the rate limiter', elapsed, deadline)
+
+        if deadline is None:
+            return None
+
+        elapsed = time.monotonic() - start
+        remaining = deadline - elapsed
+        if remaining <= 0:
+            raise exceptions.SmartwaiverTimeoutException(
+                None, 'Deadline of ' + str(deadline) + 's exceeded before request was sent', elapsed, deadline)
+        return remaining
+
+    def _send(self, method, url, start, remaining, headers=None, **kwargs):
+        """Send a single request to the API server, with timeouts cut down to
+        fit in the deadline. The deadline is best-effort once the request is
+        sent: the read timeout applies to each read from the socket, so a
+        body that keeps arriving slowly can run past it.
+
+        :param method: The HTTP method to use
+        :type method: ``string``
+
+        :param url: The URL to send the request to
+        :type url: ``string``
+
+        :param start: The time the call started (from time.monotonic)
+        :type start: ``float``
+
+        :param remaining: Seconds left before the deadline, or None for no limit
+        :type remaining: ``float``
+
+        :param headers: Headers to send as well as the usual ones
+        :type headers: ``dict``
+
+        :return: The response from the server
+        :rtype: requests.Response
+        """
+
+        connect_timeout = self._connect_timeout
+        read_timeout = self._read_timeout
+
+        if remaining is not None:
+            connect_timeout = remaining if connect_timeout is None else min(connect_timeout, remaining)
+            read_timeout = remaining if read_timeout is None else min(read_timeout, remaining)
+
+        if headers:
+            headers = dict(self._headers, **headers)
+        else:
+            headers = self._headers
+
+        try:
+            return self._session.request(method, url, headers=headers,
+                                         timeout=(connect_timeout, read_timeout), **kwargs)
+        except requests.exceptions.Timeout as err:
+            timeout = connect_timeout if isinstance(err, requests.exceptions.ConnectTimeout) else read_timeout
+            raise exceptions.SmartwaiverTimeoutException(
+                None, 'Timed out waiting for API server after ' + str(timeout) + 's',
+                time.monotonic() - start, timeout) from err
+        except requests.exceptions.ConnectionError as err:
+            # A read that times out part way through the body
+            if not _is_read_timeout(err):
+                raise
+            raise exceptions.SmartwaiverTimeoutException(
+                None, 'Timed out reading from API server after ' + str(read_timeout) + 's',
+                time.monotonic() - start, read_timeout) from err
+
     def get_waiver_templates(self):
         """Get a list of waiver templates for this account
 
@@ -47,9 +504,10 @@ class Smartwaiver():
         """
 
         url = SmartwaiverRoutes.get_waiver_templates()
-        self._last_response = responses.SmartwaiverResponse(requests.get(url, headers=self._headers))
+        response = self._cached_api_request(url)
 
-        return [types.SmartwaiverTemplate(template) for template in self._last_response.response_data]
+        return [types.SmartwaiverTemplate._load(template, response.metadata, string_pool=self._string_pool)
+                for template in response.response_data]
 
     def get_waiver_template(self, template_id):
         """Get a specific waiver template by providing the unique identifier
@@ -62,11 +520,12 @@ class Smartwaiver():
         """
 
         url = SmartwaiverRoutes.get_waiver_template(template_id)
-        self._last_response = responses.SmartwaiverResponse(requests.get(url, headers=self._headers))
+        response = self._cached_api_request(url)
 
-        return types.SmartwaiverTemplate(self._last_response.response_data)
+        return types.SmartwaiverTemplate._load(response.response_data, response.metadata, string_pool=self._string_pool)
 
-    def get_waiver_summaries(self, limit=20, verified=None, template_id='', from_dts='', to_dts=''):
+    def get_waiver_summaries(self, limit=20, verified=None, template_id='', from_dts='', to_dts='',
+                             columnar=False):
         """Execute a query to find waivers, the returned objects will be waiver summaries
 
         :param limit: Limit query to this number of the most recent waivers.
@@ -84,14 +543,115 @@ class Smartwaiver():
         :param to_dts: Limit query to waivers between this ISO 8601 date and the fromDts parameter.
         :type to_dts: ``string``
 
-        :return: A list of :class:`SmartwaiverWaiverSummary` object's that represent the waivers.
+        :param columnar: Return the summaries as one column per field rather than one object per waiver
+        :type columnar: ``boolean``
+
+        :return: A list of :class:`SmartwaiverWaiverSummary` object's that represent the waivers, or a :class:`SmartwaiverSummaryColumns` if columnar
         :rtype: ``list``
         """
 
         url = SmartwaiverRoutes.get_waiver_summaries(limit, verified, template_id, from_dts, to_dts)
-        self._last_response = responses.SmartwaiverResponse(requests.get(url, headers=self._headers))
+        response = self._api_request('GET', url)
+
+        if columnar:
+            return smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(
+                response.response_data, response.metadata, string_pool=self._string_pool)
+
+        return [types.SmartwaiverWaiverSummary._load(waiver_summary, response.metadata, lazy=self._lazy,
+                                                     string_pool=self._string_pool)
+                for waiver_summary in response.response_data]
+
+    def iter_waiver_summaries(self, verified=None, template_id='', from_dts='', to_dts='', page_size=100,
+                              columnar=False):
+        """Iterate over every waiver summary matching a query, however many
+        there are. Pages of summaries are requested as they are needed, so
+        memory use stays the same regardless of the size of the date range.
+
+        :param verified: Limit query to verified by email (true) or not verified (false) or both (None).
+        :type verified: ``boolean``
+
+        :param template_id: Limit query to signed waivers of the given waiver template ID.
+        :type template_id: ``string``
+
+        :param from_dts: Limit query to waivers signed at or after this ISO 8601 date.
+        :type from_dts: ``string``
+
+        :param to_dts: Limit query to waivers signed at or before this ISO 8601 date.
+        :type to_dts: ``string``
+
+        :param page_size: The number of summaries to request at a time (1-100).
+        :type page_size: ``integer``
+
+        :param columnar: Yield each page as a :class:`SmartwaiverSummaryColumns` rather than one summary at a time
+        :type columnar: ``boolean``
+
+        :return: The :class:`SmartwaiverWaiverSummary` objects, newest first, or the pages as columns
+        :rtype: ``generator``
+        """
+
+        pager = pagination.SmartwaiverSummaryPager(from_dts, to_dts, page_size)
+        while not pager.done:
+            page = self.get_waiver_summaries(page_size, verified, template_id, pager.from_dts, pager.to_dts,
+                                             columnar)
+            new = pager.add_page(page)
+            if columnar:
+                if new:
+                    yield new
+                continue
+            for summary in new:
+                yield summary
+
+    def backfill_waiver_summaries(self, from_dts, to_dts, shards=8, max_workers=8, verified=None, template_id='',
+                                  columnar=False):
+        """Get every waiver summary in a date range by splitting the range
+        into shards and querying several shards at once. Any shard with more
+        waivers than one query returns is split again until all are fetched.
+
+        :param from_dts: Get waivers signed at or after this ISO 8601 date.
+        :type from_dts: ``string``
+
+        :param to_dts: Get waivers signed at or before this ISO 8601 date.
+        :type to_dts: ``string``
 
-        return [types.SmartwaiverWaiverSummary(waiver_summary) for waiver_summary in self._last_response.response_data]
+        :param shards: The number of shards to split the date range into to start with
+        :type shards: ``integer``
+
+        :param max_workers: The maximum number of shards to query at the same time
+        :type max_workers: ``integer``
+
+        :param verified: Limit query to verified by email (true) or not verified (false) or both (None).
+        :type verified: ``boolean``
+
+        :param template_id: Limit query to signed waivers of the given waiver template ID.
+        :type template_id: ``string``
+
+        :param columnar: Return the summaries as one column per field rather than one object per waiver
+        :type columnar: ``boolean``
+
+        :return: A list of :class:`SmartwaiverWaiverSummary` objects, oldest first, or a :class:`SmartwaiverSummaryColumns` if columnar
+        :rtype: ``list``
+        """
+
+        def fetch(shard):
+            return self.get_waiver_summaries(pagination.MAX_PAGE_SIZE, verified, template_id, shard[0], shard[1],
+                                             columnar)
+
+        pages = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            for shard in pagination.split_range(from_dts, to_dts, shards):
+                pending[executor.submit(fetch, shard)] = shard
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard = pending.pop(future)
+                    page = future.result()
+                    pages.append(page)
+                    for sub_shard in pagination.split_full_page(shard[0], page):
+                        pending[executor.submit(fetch, sub_shard)] = sub_shard
+
+        return pagination.merge_pages(pages)
 
     def get_waiver(self, waiver_id, pdf=False):
         """Get a specific waiver by the unique identifier
@@ -99,17 +659,114 @@ class Smartwaiver():
         :param waiver_id: The Unique identifier of the waiver to retrieve
         :type waiver_id: ``string``
 
-        :param pdf: Whether to include the Base64 Encoded PDF
+        :param pdf: Whether to include the Base64 Encoded PDF, otherwise it is fetched the first time it is used
         :type pdf: ``boolean``
 
         :return: The :class:`SmartwaiverWaiver` object that represents the waiver
         :rtype: smartwaiver.types.SmartwaiverWaiver
         """
 
-        url = SmartwaiverRoutes.get_waiver(waiver_id, pdf)
-        self._last_response = responses.SmartwaiverResponse(requests.get(url, headers=self._headers))
+        response = self._cached_waiver_request(waiver_id, pdf)
+
+        pdf_loader = None if pdf else partial(self._fetch_waiver_pdf, waiver_id)
+        return types.SmartwaiverWaiver._load(response.response_data, response.metadata, pdf_loader, lazy=self._lazy,
+                                              string_pool=self._string_pool)
+
+    def _fetch_waiver_pdf(self, waiver_id):
+        """Fetch the Base64 encoded PDF of a waiver that was fetched without it
+
+        :param waiver_id: The Unique identifier of the waiver
+        :type waiver_id: ``string``
+
+        :return: The Base64 encoded PDF
+        :rtype: ``string``
+        """
+
+        # The fetch happens behind the caller's back, so keep their last response
+        last_response = self.last_response
+        try:
+            return self.get_waiver(waiver_id, True).pdf
+        finally:
+            self._local.last_response = last_response
+
+    def download_waiver_pdf(self, waiver_id, fileobj):
+        """Download the PDF of a waiver and write it to a file. The response
+        is read and decoded a chunk at a time, so the PDF is never held in
+        memory as a whole.
+
+        :param waiver_id: The Unique identifier of the waiver
+        :type waiver_id: ``string``
+
+        :param fileobj: A binary file (or anything with a write method) to write the PDF to
+        :type fileobj: ``file``
 
-        return types.SmartwaiverWaiver(self._last_response.response_data)
+        :return: The :class:`SmartwaiverWaiver` object that represents the waiver, without the PDF
+        :rtype: smartwaiver.types.SmartwaiverWaiver
+        """
+
+        url = SmartwaiverRoutes.get_waiver(waiver_id, True)
+
+        start = time.monotonic()
+        response = self._request('GET', url, stream=True)
+        try:
+            if response.status_code == 200:
+                decoder = smartwaiver.pdf.SmartwaiverPdfDecoder(fileobj)
+                try:
+                    for chunk in response.iter_content(smartwaiver.pdf.CHUNK_SIZE):
+                        decoder.feed(chunk)
+                except requests.exceptions.ConnectionError as err:
+                    if not _is_read_timeout(err):
+                        raise
+                    raise exceptions.SmartwaiverTimeoutException(
+                        None, 'Timed out reading the PDF from API server after ' + str(self._read_timeout) + 's',
+                        time.monotonic() - start, self._read_timeout) from err
+                stored = responses.SmartwaiverStoredResponse(decoder.close(), response.status_code, response.headers)
+                api_response = responses.SmartwaiverResponse(stored, time.monotonic() - start, self._json_decoder)
+                if not decoder.pdf_found:
+                    raise exceptions.SmartwaiverSDKException(response, 'Waiver response does not include the PDF')
+            else:
+                api_response = responses.SmartwaiverResponse(response, time.monotonic() - start, self._json_decoder)
+        finally:
+            response.close()
+
+        self._local.last_response = api_response
+        return types.SmartwaiverWaiver._load(api_response.response_data, api_response.metadata, lazy=self._lazy,
+                                              string_pool=self._string_pool)
+
+    def get_waivers(self, waiver_ids, pdf=False, max_workers=8):
+        """Get many waivers by their unique identifiers, fetching several at
+        once. A failure to fetch one waiver does not stop the others.
+
+        :param waiver_ids: The unique identifiers of the waivers to retrieve
+        :type waiver_ids: ``list``
+
+        :param pdf: Whether to include the Base64 Encoded PDF
+        :type pdf: ``boolean``
+
+        :param max_workers: The maximum number of waivers to fetch at the same time
+        :type max_workers: ``integer``
+
+        :return: A :class:`SmartwaiverBulkResult` for each waiver ID, in the same order as given
+        :rtype: ``list``
+        """
+
+        waiver_ids = list(waiver_ids)
+
+        def fetch(waiver_id):
+            try:
+                return responses.SmartwaiverBulkResult(waiver_id, waiver=self.get_waiver(waiver_id, pdf))
+            except (exceptions.SmartwaiverSDKException, requests.exceptions.RequestException, ValueError) as err:
+                return responses.SmartwaiverBulkResult(waiver_id, error=err)
+
+        # Each distinct waiver is only fetched once
+        unique_ids = list(dict.fromkeys(waiver_ids))
+        if not unique_ids:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_ids))) as executor:
+            results = dict(zip(unique_ids, executor.map(fetch, unique_ids)))
+
+        return [results[waiver_id] for waiver_id in waiver_ids]
 
     def get_webhook_config(self):
         """Get your account's current webhook configuration
@@ -119,9 +776,9 @@ class Smartwaiver():
         """
 
         url = SmartwaiverRoutes.get_webhook_config()
-        self._last_response = responses.SmartwaiverResponse(requests.get(url, headers=self._headers))
+        response = self._api_request('GET', url)
 
-        return types.SmartwaiverWebhook(self._last_response.response_data)
+        return types.SmartwaiverWebhook(response.response_data, response.metadata)
 
     def set_webhook_config(self, endpoint, email_validation_required):
         """Set your account's webhook configuration
@@ -141,9 +798,9 @@ class Smartwaiver():
             'emailValidationRequired': email_validation_required
         }
         url = SmartwaiverRoutes.set_webhook_config()
-        self._last_response = responses.SmartwaiverResponse(requests.put(url, headers=self._headers, json=config))
+        response = self._api_request('PUT', url, json=config)
 
-        return types.SmartwaiverWebhook(self._last_response.response_data)
+        return types.SmartwaiverWebhook(response.response_data, response.metadata)
 
     def set_webhook(self, webhook):
         """Set your account's webhook configuration
@@ -165,7 +822,7 @@ class Smartwaiver():
         """
 
         url = SmartwaiverRoutes.get_waiver_templates()
-        return responses.SmartwaiverRawResponse(requests.get(url, headers=self._headers))
+        return responses.SmartwaiverRawResponse(self._request('GET', url))
 
     def get_waiver_template_raw(self, template_id):
         """Get a specific waiver template by providing the unique identifier (raw version)
@@ -178,7 +835,7 @@ class Smartwaiver():
         """
 
         url = SmartwaiverRoutes.get_waiver_template(template_id)
-        return responses.SmartwaiverRawResponse(requests.get(url, headers=self._headers))
+        return responses.SmartwaiverRawResponse(self._request('GET', url))
 
     def get_waiver_summaries_raw(self, limit=20, verified=None, template_id='', from_dts='', to_dts=''):
         """Execute a query to find waivers, the returned objects will be waiver summaries (raw version)
@@ -203,7 +860,7 @@ class Smartwaiver():
         """
 
         url = SmartwaiverRoutes.get_waiver_summaries(limit, verified, template_id, from_dts, to_dts)
-        return responses.SmartwaiverRawResponse(requests.get(url, headers=self._headers))
+        return responses.SmartwaiverRawResponse(self._request('GET', url))
 
     def get_waiver_raw(self, waiver_id, pdf=False):
         """Get a specific waiver by the unique identifier (raw version)
@@ -219,7 +876,7 @@ class Smartwaiver():
         """
 
         url = SmartwaiverRoutes.get_waiver(waiver_id, pdf)
-        return responses.SmartwaiverRawResponse(requests.get(url, headers=self._headers))
+        return responses.SmartwaiverRawResponse(self._request('GET', url))
 
     def get_webhook_config_raw(self):
         """Get your account's current webhook configuration (raw version)
@@ -229,7 +886,7 @@ class Smartwaiver():
         """
 
         url = SmartwaiverRoutes.get_webhook_config()
-        return responses.SmartwaiverRawResponse(requests.get(url, headers=self._headers))
+        return responses.SmartwaiverRawResponse(self._request('GET', url))
 
     def set_webhook_config_raw(self, endpoint, email_validation_required):
         """Set your account's webhook configuration (raw version)
@@ -249,17 +906,18 @@ class Smartwaiver():
             'emailValidationRequired': email_validation_required
         }
         url = SmartwaiverRoutes.set_webhook_config()
-        return responses.SmartwaiverRawResponse(requests.put(url, headers=self._headers, json=config))
+        return responses.SmartwaiverRawResponse(self._request('PUT', url, json=config))
 
     @property
     def last_response(self):
         """Get the SmartwaiverResponse objected created for the most recent API
-        request. Useful for error handling if an exception is thrown.
+        request made by the current thread. Useful for error handling if an
+        exception is thrown.
 
-        :return: The last response this object received from the API
+        :return: The last response this object received from the API in this thread
         :rtype: smartwaiver.responses.SmartwaiverResponse
         """
-        return self._last_response
+        return getattr(self._local, 'last_response', None)
 
 
 class SmartwaiverRoutes():
@@ -375,3 +1033,7 @@ class SmartwaiverRoutes():
         :rtype: ``string``
         """
         return SmartwaiverRoutes._base_uri + SmartwaiverRoutes._route_webhooks
+
+
+# Imported last as the asyncio client builds on the classes above
+from smartwaiver.aio import AsyncSmartwaiver
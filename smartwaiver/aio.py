@@ -0,0 +1,942 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+from contextlib import contextmanager
+import contextvars
+import json
+from platform import python_version
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+import smartwaiver
+from smartwaiver import decoders, exceptions, pagination, responses, retry, types
+
+# Errors raised by the transport when the API server could not be reached
+_connection_errors = (aiohttp.ClientConnectionError,) if aiohttp is not None else (OSError,)
+
+# All errors raised by the transport for a failed request
+_client_errors = (aiohttp.ClientError,) if aiohttp is not None else (OSError,)
+
+# Errors raised by the transport when connecting timed out, as opposed to reading
+_connect_timeout_errors = (aiohttp.ConnectionTimeoutError,) if hasattr(aiohttp, 'ConnectionTimeoutError') else ()
+
+
+class AsyncResponse:
+    """This class holds a fully read HTTP response from the asynchronous
+    transport. It provides the same attributes as a requests.Response so it
+    can be processed by :class:`SmartwaiverResponse` and
+    :class:`SmartwaiverRawResponse`.
+    """
+
+    def __init__(self, status_code, content, headers=None):
+        """Create an AsyncResponse from the parts of a completed response
+
+        :param status_code: The HTTP status code of the response
+        :type status_code: ``integer``
+
+        :param content: The raw body of the response
+        :type content: ``bytes``
+
+        :param headers: The headers of the response
+        :type headers: ``dict``
+        """
+
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers if headers is not None else {}
+
+    @property
+    def text(self):
+        """Returns the body of the response decoded as text
+
+        :return: The body of the response
+        :rtype: ``string``
+        """
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        """Returns the body of the response parsed as JSON
+
+        :return: The parsed body
+        :rtype: ``dict``
+        """
+        return json.loads(self.text)
+
+
+class AsyncSmartwaiver():
+    """This class is an asyncio version of :class:`smartwaiver.Smartwaiver`.
+    Every API method is a coroutine and returns the same types as the
+    synchronous client. Requires the aiohttp package.
+    """
+
+    _version = smartwaiver.Smartwaiver._version
+
+    def __init__(self, api_key, session=None, pool_maxsize=100, pool_maxsize_per_host=0, keep_alive=True,
+                 retry_policy=None, rate_limiter=None, connect_timeout=10.0, read_timeout=60.0, deadline=None,
+                 template_cache=None, waiver_cache=None, json_decoder='auto', lazy=False, string_pool=None):
+        """Creates a new AsyncSmartwaiver object.
+
+        The underlying connection pool is created on first use, so the object
+        can be constructed outside of a running event loop. Call :meth:`close`
+        (or use the object as an async context manager) to release it.
+
+        :param api_key: The API Key for the account
+        :type api_key: ``string``
+
+        :param session: An existing session to send requests through instead of creating one. Without aiohttp installed, it keeps its own timeouts.
+        :type session: aiohttp.ClientSession
+
+        :param pool_maxsize: The maximum number of connections to keep open in total (0 for no limit)
+        :type pool_maxsize: ``integer``
+
+        :param pool_maxsize_per_host: The maximum number of connections to keep open per host (0 for no limit)
+        :type pool_maxsize_per_host: ``integer``
+
+        :param keep_alive: Whether to keep connections open between requests
+        :type keep_alive: ``boolean``
+
+        :param retry_policy: When to retry failed requests, by default requests are not retried
+        :type retry_policy: smartwaiver.retry.SmartwaiverRetryPolicy
+
+        :param rate_limiter: A rate limiter every request (including retries) must pass through
+        :type rate_limiter: smartwaiver.ratelimit.SmartwaiverRateLimiter
+
+        :param connect_timeout: Seconds to wait for a connection to the API server (None to wait forever)
+        :type connect_timeout: ``float``
+
+        :param read_timeout: Seconds to wait for the API server to send data (None to wait forever)
+        :type read_timeout: ``float``
+
+        :param deadline: Seconds each call may take in total, including retries (None for no limit)
+        :type deadline: ``float``
+
+        :param template_cache: A cache for the responses of the template endpoints, by default they are not cached
+        :type template_cache: smartwaiver.cache.SmartwaiverResponseCache
+
+        :param waiver_cache: A cache on disk for signed waivers, by default they are not cached
+        :type waiver_cache: smartwaiver.cache.SmartwaiverWaiverCache
+
+        :param json_decoder: The JSON decoder for responses: 'auto' for the fastest one installed, a name from :data:`smartwaiver.decoders.AUTO_ORDER`, 'typed' (not with lazy or string_pool), or a function
+        :type json_decoder: ``string``
+
+        :param lazy: Whether waivers and waiver summaries load each field the first time it is used, rather than all of them when created (see :meth:`smartwaiver.types.SmartwaiverType.validate`)
+        :type lazy: ``boolean``
+
+        :param string_pool: A pool to share repeated strings, such as template IDs, titles and tags, between the objects created
+        :type string_pool: smartwaiver.interning.SmartwaiverStringPool
+        """
+
+        if aiohttp is None and session is None:
+            raise ImportError('AsyncSmartwaiver requires the aiohttp package')
+
+        # The last response and deadline are kept per task so one object can be shared
+        self._last_response = contextvars.ContextVar('last_response', default=None)
+        self._task_deadline = contextvars.ContextVar('deadline', default=deadline)
+        self._headers = {
+            'user-agent': 'SmartwaiverSDK:' + self._version + '-python:' + python_version(),
+            'sw-api-key': api_key
+        }
+
+        self._pool_maxsize = pool_maxsize
+        self._pool_maxsize_per_host = pool_maxsize_per_host
+        self._keep_alive = keep_alive
+
+        # Only close the session on exit if we were the ones to create it
+        self._owns_session = session is None
+        self._session = session
+
+        self._retry_policy = retry_policy
+        self._retry_stats = retry.SmartwaiverRetryStats()
+        self._rate_limiter = rate_limiter
+
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+
+        self._template_cache = template_cache
+        self._waiver_cache = waiver_cache
+        self._json_decoder = decoders.get_decoder(json_decoder)
+        self._lazy = lazy
+        self._string_pool = string_pool
+
+        # The typed decoder creates the objects before the client sees them
+        if self._json_decoder is decoders.decode_typed and (lazy or string_pool is not None):
+            raise ValueError("The 'typed' JSON decoder cannot be used with lazy or string_pool")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Close the pooled connections held by this object. A session passed
+        in by the caller is left open.
+        """
+
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self):
+        """Get the HTTP session that all requests are sent through, creating
+        it if needed
+
+        :return: The session used for requests to the API server
+        :rtype: aiohttp.ClientSession
+        """
+
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self._pool_maxsize,
+                                             limit_per_host=self._pool_maxsize_per_host,
+                                             force_close=not self._keep_alive)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    @contextmanager
+    def with_deadline(self, deadline):
+        """Set the deadline for calls made by the current task inside a with
+        block, replacing the deadline given to the constructor
+
+        :param deadline: Seconds each call may take in total, including retries (None for no limit)
+        :type deadline: ``float``
+        """
+
+        token = self._task_deadline.set(deadline)
+        try:
+            yield self
+        finally:
+            self._task_deadline.reset(token)
+
+    @property
+    def retry_stats(self):
+        """Get the counters for how many requests have been retried and how
+        long was spent waiting between attempts
+
+        :return: The retry counters for this object
+        :rtype: smartwaiver.retry.SmartwaiverRetryStats
+        """
+        return self._retry_stats
+
+    @property
+    def template_cache(self):
+        """Get the cache used for the template endpoints
+
+        :return: The template cache, or None if templates are not cached
+        :rtype: smartwaiver.cache.SmartwaiverResponseCache
+        """
+        return self._template_cache
+
+    @property
+    def waiver_cache(self):
+        """Get the disk cache used for signed waivers
+
+        :return: The waiver cache, or None if waivers are not cached
+        :rtype: smartwaiver.cache.SmartwaiverWaiverCache
+        """
+        return self._waiver_cache
+
+    async def _request(self, method, url, **kwargs):
+        """Send a request to the API server through the pooled session,
+        retrying according to the retry policy until the deadline
+
+        :param method: The HTTP method to use
+        :type method: ``string``
+
+        :param url: The URL to send the request to
+        :type url: ``string``
+
+        :return: The response from the server
+        :rtype: smartwaiver.aio.AsyncResponse
+        """
+
+        start = time.monotonic()
+        deadline = self._task_deadline.get()
+
+        attempt = 0
+        while True:
+            attempt += 1
+
+            # A call that cannot be sent before its deadline fails without
+            # reaching the server, so it is not retried
+            remaining = await self._wait_to_send(start, deadline)
+            try:
+                response = await self._send(method, url, start, deadline, remaining, **kwargs)
+            except (exceptions.SmartwaiverTimeoutException,) + _connection_errors:
+                if not self._should_retry(method, attempt):
+                    raise
+                delay = self._retry_policy.backoff(attempt)
+            else:
+                if not self._should_retry(method, attempt, response.status_code):
+                    return response
+                delay = self._retry_policy.backoff(attempt, response.headers.get('Retry-After'))
+
+            # Don't start a retry that could not finish before the deadline
+            elapsed = time.monotonic() - start
+            if deadline is not None and elapsed + delay >= deadline:
+                raise exceptions.SmartwaiverTimeoutException(
+                    None, 'Deadline of ' + str(deadline) + 's exceeded after ' + str(attempt) + ' attempts',
+                    elapsed, deadline)
+
+            self._retry_stats.record_retry(delay)
+            await asyncio.sleep(delay)
+
+    @property
+    def json_decoder(self):
+        """Returns the function responses are decoded with
+
+        :return: The JSON decode function
+        :rtype: ``callable``
+        """
+        return self._json_decoder
+
+    @property
+    def string_pool(self):
+        """Returns the pool repeated strings are shared through, if any
+
+        :return: The string pool
+        :rtype: smartwaiver.interning.SmartwaiverStringPool
+        """
+        return self._string_pool
+
+    async def _api_request(self, method, url, **kwargs):
+        """Send a request to the API server and process the response
+
+        :param method: The HTTP method to use
+        :type method: ``string``
+
+        :param url: The URL to send the request to
+        :type url: ``string``
+
+        :return: The processed response from the server
+        :rtype: smartwaiver.responses.SmartwaiverResponse
+        """
+
+        start = time.monotonic()
+        response = await self._request(method, url, **kwargs)
+        api_response = responses.SmartwaiverResponse(response, time.monotonic() - start, self._json_decoder)
+        self._last_response.set(api_response)
+
+        return api_response
+
+    async def _cached_api_request(self, url):
+        """Send a GET request through the template cache. A fresh cached
+        response is used without a request, a stale one is checked with the
+        server and only downloaded again if it has changed.
+
+        :param url: The URL to send the request to
+        :type url: ``string``
+
+        :return: The processed response from the server (or the cache)
+        :rtype: smartwaiver.responses.SmartwaiverResponse
+        """
+
+        cache = self._template_cache
+        if cache is None:
+            return await self._api_request('GET', url)
+
+        entry = cache.get(url)
+        if entry is not None and entry.is_fresh():
+            self._last_response.set(entry.value)
+            return entry.value
+
+        start = time.monotonic()
+        response = await self._request('GET', url, headers=entry.validators() if entry is not None else None)
+
+        if entry is not None and response.status_code == 304:
+            revalidated = cache.revalidate(url)
+            api_response = revalidated.value if revalidated is not None else entry.value
+        else:
+            api_response = responses.SmartwaiverResponse(response, time.monotonic() - start, self._json_decoder)
+            cache.put(url, api_response, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+        self._last_response.set(api_response)
+        return api_response
+
+    async def _cached_waiver_request(self, waiver_id, pdf):
+        """Get a waiver through the waiver cache. A waiver with the PDF that
+        needs refreshing is refreshed from the waiver without the PDF, so the
+        PDF is not downloaded again.
+
+        :param waiver_id: The Unique identifier of the waiver to retrieve
+        :type waiver_id: ``string``
+
+        :param pdf: Whether to include the Base64 Encoded PDF
+        :type pdf: ``boolean``
+
+        :return: The processed response from the server (or the cache)
+        :rtype: smartwaiver.responses.SmartwaiverResponse
+        """
+
+        cache = self._waiver_cache
+        url = smartwaiver.SmartwaiverRoutes.get_waiver(waiver_id, pdf)
+        if cache is None:
+            return await self._api_request('GET', url)
+
+        entry = cache.get(waiver_id, pdf)
+        if entry is not None and entry.is_fresh():
+            api_response = cache.load(entry, self._json_decoder)
+            self._last_response.set(api_response)
+            return api_response
+
+        if entry is not None and pdf:
+            current = await self._api_request('GET', smartwaiver.SmartwaiverRoutes.get_waiver(waiver_id, False))
+            api_response = cache.refresh(waiver_id, entry, current, self._json_decoder)
+        else:
+            api_response = await self._api_request('GET', url)
+            cache.put(waiver_id, pdf, api_response.response.text)
+
+        self._last_response.set(api_response)
+        return api_response
+
+    def _record_exhausted(self, method, attempt, status_code=None):
+        """Count a request that is giving up on a retryable failure
+
+        :param method: The HTTP method of the request
+        :type method: ``string``
+
+        :param attempt: The number of attempts made
+        :type attempt: ``integer``
+
+        :param status_code: The status code of the last response, or None if the server could not be reached
+        :type status_code: ``integer``
+        """
+
+        if attempt > 1 and self._retry_policy.is_retryable(method, status_code):
+            self._retry_stats.record_exhausted()
+
+    def _should_retry(self, method, attempt, status_code=None):
+        """Returns whether a failed request should be sent again, counting it
+        as exhausted if not
+
+        :param method: The HTTP method of the request
+        :type method: ``string``
+
+        :param attempt: The number of attempts made
+        :type attempt: ``integer``
+
+        :param status_code: The status code of the response, or None if the server could not be reached
+        :type status_code: ``integer``
+
+        :return: Whether to retry the request
+        :rtype: ``boolean``
+        """
+
+        if self._retry_policy is None:
+            return False
+
+        if not self._retry_policy.should_retry(method, attempt, status_code):
+            self._record_exhausted(method, attempt, status_code)
+            return False
+
+        return True
+
+    async def _wait_to_send(self, start, deadline):
+        """Wait until the rate limiter allows a request, unless the request
+        could then not be sent before the deadline
+
+        :param start: The time the call started (from time.monotonic)
+        :type start: ``float``
+
+        :param deadline: Seconds the call may take in total, or None for no limit
+        :type deadline: ``float``
+
+        :return: The seconds left before the deadline, or None for no limit
+        :rtype: ``float``
+        """
+
+        if self._rate_limiter is not None:
+            delay = self._rate_limiter.reserve()
+
+            # Don't wait for a token that would only be free after the deadline
+            if deadline is not None and time.monotonic() - start + delay > deadline:
+                self._rate_limiter.release(delay)
+                elapsed = time.monotonic() - start
+                raise exceptions.SmartwaiverTimeoutException(
+                    None, 'Deadline of ' + str(deadline) + 's exceeded waiting for the rate limiter', elapsed, deadline)
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        if deadline is None:
+            return None
+
+        elapsed = time.monotonic() - start
+        remaining = deadline - elapsed
+        if remaining <= 0:
+            raise exceptions.SmartwaiverTimeoutException(
+                None, 'Deadline of ' + str(deadline) + 's exceeded before request was sent', elapsed, deadline)
+        return remaining
+
+    async def _send(self, method, url, start, deadline, remaining, headers=None, consumer=None, **kwargs):
+        """Send a single request to the API server and read the whole body,
+        with timeouts cut down to fit in the deadline
+
+        :param method: The HTTP method to use
+        :type method: ``string``
+
+        :param url: The URL to send the request to
+        :type url: ``string``
+
+        :param start: The time the call started (from time.monotonic)
+        :type start: ``float``
+
+        :param deadline: Seconds the call may take in total, or None for no limit
+        :type deadline: ``float``
+
+        :param remaining: Seconds left before the deadline, or None for no limit
+        :type remaining: ``float``
+
+        :param headers: Headers to send as well as the usual ones
+        :type headers: ``dict``
+
+        :param consumer: Something with a feed method to pass the body of a successful response to, instead of reading it
+        :type consumer: smartwaiver.pdf.SmartwaiverPdfDecoder
+
+        :return: The response from the server
+        :rtype: smartwaiver.aio.AsyncResponse
+        """
+
+        if headers:
+            headers = dict(self._headers, **headers)
+        else:
+            headers = self._headers
+
+        # A session passed in without aiohttp installed keeps its own timeouts
+        if aiohttp is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=remaining, sock_connect=self._connect_timeout,
+                                                      sock_read=self._read_timeout)
+        try:
+            async with self.session.request(method, url, headers=headers, **kwargs) as response:
+                if consumer is not None and response.status == 200:
+                    await self._stream(response, consumer)
+                    return AsyncResponse(response.status, b'', response.headers)
+                content = await response.read()
+                return AsyncResponse(response.status, content, response.headers)
+        except asyncio.TimeoutError as err:
+            elapsed = time.monotonic() - start
+            if isinstance(err, _connect_timeout_errors):
+                limit = self._connect_timeout
+            elif remaining is not None and elapsed >= deadline:
+                limit = deadline
+            else:
+                limit = self._read_timeout
+            raise exceptions.SmartwaiverTimeoutException(
+                None, 'Timed out waiting for API server after ' + str(limit) + 's', elapsed, limit) from err
+
+    @staticmethod
+    async def _stream(response, consumer):
+        """Pass the body of a response to a consumer a chunk at a time. A
+        failure part way through is not retried, as part of the body has
+        already been passed on.
+
+        :param response: The response to read
+        :type response: aiohttp.ClientResponse
+
+        :param consumer: Something with a feed method to pass the body to
+        :type consumer: smartwaiver.pdf.SmartwaiverPdfDecoder
+        """
+
+        try:
+            async for chunk in response.content.iter_chunked(smartwaiver.pdf.CHUNK_SIZE):
+                consumer.feed(chunk)
+        except (asyncio.TimeoutError,) + _client_errors as err:
+            raise exceptions.SmartwaiverSDKException(None, 'Response failed part way through: ' + str(err)) from err
+
+    async def get_waiver_templates(self):
+        """Get a list of waiver templates for this account
+
+        :return: The :class:`SmartwaiverTemplate` object that represents the waiver template
+        :rtype: smartwaiver.types.SmartwaiverTemplate
+        """
+
+        url = smartwaiver.SmartwaiverRoutes.get_waiver_templates()
+        response = await self._cached_api_request(url)
+
+        return [types.SmartwaiverTemplate._load(template, response.metadata, string_pool=self._string_pool)
+                for template in response.response_data]
+
+    async def get_waiver_template(self, template_id):
+        """Get a specific waiver template by providing the unique identifier
+
+        :param template_id: The unique identifier of the specific waiver template
+        :type template_id: ``string``
+
+        :return: The :class:`SmartwaiverTemplate` object that represents the waiver template
+        :rtype: smartwaiver.types.SmartwaiverTemplate
+        """
+
+        url = smartwaiver.SmartwaiverRoutes.get_waiver_template(template_id)
+        response = await self._cached_api_request(url)
+
+        return types.SmartwaiverTemplate._load(response.response_data, response.metadata, string_pool=self._string_pool)
+
+    async def get_waiver_summaries(self, limit=20, verified=None, template_id='', from_dts='', to_dts='',
+                                   columnar=False):
+        """Execute a query to find waivers, the returned objects will be waiver summaries
+
+        :param limit: Limit query to this number of the most recent waivers.
+        :type limit: ``integer``
+
+        :param verified: Limit query to verified by email (true) or not verified (false) or both (None).
+        :type verified: ``boolean``
+
+        :param template_id: Limit query to signed waivers of the given waiver template ID.
+        :type template_id: ``string``
+
+        :param from_dts: Limit query to waivers between this ISO 8601 date and the toDts parameter.
+        :type from_dts: ``string``
+
+        :param to_dts: Limit query to waivers between this ISO 8601 date and the fromDts parameter.
+        :type to_dts: ``string``
+
+        :param columnar: Return the summaries as one column per field rather than one object per waiver
+        :type columnar: ``boolean``
+
+        :return: A list of :class:`SmartwaiverWaiverSummary` object's that represent the waivers, or a :class:`SmartwaiverSummaryColumns` if columnar
+        :rtype: ``list``
+        """
+
+        url = smartwaiver.SmartwaiverRoutes.get_waiver_summaries(limit, verified, template_id, from_dts, to_dts)
+        response = await self._api_request('GET', url)
+
+        if columnar:
+            return smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(
+                response.response_data, response.metadata, string_pool=self._string_pool)
+
+        return [types.SmartwaiverWaiverSummary._load(waiver_summary, response.metadata, lazy=self._lazy,
+                                                     string_pool=self._string_pool)
+                for waiver_summary in response.response_data]
+
+    async def iter_waiver_summaries(self, verified=None, template_id='', from_dts='', to_dts='', page_size=100,
+                                    columnar=False):
+        """Iterate over every waiver summary matching a query, however many
+        there are. Pages of summaries are requested as they are needed, so
+        memory use stays the same regardless of the size of the date range.
+
+        :param verified: Limit query to verified by email (true) or not verified (false) or both (None).
+        :type verified: ``boolean``
+
+        :param template_id: Limit query to signed waivers of the given waiver template ID.
+        :type template_id: ``string``
+
+        :param from_dts: Limit query to waivers signed at or after this ISO 8601 date.
+        :type from_dts: ``string``
+
+        :param to_dts: Limit query to waivers signed at or before this ISO 8601 date.
+        :type to_dts: ``string``
+
+        :param page_size: The number of summaries to request at a time (1-100).
+        :type page_size: ``integer``
+
+        :param columnar: Yield each page as a :class:`SmartwaiverSummaryColumns` rather than one summary at a time
+        :type columnar: ``boolean``
+
+        :return: The :class:`SmartwaiverWaiverSummary` objects, newest first, or the pages as columns
+        :rtype: ``generator``
+        """
+
+        pager = pagination.SmartwaiverSummaryPager(from_dts, to_dts, page_size)
+        while not pager.done:
+            page = await self.get_waiver_summaries(page_size, verified, template_id, pager.from_dts, pager.to_dts,
+                                                   columnar)
+            new = pager.add_page(page)
+            if columnar:
+                if new:
+                    yield new
+                continue
+            for summary in new:
+                yield summary
+
+    async def backfill_waiver_summaries(self, from_dts, to_dts, shards=8, max_workers=8, verified=None,
+                                        template_id='', columnar=False):
+        """Get every waiver summary in a date range by splitting the range
+        into shards and querying several shards at once. Any shard with more
+        waivers than one query returns is split again until all are fetched.
+
+        :param from_dts: Get waivers signed at or after this ISO 8601 date.
+        :type from_dts: ``string``
+
+        :param to_dts: Get waivers signed at or before this ISO 8601 date.
+        :type to_dts: ``string``
+
+        :param shards: The number of shards to split the date range into to start with
+        :type shards: ``integer``
+
+        :param max_workers: The maximum number of shards to query at the same time
+        :type max_workers: ``integer``
+
+        :param verified: Limit query to verified by email (true) or not verified (false) or both (None).
+        :type verified: ``boolean``
+
+        :param template_id: Limit query to signed waivers of the given waiver template ID.
+        :type template_id: ``string``
+
+        :param columnar: Return the summaries as one column per field rather than one object per waiver
+        :type columnar: ``boolean``
+
+        :return: A list of :class:`SmartwaiverWaiverSummary` objects, oldest first, or a :class:`SmartwaiverSummaryColumns` if columnar
+        :rtype: ``list``
+        """
+
+        semaphore = asyncio.Semaphore(max_workers)
+        pages = []
+
+        async def fetch(shard):
+            async with semaphore:
+                page = await self.get_waiver_summaries(pagination.MAX_PAGE_SIZE, verified, template_id,
+                                                       shard[0], shard[1], columnar)
+            pages.append(page)
+            await asyncio.gather(*[fetch(sub_shard) for sub_shard in pagination.split_full_page(shard[0], page)])
+
+        await asyncio.gather(*[fetch(shard) for shard in pagination.split_range(from_dts, to_dts, shards)])
+
+        return pagination.merge_pages(pages)
+
+    async def get_waiver(self, waiver_id, pdf=False):
+        """Get a specific waiver by the unique identifier
+
+        :param waiver_id: The Unique identifier of the waiver to retrieve
+        :type waiver_id: ``string``
+
+        :param pdf: Whether to include the Base64 Encoded PDF
+        :type pdf: ``boolean``
+
+        :return: The :class:`SmartwaiverWaiver` object that represents the waiver
+        :rtype: smartwaiver.types.SmartwaiverWaiver
+        """
+
+        response = await self._cached_waiver_request(waiver_id, pdf)
+
+        return types.SmartwaiverWaiver._load(response.response_data, response.metadata, lazy=self._lazy,
+                                              string_pool=self._string_pool)
+
+    async def download_waiver_pdf(self, waiver_id, fileobj):
+        """Download the PDF of a waiver and write it to a file. The response
+        is read and decoded a chunk at a time, so the PDF is never held in
+        memory as a whole.
+
+        :param waiver_id: The Unique identifier of the waiver
+        :type waiver_id: ``string``
+
+        :param fileobj: A binary file (or anything with a write method) to write the PDF to
+        :type fileobj: ``file``
+
+        :return: The :class:`SmartwaiverWaiver` object that represents the waiver, without the PDF
+        :rtype: smartwaiver.types.SmartwaiverWaiver
+        """
+
+        url = smartwaiver.SmartwaiverRoutes.get_waiver(waiver_id, True)
+        decoder = smartwaiver.pdf.SmartwaiverPdfDecoder(fileobj)
+
+        start = time.monotonic()
+        response = await self._request('GET', url, consumer=decoder)
+        if response.status_code == 200:
+            response = responses.SmartwaiverStoredResponse(decoder.close(), response.status_code, response.headers)
+        api_response = responses.SmartwaiverResponse(response, time.monotonic() - start, self._json_decoder)
+        if not decoder.pdf_found:
+            raise exceptions.SmartwaiverSDKException(response, 'Waiver response does not include the PDF')
+
+        self._last_response.set(api_response)
+        return types.SmartwaiverWaiver._load(api_response.response_data, api_response.metadata, lazy=self._lazy,
+                                              string_pool=self._string_pool)
+
+    async def get_waivers(self, waiver_ids, pdf=False, max_workers=8):
+        """Get many waivers by their unique identifiers, fetching several at
+        once. A failure to fetch one waiver does not stop the others.
+
+        :param waiver_ids: The unique identifiers of the waivers to retrieve
+        :type waiver_ids: ``list``
+
+        :param pdf: Whether to include the Base64 Encoded PDF
+        :type pdf: ``boolean``
+
+        :param max_workers: The maximum number of waivers to fetch at the same time
+        :type max_workers: ``integer``
+
+        :return: A :class:`SmartwaiverBulkResult` for each waiver ID, in the same order as given
+        :rtype: ``list``
+        """
+
+        waiver_ids = list(waiver_ids)
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def fetch(waiver_id):
+            async with semaphore:
+                try:
+                    return responses.SmartwaiverBulkResult(waiver_id, waiver=await self.get_waiver(waiver_id, pdf))
+                except (exceptions.SmartwaiverSDKException, ValueError) + _client_errors as err:
+                    return responses.SmartwaiverBulkResult(waiver_id, error=err)
+
+        # Each distinct waiver is only fetched once
+        unique_ids = list(dict.fromkeys(waiver_ids))
+        results = dict(zip(unique_ids, await asyncio.gather(*[fetch(waiver_id) for waiver_id in unique_ids])))
+
+        return [results[waiver_id] for waiver_id in waiver_ids]
+
+    async def get_webhook_config(self):
+        """Get your account's current webhook configuration
+
+        :return: The new webhook settings
+        :rtype: smartwaiver.types.SmartwaiverWebhook
+        """
+
+        url = smartwaiver.SmartwaiverRoutes.get_webhook_config()
+        response = await self._api_request('GET', url)
+
+        return types.SmartwaiverWebhook(response.response_data, response.metadata)
+
+    async def set_webhook_config(self, endpoint, email_validation_required):
+        """Set your account's webhook configuration
+
+        :param endpoint: The URL endpoint for the webhook
+        :type endpoint: ``string``
+
+        :param email_validation_required: When to send the webhook, see :class:`SmartwaiverWebhook` for constants to use
+        :type email_validation_required: ``string``
+
+        :return: The new webhook settings
+        :rtype: smartwaiver.types.SmartwaiverWebhook
+        """
+
+        config = {
+            'endpoint': endpoint,
+            'emailValidationRequired': email_validation_required
+        }
+        url = smartwaiver.SmartwaiverRoutes.set_webhook_config()
+        response = await self._api_request('PUT', url, json=config)
+
+        return types.SmartwaiverWebhook(response.response_data, response.metadata)
+
+    async def set_webhook(self, webhook):
+        """Set your account's webhook configuration
+
+        :param webhook: The webhook settings to send to the API server
+        :type webhook: smartwaiver.types.SmartwaiverWebhook
+
+        :return: The new webhook settings
+        :rtype: smartwaiver.types.SmartwaiverWebhook
+        """
+
+        return await self.set_webhook_config(webhook.endpoint, webhook.email_validation_required)
+
+    async def get_waiver_templates_raw(self):
+        """Get a list of waiver templates for this account (raw version)
+
+        :return: The raw body and status code of the response from the server
+        :rtype: smartwaiver.responses.SmartwaiverRawResponse
+        """
+
+        url = smartwaiver.SmartwaiverRoutes.get_waiver_templates()
+        return responses.SmartwaiverRawResponse(await self._request('GET', url))
+
+    async def get_waiver_template_raw(self, template_id):
+        """Get a specific waiver template by providing the unique identifier (raw version)
+
+        :param template_id: The unique identifier of the specific waiver template
+        :type template_id: ``string``
+
+        :return: The raw body and status code of the response from the server
+        :rtype: smartwaiver.responses.SmartwaiverRawResponse
+        """
+
+        url = smartwaiver.SmartwaiverRoutes.get_waiver_template(template_id)
+        return responses.SmartwaiverRawResponse(await self._request('GET', url))
+
+    async def get_waiver_summaries_raw(self, limit=20, verified=None, template_id='', from_dts='', to_dts=''):
+        """Execute a query to find waivers, the returned objects will be waiver summaries (raw version)
+
+        :param limit: Limit query to this number of the most recent waivers.
+        :type limit: ``integer``
+
+        :param verified: Limit query to verified by email (true) or not verified (false) or both (None).
+        :type verified: ``boolean``
+
+        :param template_id: Limit query to signed waivers of the given waiver template ID.
+        :type template_id: ``string``
+
+        :param from_dts: Limit query to waivers between this ISO 8601 date and the toDts parameter.
+        :type from_dts: ``string``
+
+        :param to_dts: Limit query to waivers between this ISO 8601 date and the fromDts parameter.
+        :type to_dts: ``string``
+
+        :return: The raw body and status code of the response from the server
+        :rtype: smartwaiver.responses.SmartwaiverRawResponse
+        """
+
+        url = smartwaiver.SmartwaiverRoutes.get_waiver_summaries(limit, verified, template_id, from_dts, to_dts)
+        return responses.SmartwaiverRawResponse(await self._request('GET', url))
+
+    async def get_waiver_raw(self, waiver_id, pdf=False):
+        """Get a specific waiver by the unique identifier (raw version)
+
+        :param waiver_id: The Unique identifier of the waiver to retrieve
+        :type waiver_id: ``string``
+
+        :param pdf: Whether to include the Base64 Encoded PDF
+        :type pdf: ``boolean``
+
+        :return: The raw body and status code of the response from the server
+        :rtype: smartwaiver.responses.SmartwaiverRawResponse
+        """
+
+        url = smartwaiver.SmartwaiverRoutes.get_waiver(waiver_id, pdf)
+        return responses.SmartwaiverRawResponse(await self._request('GET', url))
+
+    async def get_webhook_config_raw(self):
+        """Get your account's current webhook configuration (raw version)
+
+        :return: The raw body and status code of the response from the server
+        :rtype: smartwaiver.responses.SmartwaiverRawResponse
+        """
+
+        url = smartwaiver.SmartwaiverRoutes.get_webhook_config()
+        return responses.SmartwaiverRawResponse(await self._request('GET', url))
+
+    async def set_webhook_config_raw(self, endpoint, email_validation_required):
+        """Set your account's webhook configuration (raw version)
+
+        :param endpoint: The URL endpoint for the webhook
+        :type endpoint: ``string``
+
+        :param email_validation_required: When to send the webhook, see :class:`SmartwaiverWebhook` for constants to use
+        :type email_validation_required: ``string``
+
+        :return: The raw body and status code of the response from the server
+        :rtype: smartwaiver.responses.SmartwaiverRawResponse
+        """
+
+        config = {
+            'endpoint': endpoint,
+            'emailValidationRequired': email_validation_required
+        }
+        url = smartwaiver.SmartwaiverRoutes.set_webhook_config()
+        return responses.SmartwaiverRawResponse(await self._request('PUT', url, json=config))
+
+    @property
+    def last_response(self):
+        """Get the SmartwaiverResponse objected created for the most recent API
+        request made by the current task. Useful for error handling if an
+        exception is thrown.
+
+        :return: The last response this object received from the API in this task
+        :rtype: smartwaiver.responses.SmartwaiverResponse
+        """
+        return self._last_response.get()
@@ -0,0 +1,590 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from smartwaiver import responses
+
+# The fields of a signed waiver that can still change after it is signed
+MUTABLE_WAIVER_FIELDS = ('verified', 'expired', 'expirationDate', 'tags')
+
+
+class SmartwaiverCacheEntry:
+    """This class holds one cached response and what is needed to check
+    whether it is still current with the API server.
+    """
+
+    def __init__(self, value, expires, etag=None, last_modified=None):
+        """Create a cache entry
+
+        :param value: The cached response (or response body)
+        :type value: smartwaiver.responses.SmartwaiverResponse
+
+        :param expires: The time (from time.monotonic) the entry stops being fresh, or None for never
+        :type expires: ``float``
+
+        :param etag: The ETag header of the response
+        :type etag: ``string``
+
+        :param last_modified: The Last-Modified header of the response
+        :type last_modified: ``string``
+        """
+
+        self._value = value
+        self._expires = expires
+        self._etag = etag
+        self._last_modified = last_modified
+
+    def is_fresh(self, now=None):
+        """Returns whether the entry can be used without asking the server
+
+        :param now: The current time (from time.monotonic)
+        :type now: ``float``
+
+        :return: Whether the entry has not expired
+        :rtype: ``boolean``
+        """
+
+        if self._expires is None:
+            return True
+        return (time.monotonic() if now is None else now) < self._expires
+
+    def validators(self):
+        """Returns the headers that ask the server to only send the response
+        again if it has changed
+
+        :return: The conditional request headers, empty if the server gave no validators
+        :rtype: ``dict``
+        """
+
+        headers = {}
+        if self._etag is not None:
+            headers['If-None-Match'] = self._etag
+        if self._last_modified is not None:
+            headers['If-Modified-Since'] = self._last_modified
+        return headers
+
+    @property
+    def value(self):
+        """Returns the cached response
+
+        :return: The cached response
+        :rtype: smartwaiver.responses.SmartwaiverResponse
+        """
+        return self._value
+
+    @property
+    def etag(self):
+        """Returns the ETag header of the cached response
+
+        :return: The ETag, or None if the server did not send one
+        :rtype: ``string``
+        """
+        return self._etag
+
+    @property
+    def last_modified(self):
+        """Returns the Last-Modified header of the cached response
+
+        :return: The last modified date, or None if the server did not send one
+        :rtype: ``string``
+        """
+        return self._last_modified
+
+
+class SmartwaiverResponseCache:
+    """This class is an in-process cache of API responses, used by the client
+    for the template endpoints. It holds up to a fixed number of responses,
+    dropping the least recently used when full, and each response is fresh
+    for a fixed time. Once a response is stale the client asks the server
+    whether it has changed (when the server gave an ETag or Last-Modified
+    header) and only downloads it again if it has. It is safe to share
+    between threads, but should only be used by clients of one account.
+
+    Any object with the same ``get``, ``put`` and ``revalidate`` methods can
+    be given to the client instead.
+    """
+
+    def __init__(self, max_size=128, ttl=300.0):
+        """Create a new cache
+
+        :param max_size: The maximum number of responses to keep
+        :type max_size: ``integer``
+
+        :param ttl: Seconds a response is used without checking with the server (None for forever)
+        :type ttl: ``float``
+        """
+
+        if max_size < 1:
+            raise ValueError('Cache size must be at least one')
+
+        self._max_size = max_size
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+        self._hits = 0
+        self._misses = 0
+        self._revalidations = 0
+        self._evictions = 0
+
+    def get(self, key):
+        """Look up a response, counting a hit if it is fresh
+
+        :param key: The key of the response (the URL)
+        :type key: ``string``
+
+        :return: The entry for the response, fresh or stale, or None if there is none
+        :rtype: smartwaiver.cache.SmartwaiverCacheEntry
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            self._entries.move_to_end(key)
+            if entry.is_fresh():
+                self._hits += 1
+            return entry
+
+    def put(self, key, value, etag=None, last_modified=None):
+        """Store a response that had to be downloaded, counting a miss
+
+        :param key: The key of the response (the URL)
+        :type key: ``string``
+
+        :param value: The response
+        :type value: smartwaiver.responses.SmartwaiverResponse
+
+        :param etag: The ETag header of the response
+        :type etag: ``string``
+
+        :param last_modified: The Last-Modified header of the response
+        :type last_modified: ``string``
+        """
+
+        with self._lock:
+            self._misses += 1
+            self._entries[key] = SmartwaiverCacheEntry(value, self._expires(), etag, last_modified)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def revalidate(self, key):
+        """Mark a stale response as fresh again after the server said it has
+        not changed, counting a revalidation
+
+        :param key: The key of the response (the URL)
+        :type key: ``string``
+
+        :return: The renewed entry, or None if it has been removed in the meantime
+        :rtype: smartwaiver.cache.SmartwaiverCacheEntry
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            self._revalidations += 1
+            entry = SmartwaiverCacheEntry(entry.value, self._expires(), entry.etag, entry.last_modified)
+            self._entries[key] = entry
+            return entry
+
+    def invalidate(self, key):
+        """Remove a response from the cache
+
+        :param key: The key of the response (the URL)
+        :type key: ``string``
+        """
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove every response from the cache
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+    def _expires(self):
+        """Returns when a response stored now stops being fresh"""
+        return None if self._ttl is None else time.monotonic() + self._ttl
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def max_size(self):
+        """Returns the maximum number of responses kept
+
+        :return: The size of the cache
+        :rtype: ``integer``
+        """
+        return self._max_size
+
+    @property
+    def ttl(self):
+        """Returns the number of seconds a response is used without checking with the server
+
+        :return: The time to live in seconds, or None for forever
+        :rtype: ``float``
+        """
+        return self._ttl
+
+    @property
+    def hits(self):
+        """Returns the number of lookups answered without a request to the server
+
+        :return: The number of hits
+        :rtype: ``integer``
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """Returns the number of responses that had to be downloaded
+
+        :return: The number of misses
+        :rtype: ``integer``
+        """
+        return self._misses
+
+    @property
+    def revalidations(self):
+        """Returns the number of stale responses the server said had not changed
+
+        :return: The number of revalidations
+        :rtype: ``integer``
+        """
+        return self._revalidations
+
+    @property
+    def evictions(self):
+        """Returns the number of responses dropped to keep the cache within its size
+
+        :return: The number of evictions
+        :rtype: ``integer``
+        """
+        return self._evictions
+
+
+class SmartwaiverWaiverCache:
+    """This class is a cache of signed waivers on disk, used by the client
+    for :meth:`get_waiver`. Waivers are stored by waiver ID and whether they
+    include the PDF. The cache is kept under a size budget by removing the
+    least recently used waivers.
+
+    Files are written to a temporary name and then renamed, so several
+    processes can share one cache directory without reading a partly written
+    waiver.
+
+    A signed waiver only changes in a few fields (see
+    ``MUTABLE_WAIVER_FIELDS``). When ``refresh_after`` is set, a waiver older
+    than that is refreshed: a waiver with a PDF is refreshed by fetching the
+    waiver without the PDF and copying those fields over, and a waiver
+    without a PDF is downloaded again.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, refresh_after=None):
+        """Create a new disk cache
+
+        :param directory: The directory to keep the cached waivers in, created if it does not exist
+        :type directory: ``string``
+
+        :param max_bytes: The most disk space the cached waivers may use
+        :type max_bytes: ``integer``
+
+        :param refresh_after: Seconds after which a cached waiver is refreshed (None to never refresh)
+        :type refresh_after: ``float``
+        """
+
+        if max_bytes < 1:
+            raise ValueError('Cache size must be at least one byte')
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._refresh_after = refresh_after
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._evictions = 0
+
+        # A running total, corrected by a full scan whenever it goes over
+        # the budget as other processes may share the directory
+        self._size = sum(size for path, used, size in self._files())
+
+    def get(self, waiver_id, pdf):
+        """Look up a waiver, counting a hit if it does not need refreshing
+
+        :param waiver_id: The unique identifier of the waiver
+        :type waiver_id: ``string``
+
+        :param pdf: Whether the waiver includes the PDF
+        :type pdf: ``boolean``
+
+        :return: The entry holding the response body, or None if the waiver is not cached
+        :rtype: smartwaiver.cache.SmartwaiverCacheEntry
+        """
+
+        path = self._path(waiver_id, pdf)
+        try:
+            with open(path, 'r', encoding='utf-8') as cache_file:
+                stored_at = float(cache_file.readline())
+                text = cache_file.read()
+            # The modification time records when the waiver was last used
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        expires = None
+        if self._refresh_after is not None:
+            expires = time.monotonic() + stored_at + self._refresh_after - time.time()
+
+        entry = SmartwaiverCacheEntry(text, expires)
+        if entry.is_fresh():
+            with self._lock:
+                self._hits += 1
+        return entry
+
+    def put(self, waiver_id, pdf, text):
+        """Store a waiver that had to be downloaded, counting a miss
+
+        :param waiver_id: The unique identifier of the waiver
+        :type waiver_id: ``string``
+
+        :param pdf: Whether the waiver includes the PDF
+        :type pdf: ``boolean``
+
+        :param text: The body of the API response for the waiver
+        :type text: ``string``
+        """
+
+        with self._lock:
+            self._misses += 1
+        self._write(waiver_id, pdf, text)
+
+    def load(self, entry, decoder=None):
+        """Process a cached response body
+
+        :param entry: The entry returned by :meth:`get`
+        :type entry: smartwaiver.cache.SmartwaiverCacheEntry
+
+        :param decoder: The function to decode the body with, by default the standard library one
+        :type decoder: ``callable``
+
+        :return: The processed response
+        :rtype: smartwaiver.responses.SmartwaiverResponse
+        """
+        return responses.SmartwaiverResponse(responses.SmartwaiverStoredResponse(entry.value), decoder=decoder)
+
+    def refresh(self, waiver_id, entry, current, decoder=None):
+        """Refresh a cached waiver with a PDF from a response for the same
+        waiver without the PDF, counting a refresh
+
+        :param waiver_id: The unique identifier of the waiver
+        :type waiver_id: ``string``
+
+        :param entry: The stale entry returned by :meth:`get` for the waiver with the PDF
+        :type entry: smartwaiver.cache.SmartwaiverCacheEntry
+
+        :param current: The response for the waiver without the PDF
+        :type current: smartwaiver.responses.SmartwaiverResponse
+
+        :param decoder: The function to decode the refreshed body with, by default the standard library one
+        :type decoder: ``callable``
+
+        :return: The refreshed response for the waiver with the PDF
+        :rtype: smartwaiver.responses.SmartwaiverResponse
+        """
+
+        current_data = current.response_data
+        if not isinstance(current_data, dict):
+            # Decoded straight into a waiver object
+            current_data = json.loads(current.response.text)['waiver']
+
+        contents = json.loads(entry.value)
+        for field in MUTABLE_WAIVER_FIELDS:
+            if field in current_data:
+                contents['waiver'][field] = current_data[field]
+        text = json.dumps(contents)
+
+        with self._lock:
+            self._refreshes += 1
+        self._write(waiver_id, True, text)
+        self._write(waiver_id, False, current.response.text)
+
+        return responses.SmartwaiverResponse(responses.SmartwaiverStoredResponse(text), decoder=decoder)
+
+    def invalidate(self, waiver_id):
+        """Remove a waiver (with and without the PDF) from the cache
+
+        :param waiver_id: The unique identifier of the waiver
+        :type waiver_id: ``string``
+        """
+
+        for pdf in (False, True):
+            self._remove(self._path(waiver_id, pdf))
+
+    def clear(self):
+        """Remove every waiver from the cache
+        """
+
+        for path, used, size in self._files():
+            self._remove(path)
+
+    def _path(self, waiver_id, pdf):
+        """Returns the path of the file for a waiver"""
+
+        name = hashlib.sha1(str(waiver_id).encode('utf-8')).hexdigest()
+        return os.path.join(self._directory, name + ('-pdf' if pdf else '') + '.json')
+
+    def _files(self):
+        """Returns the path, last use and size of every cached waiver"""
+
+        files = []
+        for entry in os.scandir(self._directory):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((entry.path, stat.st_mtime, stat.st_size))
+        return files
+
+    def _write(self, waiver_id, pdf, text):
+        """Write a waiver to its file in one step and keep the cache within budget"""
+
+        data = (repr(time.time()) + '\n' + text).encode('utf-8')
+
+        fd, temp_path = tempfile.mkstemp(dir=self._directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, self._path(waiver_id, pdf))
+        except BaseException:
+            self._remove(temp_path)
+            raise
+
+        with self._lock:
+            self._size += len(data)
+            if self._size > self._max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove the least recently used waivers until the cache is within
+        budget, called with the lock held"""
+
+        files = sorted(self._files(), key=lambda file: file[1])
+        self._size = sum(size for path, used, size in files)
+
+        for path, used, size in files:
+            if self._size <= self._max_bytes:
+                break
+            if self._remove(path):
+                self._evictions += 1
+            self._size -= size
+
+    @staticmethod
+    def _remove(path):
+        """Remove a file that another process may have removed already
+
+        :return: Whether the file was removed by this call
+        :rtype: ``boolean``
+        """
+
+        try:
+            os.unlink(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    @property
+    def directory(self):
+        """Returns the directory the cached waivers are kept in
+
+        :return: The path of the directory
+        :rtype: ``string``
+        """
+        return self._directory
+
+    @property
+    def max_bytes(self):
+        """Returns the most disk space the cached waivers may use
+
+        :return: The size budget in bytes
+        :rtype: ``integer``
+        """
+        return self._max_bytes
+
+    @property
+    def refresh_after(self):
+        """Returns the number of seconds after which a cached waiver is refreshed
+
+        :return: The time in seconds, or None to never refresh
+        :rtype: ``float``
+        """
+        return self._refresh_after
+
+    @property
+    def hits(self):
+        """Returns the number of waivers read from the cache
+
+        :return: The number of hits
+        :rtype: ``integer``
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """Returns the number of waivers that had to be downloaded
+
+        :return: The number of misses
+        :rtype: ``integer``
+        """
+        return self._misses
+
+    @property
+    def refreshes(self):
+        """Returns the number of cached waivers refreshed without downloading the PDF again
+
+        :return: The number of refreshes
+        :rtype: ``integer``
+        """
+        return self._refreshes
+
+    @property
+    def evictions(self):
+        """Returns the number of waivers removed to keep the cache within budget
+
+        :return: The number of evictions
+        :rtype: ``integer``
+        """
+        return self._evictions
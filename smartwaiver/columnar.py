@@ -0,0 +1,300 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from array import array
+
+from smartwaiver import types
+
+# The key of the API response each column is loaded from, in order
+_keys = dict((name[1:], key) for name, key in types.SmartwaiverWaiverSummary._keys.items())
+
+# The names of the columns
+COLUMNS = tuple(_keys)
+
+# The columns that hold true, false or null, stored one byte per value
+BOOLEAN_COLUMNS = ('expired', 'verified', 'kiosk', 'is_minor')
+
+# How each boolean value is stored, and the value of each code (-1 is null)
+_bool_codes = {False: 0, True: 1, None: -1}
+_bool_values = (False, True, None)
+
+
+def _encode_bools(values):
+    """Store a column of booleans one byte per value, or as a list if it
+    holds anything other than true, false or null
+    """
+
+    try:
+        return array('b', [_bool_codes[value] for value in values])
+    except (KeyError, TypeError):
+        return list(values)
+
+
+def _decode(column):
+    """Returns the values of a column as a list"""
+
+    if isinstance(column, array):
+        return [_bool_values[code] for code in column]
+    return list(column)
+
+
+def _take(column, indices):
+    """Returns the values of a column at the given indices, stored the same way"""
+
+    if isinstance(column, array):
+        return array('b', [column[index] for index in indices])
+    return [column[index] for index in indices]
+
+
+class SmartwaiverSummaryColumns:
+    """This class holds a batch of waiver summaries as one column per field
+    rather than one object per waiver. Slicing and filtering work on the
+    columns, and :class:`SmartwaiverWaiverSummary` objects are only created
+    for the rows that are asked for.
+    """
+
+    def __init__(self, columns, response_metadata=None):
+        """Create a SmartwaiverSummaryColumns object from its columns
+
+        :param columns: The values of each field, by column name (see COLUMNS), all the same length
+        :type columns: ``dict``
+
+        :param response_metadata: The metadata of the API response the summaries came from
+        :type response_metadata: smartwaiver.responses.SmartwaiverResponseMetadata
+        """
+
+        missing = [name for name in COLUMNS if name not in columns]
+        if missing:
+            raise ValueError('Cannot create a SmartwaiverSummaryColumns with missing column: ' + missing[0])
+
+        lengths = set(len(columns[name]) for name in COLUMNS)
+        if len(lengths) > 1:
+            raise ValueError('Every column must be the same length')
+
+        self._columns = {}
+        for name in COLUMNS:
+            column = columns[name]
+            if name in BOOLEAN_COLUMNS and not isinstance(column, array):
+                column = _encode_bools(column)
+            elif not isinstance(column, (list, array)):
+                column = list(column)
+            self._columns[name] = column
+
+        self._length = lengths.pop() if lengths else 0
+        self._response_metadata = response_metadata
+
+    @classmethod
+    def from_summaries(cls, summaries, response_metadata=None, string_pool=None):
+        """Create a SmartwaiverSummaryColumns object from the waiver summaries
+        of an API response
+
+        :param summaries: The summaries, as dictionaries or :class:`SmartwaiverWaiverSummary` objects
+        :type summaries: ``list``
+
+        :param response_metadata: The metadata of the API response the summaries came from
+        :type response_metadata: smartwaiver.responses.SmartwaiverResponseMetadata
+
+        :param string_pool: A pool to share the repeated strings of the summaries through
+        :type string_pool: smartwaiver.interning.SmartwaiverStringPool
+
+        :return: The summaries as columns
+        :rtype: :class:`SmartwaiverSummaryColumns`
+        """
+
+        data = []
+        for summary in summaries:
+            if isinstance(summary, types.SmartwaiverWaiverSummary):
+                # Created by the typed decoder
+                summary = dict((key, getattr(summary, name)) for name, key in _keys.items())
+            else:
+                types.SmartwaiverType._check_required_keys(summary, types.SmartwaiverWaiverSummary._required_keys,
+                                                           types.SmartwaiverWaiverSummary.__name__)
+                if string_pool is not None:
+                    string_pool.intern_payload(summary)
+            data.append(summary)
+
+        return cls(dict((name, [summary[key] for summary in data]) for name, key in _keys.items()),
+                   response_metadata)
+
+    @classmethod
+    def concat(cls, parts):
+        """Join several batches of summaries into one, in order
+
+        :param parts: The batches to join
+        :type parts: ``list``
+
+        :return: The summaries of every batch
+        :rtype: :class:`SmartwaiverSummaryColumns`
+        """
+
+        parts = list(parts)
+        columns = {}
+        for name in COLUMNS:
+            if parts and all(isinstance(part._columns[name], array) for part in parts):
+                columns[name] = array('b')
+            else:
+                columns[name] = []
+            for part in parts:
+                column = part._columns[name]
+                columns[name].extend(column if type(column) is type(columns[name]) else _decode(column))
+
+        return cls(columns, parts[0].response_metadata if parts else None)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return self.rows()
+
+    def __getitem__(self, index):
+        """Returns one summary, or a batch of summaries for a slice
+
+        :param index: The index of the row, or a slice of rows
+        :type index: ``integer``
+
+        :return: The summary, or the summaries in the slice as columns
+        :rtype: :class:`SmartwaiverWaiverSummary`
+        """
+
+        if isinstance(index, slice):
+            return SmartwaiverSummaryColumns(
+                dict((name, column[index]) for name, column in self._columns.items()), self._response_metadata)
+
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('Summary index out of range')
+
+        return self._row(index)
+
+    def _row(self, index):
+        """Create the summary for one row"""
+
+        data = {}
+        for name, key in _keys.items():
+            column = self._columns[name]
+            data[key] = _bool_values[column[index]] if isinstance(column, array) else column[index]
+        return types.SmartwaiverWaiverSummary(data, self._response_metadata)
+
+    def rows(self):
+        """Create the summaries one at a time, in order
+
+        :return: The :class:`SmartwaiverWaiverSummary` objects
+        :rtype: ``generator``
+        """
+
+        for index in range(self._length):
+            yield self._row(index)
+
+    def column(self, name):
+        """Returns the values of one field for every summary
+
+        :param name: The name of the column (see COLUMNS), e.g. 'waiver_id' or 'verified'
+        :type name: ``string``
+
+        :return: The values, in order
+        :rtype: ``list``
+        """
+
+        if name not in self._columns:
+            raise ValueError('Unknown column: ' + str(name))
+        return _decode(self._columns[name])
+
+    def take(self, indices):
+        """Returns the summaries at the given indices, in the order given
+
+        :param indices: The indices of the rows to keep
+        :type indices: ``list``
+
+        :return: The summaries at those indices as columns
+        :rtype: :class:`SmartwaiverSummaryColumns`
+        """
+
+        indices = list(indices)
+        return SmartwaiverSummaryColumns(
+            dict((name, _take(column, indices)) for name, column in self._columns.items()), self._response_metadata)
+
+    def filter(self, mask):
+        """Returns the summaries where the mask is true
+
+        :param mask: A true or false value for every summary
+        :type mask: ``list``
+
+        :return: The summaries kept as columns
+        :rtype: :class:`SmartwaiverSummaryColumns`
+        """
+
+        mask = list(mask)
+        if len(mask) != self._length:
+            raise ValueError('Mask must have one value for every summary')
+        return self.take(index for index, keep in enumerate(mask) if keep)
+
+    def where(self, **conditions):
+        """Returns the summaries matching every condition. Each condition is
+        either a value the column must equal, or a function of the column
+        value that returns whether to keep the summary, e.g.
+        ``where(verified=True, created_on=lambda dts: dts >= '2017-01-01')``
+
+        :param conditions: The conditions, by column name
+        :type conditions: ``dict``
+
+        :return: The summaries kept as columns
+        :rtype: :class:`SmartwaiverSummaryColumns`
+        """
+
+        indices = range(self._length)
+        for name, condition in conditions.items():
+            if name not in self._columns:
+                raise ValueError('Unknown column: ' + str(name))
+
+            values = self._columns[name]
+            if isinstance(values, array):
+                if not callable(condition) and type(condition) in (bool, type(None)):
+                    # Compare the stored codes without decoding the column
+                    code = _bool_codes[condition]
+                    indices = [index for index in indices if values[index] == code]
+                    continue
+                values = _decode(values)
+
+            if callable(condition):
+                indices = [index for index in indices if condition(values[index])]
+            else:
+                indices = [index for index in indices if values[index] == condition]
+        return self.take(indices)
+
+    def to_dict(self):
+        """Returns the values of every column
+
+        :return: The values of each column as a list, by column name
+        :rtype: ``dict``
+        """
+        return dict((name, _decode(column)) for name, column in self._columns.items())
+
+    @property
+    def columns(self):
+        """Returns the names of the columns
+
+        :return: The column names
+        :rtype: ``tuple``
+        """
+        return COLUMNS
+
+    @property
+    def response_metadata(self):
+        """Returns the metadata of the API response the summaries came from
+
+        :return: The response metadata, if any
+        :rtype: smartwaiver.responses.SmartwaiverResponseMetadata
+        """
+        return self._response_metadata
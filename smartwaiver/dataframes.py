@@ -0,0 +1,275 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+from smartwaiver import columnar, pagination, tables, types
+
+# The columns parsed into datetimes, with the format of each. Values that do
+# not match, such as an empty expiration date, become NaT.
+DATETIME_COLUMNS = {
+    'created_on': pagination.DTS_FORMAT,
+    'published_on': pagination.DTS_FORMAT,
+    'expiration_date': '%Y-%m-%d',
+    'dob': '%Y-%m-%d',
+    'participant_dob': '%Y-%m-%d',
+}
+
+# The columns with few distinct values, stored as categoricals
+CATEGORY_COLUMNS = (
+    'template_id',
+    'title',
+    'address_state',
+    'address_country',
+    'drivers_license_state',
+    'guardian_relationship',
+    'participant_gender',
+)
+
+# The columns holding true, false or null, stored with the nullable boolean dtype
+BOOLEAN_COLUMNS = ('expired', 'verified', 'kiosk', 'is_minor', 'marketing_allowed', 'participant_is_minor')
+
+# The fields of each type, as (column name, API key)
+_summary_fields = [(name[1:], key) for name, key in types.SmartwaiverWaiverSummary._keys.items()]
+_waiver_fields = [(name[1:], key) for name, key in types.SmartwaiverWaiver._keys.items() if name != '_pdf']
+_template_fields = [
+    ('template_id', 'templateId'),
+    ('title', 'title'),
+    ('published_version', 'publishedVersion'),
+    ('published_on', 'publishedOn'),
+    ('web_url', 'webUrl'),
+    ('kiosk_url', 'kioskUrl'),
+]
+_guardian_fields = [
+    ('first_name', 'firstName'),
+    ('middle_name', 'middleName'),
+    ('last_name', 'lastName'),
+    ('phone', 'phone'),
+    ('relationship', 'relationship'),
+]
+_participant_fields = [
+    ('first_name', 'firstName'),
+    ('middle_name', 'middleName'),
+    ('last_name', 'lastName'),
+    ('dob', 'dob'),
+    ('is_minor', 'isMinor'),
+    ('gender', 'gender'),
+    ('phone', 'phone'),
+    ('tags', 'tags'),
+]
+
+
+def _get(record, name, key):
+    """Returns a field of an SDK object by property name, or of a decoded
+    payload by API key
+    """
+
+    if isinstance(record, dict):
+        return record[key]
+    return getattr(record, name)
+
+
+def _custom_values(fields):
+    """Returns the values of custom fields, from objects or payloads, by unique identifier"""
+    return dict((guid, _get(field, 'value', 'value')) for guid, field in fields.items())
+
+
+def _normalise(columns):
+    """Turn the boolean columns into true, false or None"""
+
+    for name in BOOLEAN_COLUMNS:
+        if name in columns:
+            columns[name] = [tables._boolean(value) for value in columns[name]]
+    return columns
+
+
+def summary_columns(summaries):
+    """Returns the columns of a list of waiver summaries
+
+    :param summaries: :class:`SmartwaiverWaiverSummary` objects or decoded payloads, or a :class:`SmartwaiverSummaryColumns`
+    :type summaries: ``list``
+
+    :return: The values of each field as a list, by column name
+    :rtype: ``dict``
+    """
+
+    if isinstance(summaries, columnar.SmartwaiverSummaryColumns):
+        return _normalise(summaries.to_dict())
+
+    summaries = list(summaries)
+    return _normalise(dict((name, [_get(summary, name, key) for summary in summaries])
+                           for name, key in _summary_fields))
+
+
+def waiver_columns(waivers, explode_participants=False):
+    """Returns the columns of a list of waivers. Custom waiver fields are a
+    dictionary of their values by unique identifier.
+
+    :param waivers: :class:`SmartwaiverWaiver` objects or decoded payloads
+    :type waivers: ``list``
+
+    :param explode_participants: Give each participant a row of its own, with the fields of its waiver repeated
+    :type explode_participants: ``boolean``
+
+    :return: The values of each field as a list, by column name
+    :rtype: ``dict``
+    """
+
+    waivers = list(waivers)
+
+    # The waiver, participant index and participant of each row
+    if explode_participants:
+        rows = []
+        for waiver in waivers:
+            participants = _get(waiver, 'participants', 'participants')
+            if not participants:
+                rows.append((waiver, None, None))
+            for index, participant in enumerate(participants or []):
+                rows.append((waiver, index, participant))
+    else:
+        rows = [(waiver, None, None) for waiver in waivers]
+
+    columns = dict((name, [_get(waiver, name, key) for waiver, index, participant in rows])
+                   for name, key in _waiver_fields)
+    columns['custom_waiver_fields'] = [_custom_values(_get(waiver, 'custom_waiver_fields', 'customWaiverFields'))
+                                       for waiver, index, participant in rows]
+
+    guardians = [_get(waiver, 'guardian', 'guardian') for waiver, index, participant in rows]
+    for name, key in _guardian_fields:
+        columns['guardian_' + name] = [None if guardian is None else _get(guardian, name, key)
+                                       for guardian in guardians]
+
+    if not explode_participants:
+        columns['participant_count'] = [len(_get(waiver, 'participants', 'participants')) for waiver in waivers]
+        return _normalise(columns)
+
+    columns['participant_index'] = [index for waiver, index, participant in rows]
+    for name, key in _participant_fields:
+        columns['participant_' + name] = [None if participant is None else _get(participant, name, key)
+                                          for waiver, index, participant in rows]
+    columns['participant_custom_fields'] = [
+        None if participant is None else
+        _custom_values(_get(participant, 'custom_participant_fields', 'customParticipantFields'))
+        for waiver, index, participant in rows]
+
+    return _normalise(columns)
+
+
+def template_columns(templates):
+    """Returns the columns of a list of waiver templates
+
+    :param templates: :class:`SmartwaiverTemplate` objects or decoded payloads
+    :type templates: ``list``
+
+    :return: The values of each field as a list, by column name
+    :rtype: ``dict``
+    """
+
+    templates = list(templates)
+    return dict((name, [_get(template, name, key) for template in templates]) for name, key in _template_fields)
+
+
+def _dataframe(columns):
+    """Create a DataFrame from columns, parsing the dates and setting the
+    dtype of the boolean and categorical columns one column at a time
+    """
+
+    if pandas is None:
+        raise ImportError('to_dataframe requires the pandas package')
+
+    data = {}
+    for name, values in columns.items():
+        if name in DATETIME_COLUMNS:
+            data[name] = pandas.to_datetime(pandas.Series(values, dtype=object), format=DATETIME_COLUMNS[name],
+                                            errors='coerce')
+        elif name in BOOLEAN_COLUMNS:
+            data[name] = pandas.array(values, dtype='boolean')
+        elif name in CATEGORY_COLUMNS:
+            data[name] = pandas.Categorical(values)
+        else:
+            data[name] = values
+    return pandas.DataFrame(data, columns=list(columns))
+
+
+def summaries_to_dataframe(summaries):
+    """Create a pandas DataFrame of waiver summaries, one row per summary
+
+    :param summaries: :class:`SmartwaiverWaiverSummary` objects or decoded payloads, or a :class:`SmartwaiverSummaryColumns`
+    :type summaries: ``list``
+
+    :return: The summaries
+    :rtype: ``pandas.DataFrame``
+    """
+    return _dataframe(summary_columns(summaries))
+
+
+def waivers_to_dataframe(waivers, explode_participants=False):
+    """Create a pandas DataFrame of waivers, one row per waiver or per participant
+
+    :param waivers: :class:`SmartwaiverWaiver` objects or decoded payloads
+    :type waivers: ``list``
+
+    :param explode_participants: Give each participant a row of its own, with the fields of its waiver repeated
+    :type explode_participants: ``boolean``
+
+    :return: The waivers
+    :rtype: ``pandas.DataFrame``
+    """
+    return _dataframe(waiver_columns(waivers, explode_participants))
+
+
+def templates_to_dataframe(templates):
+    """Create a pandas DataFrame of waiver templates, one row per template
+
+    :param templates: :class:`SmartwaiverTemplate` objects or decoded payloads
+    :type templates: ``list``
+
+    :return: The templates
+    :rtype: ``pandas.DataFrame``
+    """
+    return _dataframe(template_columns(templates))
+
+
+def to_dataframe(records, explode_participants=False):
+    """Create a pandas DataFrame of summaries, waivers or templates, picking
+    the conversion from the type of the first record
+
+    :param records: SDK objects of one type, or a :class:`SmartwaiverSummaryColumns`
+    :type records: ``list``
+
+    :param explode_participants: For waivers, give each participant a row of its own
+    :type explode_participants: ``boolean``
+
+    :return: The records, or an empty DataFrame if there are none
+    :rtype: ``pandas.DataFrame``
+    """
+
+    if isinstance(records, columnar.SmartwaiverSummaryColumns):
+        return summaries_to_dataframe(records)
+
+    records = list(records)
+    if not records:
+        return _dataframe({})
+
+    if isinstance(records[0], types.SmartwaiverWaiver):
+        return waivers_to_dataframe(records, explode_participants)
+    if isinstance(records[0], types.SmartwaiverWaiverSummary):
+        return summaries_to_dataframe(records)
+    if isinstance(records[0], types.SmartwaiverTemplate):
+        return templates_to_dataframe(records)
+
+    raise ValueError('Cannot create a DataFrame of ' + type(records[0]).__name__)
@@ -81,3 +81,49 @@ class SmartwaiverHTTPException(SmartwaiverSDKException):
         :rtype: ``integer``
         """
         return self._status_code
+
+
+class SmartwaiverTimeoutException(SmartwaiverSDKException):
+
+    def __init__(self, response, message, elapsed, timeout):
+        """Create this type of exception. Created when the API server does not
+        respond within the configured timeouts, or a call runs past its
+        deadline.
+
+        :param response: The Requests response object, if one was received
+        :type response: requests.Response
+
+        :param message: The message for the exception
+        :type message: ``string``
+
+        :param elapsed: The number of seconds spent on the call before giving up
+        :type elapsed: ``float``
+
+        :param timeout: The limit in seconds that was exceeded
+        :type timeout: ``float``
+        """
+
+        # Call the base class constructor with the parameters it needs
+        super(SmartwaiverTimeoutException, self).__init__(response, message)
+
+        self._elapsed = elapsed
+        self._timeout = timeout
+
+    @property
+    def elapsed(self):
+        """Returns how long was spent on the call before giving up, including
+        any retries
+
+        :return: The time in seconds
+        :rtype: ``float``
+        """
+        return self._elapsed
+
+    @property
+    def timeout(self):
+        """Returns the limit that was exceeded
+
+        :return: The limit in seconds
+        :rtype: ``float``
+        """
+        return self._timeout
@@ -0,0 +1,437 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+
+import requests
+
+from smartwaiver import exceptions, responses
+
+# The name of the manifest file when exporting to a directory
+MANIFEST_NAME = 'manifest.jsonl'
+
+
+class SmartwaiverExportEntry:
+    """This class is one line of an export manifest: a PDF that has been
+    exported, with its size and checksum.
+    """
+
+    def __init__(self, waiver_id, file_name, size, sha256, created_on=''):
+        """Create a manifest entry
+
+        :param waiver_id: The unique identifier of the waiver
+        :type waiver_id: ``string``
+
+        :param file_name: The name of the PDF file in the directory or archive
+        :type file_name: ``string``
+
+        :param size: The size of the PDF in bytes
+        :type size: ``integer``
+
+        :param sha256: The hex SHA-256 checksum of the PDF
+        :type sha256: ``string``
+
+        :param created_on: The date and time the waiver was signed
+        :type created_on: ``string``
+        """
+
+        self._waiver_id = waiver_id
+        self._file_name = file_name
+        self._size = size
+        self._sha256 = sha256
+        self._created_on = created_on
+
+    @classmethod
+    def from_json(cls, line):
+        """Create a manifest entry from a line of a manifest
+
+        :param line: The JSON line
+        :type line: ``string``
+
+        :return: The manifest entry
+        :rtype: smartwaiver.export.SmartwaiverExportEntry
+        """
+
+        entry = json.loads(line)
+        return cls(entry['waiverId'], entry['file'], entry['size'], entry['sha256'], entry.get('createdOn', ''))
+
+    def to_json(self):
+        """Returns the manifest line for this entry
+
+        :return: The JSON line, without a newline
+        :rtype: ``string``
+        """
+
+        return json.dumps({
+            'waiverId': self._waiver_id,
+            'file': self._file_name,
+            'size': self._size,
+            'sha256': self._sha256,
+            'createdOn': self._created_on,
+        })
+
+    @property
+    def waiver_id(self):
+        """Returns the unique identifier of the waiver
+
+        :return: The unique identifier of the waiver
+        :rtype: ``string``
+        """
+        return self._waiver_id
+
+    @property
+    def file_name(self):
+        """Returns the name of the PDF file in the directory or archive
+
+        :return: The name of the file
+        :rtype: ``string``
+        """
+        return self._file_name
+
+    @property
+    def size(self):
+        """Returns the size of the PDF
+
+        :return: The size in bytes
+        :rtype: ``integer``
+        """
+        return self._size
+
+    @property
+    def sha256(self):
+        """Returns the SHA-256 checksum of the PDF
+
+        :return: The checksum, in hex
+        :rtype: ``string``
+        """
+        return self._sha256
+
+    @property
+    def created_on(self):
+        """Returns the date and time the waiver was signed
+
+        :return: The date and time the waiver was signed
+        :rtype: ``string``
+        """
+        return self._created_on
+
+
+def _pdf_file_name(waiver_id):
+    """Returns the name of the file a waiver's PDF is exported to, refusing
+    IDs that would put it anywhere other than the destination
+    """
+
+    if not waiver_id or '/' in waiver_id or '\\' in waiver_id or '..' in waiver_id or '\0' in waiver_id:
+        raise ValueError('Cannot export a PDF for waiver ID: ' + repr(waiver_id))
+    return waiver_id + '.pdf'
+
+
+class _HashingWriter:
+    """Passes writes on to a file, counting and checksumming what is written"""
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.hash.update(data)
+        self.size += len(data)
+        return self._fileobj.write(data)
+
+
+class SmartwaiverPdfExporter:
+    """This class downloads the PDFs of many waivers at the same time and
+    writes them to a directory, or to a ZIP archive if the destination ends
+    in .zip. Each PDF is streamed to disk as it is decoded.
+
+    Every PDF written is recorded in a manifest with its size and SHA-256
+    checksum. Waivers already in the manifest are skipped, so an export that
+    is stopped part way through carries on where it left off when run again.
+    """
+
+    def __init__(self, client, destination, max_workers=8, manifest_path=None, compression=zipfile.ZIP_STORED):
+        """Create an exporter
+
+        :param client: The client to download PDFs with
+        :type client: smartwaiver.Smartwaiver
+
+        :param destination: The directory to write PDFs to, or the path of a ZIP archive ending in .zip
+        :type destination: ``string``
+
+        :param max_workers: The maximum number of PDFs to download at the same time
+        :type max_workers: ``integer``
+
+        :param manifest_path: The path of the manifest, by default manifest.jsonl in the directory or the archive path with .manifest.jsonl added
+        :type manifest_path: ``string``
+
+        :param compression: The compression to use for a ZIP archive (PDFs are mostly compressed already)
+        :type compression: ``integer``
+        """
+
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+
+        self._client = client
+        self._destination = destination
+        self._max_workers = max_workers
+        self._compression = compression
+        self._archive = destination.lower().endswith('.zip')
+
+        if manifest_path is None:
+            if self._archive:
+                manifest_path = destination + '.manifest.jsonl'
+            else:
+                manifest_path = os.path.join(destination, MANIFEST_NAME)
+        self._manifest_path = manifest_path
+
+        self._lock = threading.Lock()
+        self._entries = self._load_manifest()
+
+    def _load_manifest(self):
+        """Read the entries of the manifest, if there is one yet"""
+
+        entries = {}
+        try:
+            with open(self._manifest_path, 'r') as manifest:
+                for line in manifest:
+                    try:
+                        entry = SmartwaiverExportEntry.from_json(line)
+                    except ValueError:
+                        # A line cut short when the last export was stopped
+                        continue
+                    entries[entry.waiver_id] = entry
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _record(self, entry):
+        """Append an entry to the manifest once its PDF is safely written"""
+
+        with self._lock:
+            with open(self._manifest_path, 'a') as manifest:
+                manifest.write(entry.to_json() + '\n')
+                manifest.flush()
+                os.fsync(manifest.fileno())
+            self._entries[entry.waiver_id] = entry
+
+    def _is_exported(self, waiver_id, archived_names):
+        """Returns whether a PDF is in the manifest and its file is there"""
+
+        entry = self._entries.get(waiver_id)
+        if entry is None:
+            return False
+        if archived_names is not None:
+            return entry.file_name in archived_names
+
+        try:
+            return os.path.getsize(os.path.join(self._destination, entry.file_name)) == entry.size
+        except OSError:
+            return False
+
+    def export(self, waivers):
+        """Export the PDFs of waivers, skipping those exported already. A
+        waiver that fails to download does not stop the others, and is tried
+        again the next time the export is run.
+
+        :param waivers: Waiver IDs, or waiver summaries (or anything with a waiver_id)
+        :type waivers: ``list``
+
+        :return: A :class:`SmartwaiverBulkResult` for each waiver exported or failed, holding the waiver without its PDF
+        :rtype: ``list``
+        """
+
+        waiver_ids = [getattr(waiver, 'waiver_id', waiver) for waiver in waivers]
+
+        archived_names = None
+        if self._archive:
+            archived_names = self._archived_names()
+        else:
+            os.makedirs(self._destination, exist_ok=True)
+
+        pending = [waiver_id for waiver_id in dict.fromkeys(waiver_ids)
+                   if not self._is_exported(waiver_id, archived_names)]
+        if not pending:
+            return []
+
+        # A ZIP archive is written as a copy and moved into place at the end,
+        # so a process killed part way through never leaves the archive
+        # without its central directory
+        archive = None
+        if self._archive:
+            if os.path.exists(self._destination):
+                shutil.copyfile(self._destination, self._partial_path)
+                archive = zipfile.ZipFile(self._partial_path, 'a', self._compression)
+            else:
+                archive = zipfile.ZipFile(self._partial_path, 'w', self._compression)
+
+        try:
+            def export_one(waiver_id):
+                try:
+                    if archive is None:
+                        waiver = self._export_to_directory(waiver_id)
+                    else:
+                        waiver = self._export_to_archive(waiver_id, archive)
+                    return responses.SmartwaiverBulkResult(waiver_id, waiver=waiver)
+                except (exceptions.SmartwaiverSDKException, requests.exceptions.RequestException, ValueError) as err:
+                    return responses.SmartwaiverBulkResult(waiver_id, error=err)
+
+            with ThreadPoolExecutor(max_workers=min(self._max_workers, len(pending))) as executor:
+                return list(executor.map(export_one, pending))
+        finally:
+            if archive is not None:
+                archive.close()
+                os.replace(self._partial_path, self._destination)
+
+    def _archived_names(self):
+        """Returns the names of the files in the ZIP archive, if there is one yet"""
+
+        try:
+            with zipfile.ZipFile(self._destination) as archive:
+                return set(archive.namelist())
+        except FileNotFoundError:
+            return set()
+
+    @property
+    def _partial_path(self):
+        """Returns the path the ZIP archive is written to before it is moved into place"""
+        return self._destination + '.partial'
+
+    def export_query(self, from_dts, to_dts, verified=None, template_id=''):
+        """Export the PDFs of every waiver signed in a date range, skipping
+        those exported already
+
+        :param from_dts: Only export waivers signed at or after this ISO 8601 date
+        :type from_dts: ``string``
+
+        :param to_dts: Only export waivers signed at or before this ISO 8601 date
+        :type to_dts: ``string``
+
+        :param verified: Limit to waivers verified by email (true) or not verified (false) or both (None).
+        :type verified: ``boolean``
+
+        :param template_id: Limit to signed waivers of the given waiver template ID.
+        :type template_id: ``string``
+
+        :return: A :class:`SmartwaiverBulkResult` for each waiver exported or failed
+        :rtype: ``list``
+        """
+        return self.export(self._client.iter_waiver_summaries(verified, template_id, from_dts, to_dts))
+
+    def _export_to_directory(self, waiver_id):
+        """Download a PDF to a temporary file, then move it into place"""
+
+        file_name = _pdf_file_name(waiver_id)
+        fd, temp_path = tempfile.mkstemp(dir=self._destination, prefix='.smartwaiver-export-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                writer = _HashingWriter(temp_file)
+                waiver = self._client.download_waiver_pdf(waiver_id, writer)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, os.path.join(self._destination, file_name))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        self._record(SmartwaiverExportEntry(waiver_id, file_name, writer.size, writer.hash.hexdigest(),
+                                            waiver.created_on))
+        return waiver
+
+    def _export_to_archive(self, waiver_id, archive):
+        """Download a PDF to a temporary file, then copy it into the archive"""
+
+        file_name = _pdf_file_name(waiver_id)
+        with tempfile.TemporaryFile() as temp_file:
+            writer = _HashingWriter(temp_file)
+            waiver = self._client.download_waiver_pdf(waiver_id, writer)
+            temp_file.seek(0)
+
+            # Only one thread can write to the archive at a time
+            with self._lock:
+                with archive.open(file_name, 'w') as member:
+                    shutil.copyfileobj(temp_file, member)
+
+        self._record(SmartwaiverExportEntry(waiver_id, file_name, writer.size, writer.hash.hexdigest(),
+                                            waiver.created_on))
+        return waiver
+
+    def verify(self):
+        """Check every PDF in the manifest against its size and checksum
+
+        :return: The IDs of the waivers whose PDF is missing or does not match
+        :rtype: ``list``
+        """
+
+        archive = zipfile.ZipFile(self._destination) if self._archive else None
+        try:
+            failed = []
+            for entry in self._entries.values():
+                try:
+                    if archive is None:
+                        pdf_file = open(os.path.join(self._destination, entry.file_name), 'rb')
+                    else:
+                        pdf_file = archive.open(entry.file_name)
+                except (OSError, KeyError):
+                    failed.append(entry.waiver_id)
+                    continue
+
+                with pdf_file:
+                    checksum = hashlib.sha256()
+                    size = 0
+                    for chunk in iter(lambda: pdf_file.read(1024 * 1024), b''):
+                        checksum.update(chunk)
+                        size += len(chunk)
+
+                if size != entry.size or checksum.hexdigest() != entry.sha256:
+                    failed.append(entry.waiver_id)
+            return failed
+        finally:
+            if archive is not None:
+                archive.close()
+
+    @property
+    def entries(self):
+        """Returns the manifest entries of the PDFs exported so far
+
+        :return: The manifest entries, by waiver ID
+        :rtype: ``dict``
+        """
+        with self._lock:
+            return dict(self._entries)
+
+    @property
+    def destination(self):
+        """Returns the directory or ZIP archive PDFs are written to
+
+        :return: The path of the directory or archive
+        :rtype: ``string``
+        """
+        return self._destination
+
+    @property
+    def manifest_path(self):
+        """Returns the path of the manifest
+
+        :return: The path of the manifest
+        :rtype: ``string``
+        """
+        return self._manifest_path
@@ -0,0 +1,145 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+# The keys whose values are the same for many waivers, such as the template
+# a waiver was signed with, or the question a custom field asks
+INTERNED_KEYS = frozenset([
+    'templateId',
+    'title',
+    'gender',
+    'relationship',
+    'displayText',
+    'addressCity',
+    'addressState',
+    'addressCountry',
+    'driversLicenseState',
+    'insuranceCarrier',
+])
+
+# The keys whose values are lists of strings that are the same for many waivers
+INTERNED_LIST_KEYS = frozenset([
+    'tags',
+])
+
+# The most distinct strings a pool holds by default
+DEFAULT_MAX_SIZE = 10000
+
+
+class SmartwaiverStringPool:
+    """This class replaces strings that repeat across many API responses,
+    such as template IDs, titles, tags and custom field questions, with one
+    shared copy of each, so a large set of results does not hold thousands
+    of copies of the same text.
+
+    Unlike ``sys.intern``, the pool holds at most ``max_size`` strings and
+    can be cleared or dropped. Once it is full new strings are left as they
+    are, so a pool shared by a long running client cannot grow without
+    bound. It is safe to share between threads.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        """Create an empty string pool
+
+        :param max_size: The most distinct strings to hold
+        :type max_size: ``integer``
+        """
+
+        if max_size < 1:
+            raise ValueError('Maximum size must be at least one')
+
+        self._max_size = max_size
+        self._strings = {}
+        self._hits = 0
+        self._misses = 0
+
+    def intern(self, value):
+        """Returns the shared copy of a string, adding it to the pool if
+        there is room
+
+        :param value: The string
+        :type value: ``string``
+
+        :return: An equal string, shared with every other use of it
+        :rtype: ``string``
+        """
+
+        pooled = self._strings.get(value)
+        if pooled is not None:
+            self._hits += 1
+            return pooled
+
+        self._misses += 1
+        if len(self._strings) < self._max_size:
+            return self._strings.setdefault(value, value)
+        return value
+
+    def intern_payload(self, data):
+        """Replace the repeated strings of a decoded API payload with their
+        shared copies, in place. Only the values of the keys in INTERNED_KEYS
+        and INTERNED_LIST_KEYS are interned, at any depth.
+
+        :param data: The decoded payload, a dictionary or a list
+        :type data: ``dict``
+
+        :return: The same payload
+        :rtype: ``dict``
+        """
+
+        if isinstance(data, list):
+            for item in data:
+                self.intern_payload(item)
+        elif isinstance(data, dict):
+            for key, value in data.items():
+                if isinstance(value, str):
+                    if key in INTERNED_KEYS:
+                        data[key] = self.intern(value)
+                elif key in INTERNED_LIST_KEYS and isinstance(value, list):
+                    value[:] = [self.intern(item) if isinstance(item, str) else item for item in value]
+                elif isinstance(value, (dict, list)):
+                    self.intern_payload(value)
+        return data
+
+    def clear(self):
+        """Drop every string in the pool"""
+        self._strings = {}
+
+    def __len__(self):
+        return len(self._strings)
+
+    @property
+    def max_size(self):
+        """Returns the most distinct strings the pool holds
+
+        :return: The maximum size
+        :rtype: ``integer``
+        """
+        return self._max_size
+
+    @property
+    def hits(self):
+        """Returns the number of strings replaced by a shared copy
+
+        :return: The number of hits
+        :rtype: ``integer``
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """Returns the number of strings not already in the pool
+
+        :return: The number of misses
+        :rtype: ``integer``
+        """
+        return self._misses
@@ -0,0 +1,456 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import sqlite3
+import threading
+
+from smartwaiver import types
+
+# The version of the database layout, stored in the database file
+SCHEMA_VERSION = 1
+
+# Columns are declared without types so values come back with the type they
+# were stored with (booleans are the exception, SQLite stores them as 0/1)
+_schema = '''
+CREATE TABLE IF NOT EXISTS waivers (
+    waiver_id PRIMARY KEY,
+    template_id, title, created_on, expiration_date, expired, verified, kiosk,
+    first_name, middle_name, last_name, dob, is_minor, tags,
+    full, client_ip, email, marketing_allowed,
+    address_line_one, address_line_two, address_city, address_state, address_zip, address_country,
+    emergency_contact_name, emergency_contact_phone, insurance_carrier, insurance_policy_number,
+    drivers_license_number, drivers_license_state, pdf
+);
+CREATE INDEX IF NOT EXISTS waivers_template_id ON waivers (template_id, created_on);
+CREATE INDEX IF NOT EXISTS waivers_created_on ON waivers (created_on);
+CREATE INDEX IF NOT EXISTS waivers_email ON waivers (email COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS waivers_last_name ON waivers (last_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS waivers_expiration_date ON waivers (expiration_date);
+
+CREATE TABLE IF NOT EXISTS participants (
+    waiver_id, position,
+    first_name, middle_name, last_name, dob, is_minor, gender, phone, tags,
+    PRIMARY KEY (waiver_id, position)
+);
+CREATE INDEX IF NOT EXISTS participants_last_name ON participants (last_name COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS guardians (
+    waiver_id PRIMARY KEY,
+    first_name, middle_name, last_name, phone, relationship
+);
+
+CREATE TABLE IF NOT EXISTS custom_fields (
+    waiver_id, position, guid, value, display_text,
+    PRIMARY KEY (waiver_id, position, guid)
+);
+'''
+
+# Fields shared by waivers and waiver summaries, as (column, API key)
+_summary_columns = [
+    ('waiver_id', 'waiverId'),
+    ('template_id', 'templateId'),
+    ('title', 'title'),
+    ('created_on', 'createdOn'),
+    ('expiration_date', 'expirationDate'),
+    ('expired', 'expired'),
+    ('verified', 'verified'),
+    ('kiosk', 'kiosk'),
+    ('first_name', 'firstName'),
+    ('middle_name', 'middleName'),
+    ('last_name', 'lastName'),
+    ('dob', 'dob'),
+    ('is_minor', 'isMinor'),
+    ('tags', 'tags'),
+]
+
+# Fields only full waivers have, as (column, API key)
+_waiver_columns = [
+    ('client_ip', 'clientIP'),
+    ('email', 'email'),
+    ('marketing_allowed', 'marketingAllowed'),
+    ('address_line_one', 'addressLineOne'),
+    ('address_line_two', 'addressLineTwo'),
+    ('address_city', 'addressCity'),
+    ('address_state', 'addressState'),
+    ('address_zip', 'addressZip'),
+    ('address_country', 'addressCountry'),
+    ('emergency_contact_name', 'emergencyContactName'),
+    ('emergency_contact_phone', 'emergencyContactPhone'),
+    ('insurance_carrier', 'insuranceCarrier'),
+    ('insurance_policy_number', 'insurancePolicyNumber'),
+    ('drivers_license_number', 'driversLicenseNumber'),
+    ('drivers_license_state', 'driversLicenseState'),
+    ('pdf', 'pdf'),
+]
+
+_participant_columns = [
+    ('first_name', 'firstName'),
+    ('middle_name', 'middleName'),
+    ('last_name', 'lastName'),
+    ('dob', 'dob'),
+    ('is_minor', 'isMinor'),
+    ('gender', 'gender'),
+    ('phone', 'phone'),
+    ('tags', 'tags'),
+]
+
+_guardian_columns = [
+    ('first_name', 'firstName'),
+    ('middle_name', 'middleName'),
+    ('last_name', 'lastName'),
+    ('phone', 'phone'),
+    ('relationship', 'relationship'),
+]
+
+# Fields stored as 0/1 that are booleans in the API
+_boolean_keys = {'expired', 'verified', 'kiosk', 'isMinor', 'marketingAllowed'}
+
+# The position used for custom fields of the waiver, rather than of a participant
+_waiver_position = -1
+
+
+def _to_column(key, value):
+    """Convert a value from the API into one that can be stored"""
+    if key == 'tags':
+        return json.dumps(value)
+    return value
+
+
+def _from_column(key, value):
+    """Convert a stored value back into the value from the API"""
+    if key == 'tags':
+        return json.loads(value)
+    if key in _boolean_keys and isinstance(value, int):
+        return bool(value)
+    return value
+
+
+class SmartwaiverMirror:
+    """This class keeps a copy of waivers in a local SQLite database, so they
+    can be looked up again without going to the API. Both waivers and waiver
+    summaries can be stored, and a stored summary is filled in when the full
+    waiver is stored later. Lookups return the same types as the client.
+
+    The database is indexed by template, creation date, email, last name (of
+    the waiver and of each participant) and expiration date. A mirror can be
+    shared between threads.
+    """
+
+    def __init__(self, path):
+        """Open (or create) a mirror database
+
+        :param path: The path of the SQLite database file, or ':memory:'
+        :type path: ``string``
+        """
+
+        self._path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+
+        with self._lock, self._connection:
+            version = self._connection.execute('PRAGMA user_version').fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                raise ValueError('Unsupported mirror database version in ' + path + ': ' + str(version))
+            self._connection.executescript(_schema)
+            self._connection.execute('PRAGMA user_version = ' + str(SCHEMA_VERSION))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the database
+        """
+
+        with self._lock:
+            self._connection.close()
+
+    def add(self, waiver):
+        """Store a waiver or waiver summary, replacing any stored copy. A
+        summary does not replace the details of a full waiver already stored.
+
+        :param waiver: The waiver to store
+        :type waiver: smartwaiver.types.SmartwaiverWaiver
+        """
+
+        self.add_all([waiver])
+
+    def add_all(self, waivers):
+        """Store many waivers or waiver summaries in a single transaction
+
+        :param waivers: The :class:`SmartwaiverWaiver` or :class:`SmartwaiverWaiverSummary` objects to store
+        :type waivers: ``list``
+        """
+
+        with self._lock, self._connection:
+            for waiver in waivers:
+                if isinstance(waiver, types.SmartwaiverWaiver):
+                    self._insert_waiver(waiver)
+                elif isinstance(waiver, types.SmartwaiverWaiverSummary):
+                    self._insert_summary(waiver)
+                else:
+                    raise TypeError('Cannot store a ' + type(waiver).__name__ + ' in the mirror')
+
+    def _insert_summary(self, summary):
+        """Store the fields of a waiver summary, keeping any other fields"""
+
+        values = [_to_column(key, getattr(summary, column)) for column, key in _summary_columns]
+        columns = [column for column, key in _summary_columns]
+        self._connection.execute(
+            'INSERT INTO waivers (' + ', '.join(columns) + ', full) VALUES (' + ', '.join('?' * len(columns)) +
+            ', 0) ON CONFLICT (waiver_id) DO UPDATE SET ' +
+            ', '.join(column + ' = excluded.' + column for column in columns[1:]),
+            values)
+
+    def _insert_waiver(self, waiver):
+        """Store every field of a waiver, replacing the stored copy"""
+
+        all_columns = _summary_columns + _waiver_columns
+        values = [_to_column(key, getattr(waiver, column)) if column != 'pdf' else self._stored_pdf(waiver)
+                  for column, key in all_columns]
+        columns = [column for column, key in all_columns]
+        self._connection.execute(
+            'INSERT OR REPLACE INTO waivers (' + ', '.join(columns) + ', full) VALUES (' +
+            ', '.join('?' * len(columns)) + ', 1)', values)
+
+        waiver_id = waiver.waiver_id
+        for table in ('participants', 'guardians', 'custom_fields'):
+            self._connection.execute('DELETE FROM ' + table + ' WHERE waiver_id = ?', (waiver_id,))
+
+        for position, participant in enumerate(waiver.participants):
+            self._connection.execute(
+                'INSERT INTO participants VALUES (?, ?' + ', ?' * len(_participant_columns) + ')',
+                [waiver_id, position] + [_to_column(key, getattr(participant, column))
+                                         for column, key in _participant_columns])
+            self._insert_custom_fields(waiver_id, position, participant.custom_participant_fields)
+
+        self._insert_custom_fields(waiver_id, _waiver_position, waiver.custom_waiver_fields)
+
+        if waiver.guardian is not None:
+            self._connection.execute(
+                'INSERT INTO guardians VALUES (?' + ', ?' * len(_guardian_columns) + ')',
+                [waiver_id] + [getattr(waiver.guardian, column) for column, key in _guardian_columns])
+
+    @staticmethod
+    def _stored_pdf(waiver):
+        """Returns the PDF of a waiver to store, empty if the waiver was
+        fetched without it rather than fetching it now
+        """
+        return waiver.pdf if waiver.pdf_loaded else ''
+
+    def _insert_custom_fields(self, waiver_id, position, fields):
+        """Store the custom fields of a waiver or one of its participants"""
+
+        self._connection.executemany(
+            'INSERT INTO custom_fields VALUES (?, ?, ?, ?, ?)',
+            [(waiver_id, position, guid, field.value, field.display_text) for guid, field in fields.items()])
+
+    def remove(self, waiver_id):
+        """Remove a waiver from the mirror
+
+        :param waiver_id: The unique identifier of the waiver to remove
+        :type waiver_id: ``string``
+        """
+
+        with self._lock, self._connection:
+            for table in ('waivers', 'participants', 'guardians', 'custom_fields'):
+                self._connection.execute('DELETE FROM ' + table + ' WHERE waiver_id = ?', (waiver_id,))
+
+    def get_waiver(self, waiver_id):
+        """Get a stored waiver
+
+        :param waiver_id: The unique identifier of the waiver
+        :type waiver_id: ``string``
+
+        :return: The waiver, or None if the full waiver is not stored
+        :rtype: smartwaiver.types.SmartwaiverWaiver
+        """
+
+        waivers = self._query('SELECT * FROM waivers WHERE waiver_id = ? AND full = 1', [waiver_id], True)
+        return waivers[0] if waivers else None
+
+    def get_waiver_summary(self, waiver_id):
+        """Get the summary of a stored waiver
+
+        :param waiver_id: The unique identifier of the waiver
+        :type waiver_id: ``string``
+
+        :return: The waiver summary, or None if the waiver is not stored
+        :rtype: smartwaiver.types.SmartwaiverWaiverSummary
+        """
+
+        summaries = self._query('SELECT * FROM waivers WHERE waiver_id = ?', [waiver_id], False)
+        return summaries[0] if summaries else None
+
+    def find_waivers(self, template_id=None, email=None, last_name=None, from_dts=None, to_dts=None,
+                     expires_from=None, expires_to=None, verified=None, limit=None):
+        """Find stored waivers, most recent first. Only waivers stored in full
+        are returned, see :meth:`find_waiver_summaries` to include summaries.
+
+        :param template_id: Limit to waivers of this template ID
+        :type template_id: ``string``
+
+        :param email: Limit to waivers with this email address (ignoring case)
+        :type email: ``string``
+
+        :param last_name: Limit to waivers where the signer or a participant has this last name (ignoring case)
+        :type last_name: ``string``
+
+        :param from_dts: Limit to waivers created at or after this date (createdOn format)
+        :type from_dts: ``string``
+
+        :param to_dts: Limit to waivers created at or before this date (createdOn format)
+        :type to_dts: ``string``
+
+        :param expires_from: Limit to waivers with an expiration date at or after this date
+        :type expires_from: ``string``
+
+        :param expires_to: Limit to waivers with an expiration date at or before this date
+        :type expires_to: ``string``
+
+        :param verified: Limit to waivers verified (true) or not verified (false) or both (None)
+        :type verified: ``boolean``
+
+        :param limit: The maximum number of waivers to return, or None for all
+        :type limit: ``integer``
+
+        :return: A list of :class:`SmartwaiverWaiver` objects
+        :rtype: ``list``
+        """
+
+        sql, params = self._where(template_id, email, last_name, from_dts, to_dts, expires_from, expires_to,
+                                  verified, limit, ['full = 1'])
+        return self._query(sql, params, True)
+
+    def find_waiver_summaries(self, template_id=None, email=None, last_name=None, from_dts=None, to_dts=None,
+                              expires_from=None, expires_to=None, verified=None, limit=None):
+        """Find stored waivers, most recent first, as waiver summaries. Takes
+        the same parameters as :meth:`find_waivers`. The email address is
+        only known for waivers stored in full.
+
+        :return: A list of :class:`SmartwaiverWaiverSummary` objects
+        :rtype: ``list``
+        """
+
+        sql, params = self._where(template_id, email, last_name, from_dts, to_dts, expires_from, expires_to,
+                                  verified, limit, [])
+        return self._query(sql, params, False)
+
+    def count(self):
+        """Returns the number of waivers stored
+
+        :return: The number of waivers (and waiver summaries) stored
+        :rtype: ``integer``
+        """
+
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM waivers').fetchone()[0]
+
+    @staticmethod
+    def _where(template_id, email, last_name, from_dts, to_dts, expires_from, expires_to, verified, limit,
+               conditions):
+        """Build the query for a search of waivers"""
+
+        params = []
+
+        def add(condition, *values):
+            conditions.append(condition)
+            params.extend(values)
+
+        if template_id is not None:
+            add('template_id = ?', template_id)
+        if email is not None:
+            add('email = ? COLLATE NOCASE', email)
+        if last_name is not None:
+            add('(last_name = ? COLLATE NOCASE OR waiver_id IN '
+                '(SELECT waiver_id FROM participants WHERE last_name = ? COLLATE NOCASE))', last_name, last_name)
+        if from_dts is not None:
+            add('created_on >= ?', from_dts)
+        if to_dts is not None:
+            add('created_on <= ?', to_dts)
+        # Waivers that don't expire have an empty expiration date, which sorts
+        # first. Leaving them out with a range rather than != '' lets either
+        # bound use the index. Without unlikely(), SQLite guesses a lower bound
+        # matches too many rows and scans the created_on index instead.
+        if expires_from is not None:
+            add("expiration_date > '' AND unlikely(expiration_date >= ?)", expires_from)
+        if expires_to is not None:
+            add("expiration_date > '' AND expiration_date <= ?", expires_to)
+        if verified is not None:
+            add('verified = ?', bool(verified))
+
+        sql = 'SELECT * FROM waivers'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY created_on DESC, waiver_id'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        return sql, params
+
+    def _query(self, sql, params, full):
+        """Run a query for waivers and build the SDK objects from the rows"""
+
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+            if not full:
+                return [types.SmartwaiverWaiverSummary(self._row_to_dict(row, _summary_columns)) for row in rows]
+            return [types.SmartwaiverWaiver(self._load_waiver(row)) for row in rows]
+
+    def _load_waiver(self, row):
+        """Rebuild the API data of a full waiver from the stored rows"""
+
+        waiver_id = row['waiver_id']
+        waiver = self._row_to_dict(row, _summary_columns + _waiver_columns)
+
+        custom_fields = {}
+        for field in self._connection.execute('SELECT * FROM custom_fields WHERE waiver_id = ? ORDER BY rowid',
+                                              (waiver_id,)):
+            custom_fields.setdefault(field['position'], {})[field['guid']] = {
+                'value': field['value'],
+                'displayText': field['display_text'],
+            }
+
+        waiver['participants'] = []
+        for participant_row in self._connection.execute(
+                'SELECT * FROM participants WHERE waiver_id = ? ORDER BY position', (waiver_id,)):
+            participant = self._row_to_dict(participant_row, _participant_columns)
+            participant['customParticipantFields'] = custom_fields.get(participant_row['position'], {})
+            waiver['participants'].append(participant)
+
+        waiver['customWaiverFields'] = custom_fields.get(_waiver_position, {})
+
+        guardian = self._connection.execute('SELECT * FROM guardians WHERE waiver_id = ?', (waiver_id,)).fetchone()
+        waiver['guardian'] = self._row_to_dict(guardian, _guardian_columns) if guardian is not None else None
+
+        return waiver
+
+    @staticmethod
+    def _row_to_dict(row, columns):
+        """Convert a row into a dictionary with the keys the API uses"""
+        return {key: _from_column(key, row[column]) for column, key in columns}
+
+    @property
+    def path(self):
+        """Returns the path of the database file
+
+        :return: The path of the database file
+        :rtype: ``string``
+        """
+        return self._path
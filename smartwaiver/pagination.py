@@ -0,0 +1,298 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from datetime import datetime, timedelta
+import warnings
+
+from smartwaiver import columnar
+
+# The format of the createdOn field of waivers
+DTS_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# The start of the date range used when paging a query with no from date,
+# as the API requires both ends of a date range
+EARLIEST_DTS = '1970-01-01 00:00:00'
+
+# The most waiver summaries the API returns for one query
+MAX_PAGE_SIZE = 100
+
+
+def parse_dts(value):
+    """Parse a date from the API (createdOn format) or an ISO 8601 date
+
+    :param value: The date to parse
+    :type value: ``string``
+
+    :return: The parsed date
+    :rtype: ``datetime``
+    """
+
+    try:
+        return datetime.strptime(value, DTS_FORMAT)
+    except ValueError:
+        return datetime.fromisoformat(value)
+
+
+def format_dts(value):
+    """Format a date the same way as the createdOn field of waivers
+
+    :param value: The date to format
+    :type value: ``datetime``
+
+    :return: The formatted date
+    :rtype: ``string``
+    """
+    return value.strftime(DTS_FORMAT)
+
+
+def _page_fields(summaries):
+    """Returns the created on dates and the waiver IDs of a page of summaries
+
+    :param summaries: A list of summaries, or a :class:`SmartwaiverSummaryColumns`
+    :type summaries: ``list``
+
+    :return: The created on dates and the waiver IDs, in the same order as the page
+    :rtype: ``tuple``
+    """
+
+    if isinstance(summaries, columnar.SmartwaiverSummaryColumns):
+        return summaries.column('created_on'), summaries.column('waiver_id')
+    return [summary.created_on for summary in summaries], [summary.waiver_id for summary in summaries]
+
+
+def _take(summaries, indices):
+    """Returns the summaries of a page at the given indices, the same type as the page"""
+
+    if isinstance(summaries, columnar.SmartwaiverSummaryColumns):
+        return summaries.take(indices)
+    return [summaries[index] for index in indices]
+
+
+class SmartwaiverSummaryPager:
+    """This class works out the date ranges needed to walk through every
+    waiver summary in a date range, one page at a time.
+
+    The API returns the most recent waivers in a range, so each page moves the
+    end of the range back to the oldest waiver seen so far. The end of the
+    range is inclusive, so waivers at that exact time are fetched again and
+    are removed by their waiver ID. Only the IDs at that one timestamp are
+    kept, so memory use does not grow with the size of the range.
+    """
+
+    def __init__(self, from_dts='', to_dts='', page_size=MAX_PAGE_SIZE):
+        """Create a pager for a date range
+
+        :param from_dts: The start of the range (ISO 8601), or empty for no start
+        :type from_dts: ``string``
+
+        :param to_dts: The end of the range (ISO 8601), or empty for no end
+        :type to_dts: ``string``
+
+        :param page_size: The number of summaries to request per page (1-100)
+        :type page_size: ``integer``
+        """
+
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError('Page size must be between 1 and ' + str(MAX_PAGE_SIZE))
+
+        self._from_dts = from_dts
+        self._to_dts = to_dts
+        self._page_size = page_size
+        self._boundary = None
+        self._seen = set()
+        self._done = False
+
+    def add_page(self, summaries):
+        """Process a page of summaries returned for the current date range and
+        move the range on to the next page
+
+        :param summaries: The summaries returned by the API for the current range, as a list or columns
+        :type summaries: ``list``
+
+        :return: The summaries not already returned by an earlier page, newest first, the same type as the page
+        :rtype: ``list``
+        """
+
+        created_on, waiver_ids = _page_fields(summaries)
+        ordered = sorted(range(len(created_on)), key=created_on.__getitem__, reverse=True)
+        new = _take(summaries, [index for index in ordered if waiver_ids[index] not in self._seen])
+
+        if len(summaries) < self._page_size:
+            self._done = True
+            return new
+
+        oldest = created_on[ordered[-1]]
+
+        if not new:
+            # A full page of waivers all signed at the same second, that we
+            # have already seen, the only way forward is to skip that second
+            warnings.warn('More than ' + str(self._page_size) + ' waivers were created at ' + oldest +
+                          ', some of them may be missing')
+            self._boundary = None
+            self._seen = set()
+            self._move_to(format_dts(parse_dts(oldest) - timedelta(seconds=1)))
+            return new
+
+        if oldest != self._boundary:
+            self._boundary = oldest
+            self._seen = set()
+        self._seen.update(waiver_ids[index] for index in ordered if created_on[index] == oldest)
+        self._move_to(oldest)
+
+        return new
+
+    def _move_to(self, to_dts):
+        """Move the end of the date range, making sure the range has a start
+        as the API requires both
+
+        :param to_dts: The new end of the range
+        :type to_dts: ``string``
+        """
+
+        self._to_dts = to_dts
+        if self._from_dts == '':
+            self._from_dts = EARLIEST_DTS
+
+    @property
+    def from_dts(self):
+        """Returns the start of the date range for the next page
+
+        :return: The start of the range, or empty for no start
+        :rtype: ``string``
+        """
+        return self._from_dts
+
+    @property
+    def to_dts(self):
+        """Returns the end of the date range for the next page
+
+        :return: The end of the range, or empty for no end
+        :rtype: ``string``
+        """
+        return self._to_dts
+
+    @property
+    def page_size(self):
+        """Returns the number of summaries to request per page
+
+        :return: The page size
+        :rtype: ``integer``
+        """
+        return self._page_size
+
+    @property
+    def done(self):
+        """Returns whether every page in the date range has been processed
+
+        :return: Whether there are no more pages
+        :rtype: ``boolean``
+        """
+        return self._done
+
+
+def split_range(from_dts, to_dts, shards):
+    """Split a date range into shards of about the same length that do not
+    overlap. Both ends of the range and of each shard are inclusive, to the
+    second.
+
+    :param from_dts: The start of the range (ISO 8601)
+    :type from_dts: ``string``
+
+    :param to_dts: The end of the range (ISO 8601)
+    :type to_dts: ``string``
+
+    :param shards: The number of shards to split the range into
+    :type shards: ``integer``
+
+    :return: A list of (from_dts, to_dts) tuples, oldest first
+    :rtype: ``list``
+    """
+
+    if shards < 1:
+        raise ValueError('Number of shards must be at least one')
+
+    start = parse_dts(from_dts).replace(microsecond=0)
+    end = parse_dts(to_dts).replace(microsecond=0)
+    if end < start:
+        raise ValueError('End of date range is before the start')
+
+    # Never make shards shorter than one second
+    seconds = int((end - start).total_seconds()) + 1
+    shards = min(shards, seconds)
+
+    ranges = []
+    for i in range(shards):
+        shard_start = start + timedelta(seconds=seconds * i // shards)
+        shard_end = start + timedelta(seconds=seconds * (i + 1) // shards - 1)
+        ranges.append((format_dts(shard_start), format_dts(shard_end)))
+    return ranges
+
+
+def split_full_page(from_dts, summaries, page_size=MAX_PAGE_SIZE):
+    """Work out which parts of a shard still need to be fetched after a query
+    for it returned a page of summaries. A page that is not full means the
+    whole shard was fetched. Otherwise the rest of the shard, from its start
+    to the oldest summary in the page, is split into two smaller shards.
+
+    :param from_dts: The start of the shard that was queried
+    :type from_dts: ``string``
+
+    :param summaries: The summaries returned for the shard, as a list or columns
+    :type summaries: ``list``
+
+    :param page_size: The number of summaries that were requested
+    :type page_size: ``integer``
+
+    :return: A list of (from_dts, to_dts) tuples still to fetch
+    :rtype: ``list``
+    """
+
+    if len(summaries) < page_size:
+        return []
+
+    oldest = min(_page_fields(summaries)[0])
+    start = parse_dts(from_dts)
+    end = parse_dts(oldest)
+
+    if end <= start:
+        warnings.warn('More than ' + str(page_size) + ' waivers were created at ' + oldest +
+                      ', some of them may be missing')
+        return []
+
+    middle = start + timedelta(seconds=int((end - start).total_seconds()) // 2)
+    return [(format_dts(start), format_dts(middle)), (format_dts(middle + timedelta(seconds=1)), oldest)]
+
+
+def merge_pages(pages):
+    """Combine the pages of summaries fetched for the shards of a date range,
+    keeping each waiver once
+
+    :param pages: The pages, all lists or all :class:`SmartwaiverSummaryColumns`
+    :type pages: ``list``
+
+    :return: The summaries of every page, oldest first, the same type as the pages
+    :rtype: ``list``
+    """
+
+    if pages and isinstance(pages[0], columnar.SmartwaiverSummaryColumns):
+        merged = columnar.SmartwaiverSummaryColumns.concat(pages)
+    else:
+        merged = [summary for page in pages for summary in page]
+
+    created_on, waiver_ids = _page_fields(merged)
+    first = {}
+    for index, waiver_id in enumerate(waiver_ids):
+        first.setdefault(waiver_id, index)
+
+    return _take(merged, sorted(first.values(), key=created_on.__getitem__))
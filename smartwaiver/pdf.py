@@ -0,0 +1,231 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import base64
+import binascii
+
+from smartwaiver import exceptions
+
+# The number of bytes to read from the network at a time
+CHUNK_SIZE = 64 * 1024
+
+# JSON escapes that may appear inside a Base64 string, and what they stand for
+_escapes = {
+    b'/': b'/',
+    b'n': b'',
+    b'r': b'',
+}
+
+
+class SmartwaiverPdfDecoder:
+    """This class reads the JSON body of a waiver response a chunk at a time
+    and writes the Base64 decoded PDF out as it arrives, so the PDF is never
+    held in memory as a whole.
+
+    Everything in the body apart from the PDF is kept, with the PDF replaced
+    by an empty string, so the rest of the response can be processed as
+    usual once the body has been read.
+    """
+
+    def __init__(self, fileobj):
+        """Create a decoder
+
+        :param fileobj: A binary file (or anything with a write method) to write the PDF to
+        :type fileobj: ``file``
+        """
+
+        self._fileobj = fileobj
+        self._skeleton = bytearray()
+
+        # The JSON structure around the current position: a list of
+        # [container, last key] for each open object or array
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._is_key = False
+        self._key = None
+        self._expect_key = False
+
+        # Set while inside the PDF string
+        self._in_pdf = False
+        self._pdf_found = False
+        self._encoded = b''
+        self._written = 0
+
+    def feed(self, data):
+        """Process the next chunk of the response body
+
+        :param data: The next bytes of the body
+        :type data: ``bytes``
+        """
+
+        while data:
+            if self._in_pdf:
+                data = self._feed_pdf(data)
+            else:
+                data = self._feed_json(data)
+
+    def close(self):
+        """Finish processing the body
+
+        :return: The body with the PDF replaced by an empty string
+        :rtype: ``string``
+        """
+
+        if self._in_pdf:
+            raise exceptions.SmartwaiverSDKException(None, 'Response ended in the middle of the PDF')
+
+        return self._skeleton.decode('utf-8')
+
+    def _feed_json(self, data):
+        """Scan the JSON structure until the start of the PDF string
+
+        :return: The bytes not yet processed
+        :rtype: ``bytes``
+        """
+
+        for i in range(len(data)):
+            char = data[i:i + 1]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == b'\\':
+                    self._escape = True
+                elif char == b'"':
+                    self._in_string = False
+                    if self._is_key:
+                        self._key = bytes(self._key)
+                    continue
+                if self._is_key:
+                    self._key += char
+                continue
+
+            if char == b'"':
+                self._in_string = True
+                self._is_key = self._expect_key
+                if self._is_key:
+                    self._key = bytearray()
+                elif self._is_pdf_value():
+                    # Keep the opening quote and write the PDF out from here on
+                    self._skeleton += data[:i + 1]
+                    self._in_string = False
+                    self._in_pdf = True
+                    self._pdf_found = True
+                    return data[i + 1:]
+            elif char in (b'{', b'['):
+                if self._stack and self._key is not None:
+                    self._stack[-1][1] = self._key
+                self._stack.append([char, None])
+                self._expect_key = char == b'{'
+                self._key = None
+            elif char in (b'}', b']'):
+                if self._stack:
+                    self._stack.pop()
+                self._expect_key = False
+                self._key = None
+            elif char == b':':
+                if self._stack:
+                    self._stack[-1][1] = self._key
+                self._expect_key = False
+            elif char == b',':
+                self._expect_key = bool(self._stack) and self._stack[-1][0] == b'{'
+                self._key = None
+
+        self._skeleton += data
+        return b''
+
+    def _is_pdf_value(self):
+        """Returns whether the string starting now is the pdf field of the waiver"""
+
+        return (len(self._stack) == 2 and self._stack[0][1] == b'waiver' and
+                self._stack[1][0] == b'{' and self._stack[1][1] == b'pdf')
+
+    def _feed_pdf(self, data):
+        """Decode and write out the PDF string up to its closing quote
+
+        :return: The bytes not yet processed, after the closing quote
+        :rtype: ``bytes``
+        """
+
+        data = self._encoded + data
+        end = data.find(b'"')
+        segment = data if end < 0 else data[:end]
+
+        # An escape split between chunks is finished with the next chunk
+        rest = b''
+        if segment.endswith(b'\\') and (len(segment) - len(segment.rstrip(b'\\'))) % 2 == 1:
+            if end >= 0:
+                raise exceptions.SmartwaiverSDKException(None, 'Malformed PDF in response')
+            segment, rest = segment[:-1], b'\\'
+
+        if b'\\' in segment:
+            segment = self._unescape(segment)
+
+        if end < 0:
+            # Only decode whole groups of four characters until the end
+            usable = len(segment) - len(segment) % 4
+            self._write(segment[:usable])
+            self._encoded = segment[usable:] + rest
+            return b''
+
+        self._write(segment)
+        self._encoded = b''
+        self._in_pdf = False
+        self._skeleton += b'"'
+        return data[end + 1:]
+
+    @staticmethod
+    def _unescape(segment):
+        """Remove the JSON escapes from part of a Base64 string"""
+
+        parts = segment.split(b'\\')
+        unescaped = [parts[0]]
+        for part in parts[1:]:
+            if part[:1] not in _escapes:
+                raise exceptions.SmartwaiverSDKException(None, 'Malformed PDF in response')
+            unescaped.append(_escapes[part[:1]] + part[1:])
+        return b''.join(unescaped)
+
+    def _write(self, encoded):
+        """Decode Base64 text and write it out"""
+
+        if not encoded:
+            return
+
+        try:
+            decoded = base64.b64decode(encoded, validate=True)
+        except binascii.Error as err:
+            raise exceptions.SmartwaiverSDKException(None, 'Malformed PDF in response') from err
+
+        self._fileobj.write(decoded)
+        self._written += len(decoded)
+
+    @property
+    def pdf_found(self):
+        """Returns whether the PDF was found in the body
+
+        :return: Whether the PDF was found
+        :rtype: ``boolean``
+        """
+        return self._pdf_found
+
+    @property
+    def written(self):
+        """Returns the number of bytes of PDF written so far
+
+        :return: The number of bytes
+        :rtype: ``integer``
+        """
+        return self._written
@@ -0,0 +1,271 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class SmartwaiverRateLimiter:
+    """This class is a token bucket that limits how fast requests are sent to
+    the API server. It is safe to share between threads.
+
+    Each request takes one token from the bucket. Tokens are added back at a
+    steady rate up to the size of the burst. When the bucket is empty the
+    request reserves the next token and waits until it becomes available, so
+    waiting requests are spread out at the configured rate instead of all
+    retrying at once.
+    """
+
+    def __init__(self, rate, burst=None):
+        """Create a new rate limiter
+
+        :param rate: The number of requests allowed per second
+        :type rate: ``float``
+
+        :param burst: The number of requests that may be sent at once after a quiet period (defaults to rate)
+        :type burst: ``float``
+        """
+
+        if rate <= 0:
+            raise ValueError('Rate limit must be greater than zero')
+
+        self._rate = float(rate)
+        self._burst = float(burst) if burst is not None else max(1.0, self._rate)
+
+        if self._burst < 1:
+            raise ValueError('Rate limit burst must be at least one')
+
+        self._lock = threading.Lock()
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+        self._wait_time = 0.0
+
+    def acquire(self, timeout=None):
+        """Take a token from the bucket, blocking until one is available
+
+        :param timeout: The most seconds to wait, or None to wait as long as it takes
+        :type timeout: ``float``
+
+        :return: The number of seconds spent waiting, or None if no token was free within the timeout
+        :rtype: ``float``
+        """
+
+        delay = self.reserve()
+        if timeout is not None and delay > timeout:
+            self.release(delay)
+            return None
+
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def reserve(self):
+        """Take a token from the bucket without waiting for it. The caller
+        must wait the returned number of seconds before sending the request.
+
+        :return: The number of seconds to wait before the token can be used
+        :rtype: ``float``
+        """
+
+        with self._lock:
+            self._tokens, self._updated, delay = self._take(self._tokens, self._updated, time.monotonic())
+            self._wait_time += delay
+        return delay
+
+    def release(self, delay=0.0):
+        """Give back a token taken by reserve that will not be used, e.g.
+        because the caller gave up rather than wait for it
+
+        :param delay: The wait reserve returned for the token
+        :type delay: ``float``
+        """
+
+        with self._lock:
+            self._tokens = min(self._burst, self._tokens + 1)
+            self._wait_time -= delay
+
+    def _take(self, tokens, updated, now):
+        """Refill the bucket for the time that has passed and take one token
+
+        :param tokens: The number of tokens in the bucket at the last update
+        :type tokens: ``float``
+
+        :param updated: The time of the last update
+        :type updated: ``float``
+
+        :param now: The current time
+        :type now: ``float``
+
+        :return: The new number of tokens, the new update time, and the seconds to wait
+        :rtype: ``tuple``
+        """
+
+        tokens = min(self._burst, tokens + max(0.0, now - updated) * self._rate) - 1
+        delay = -tokens / self._rate if tokens < 0 else 0.0
+        return tokens, now, delay
+
+    @property
+    def rate(self):
+        """Returns the number of requests allowed per second
+
+        :return: The number of requests per second
+        :rtype: ``float``
+        """
+        return self._rate
+
+    @property
+    def burst(self):
+        """Returns the number of requests that may be sent at once
+
+        :return: The size of the bucket
+        :rtype: ``float``
+        """
+        return self._burst
+
+    @property
+    def wait_time(self):
+        """Returns the total time requests from this process have been held
+        back by the limiter
+
+        :return: The time in seconds
+        :rtype: ``float``
+        """
+        return self._wait_time
+
+
+class SmartwaiverFileRateLimiter(SmartwaiverRateLimiter):
+    """This class is a token bucket stored in a file, so that several
+    processes on the same host can share one rate limit. Every process must
+    be created with the same path, rate and burst. Requires a platform that
+    supports ``fcntl.flock``.
+    """
+
+    # Number of tokens and time of last update, as two doubles
+    _state_format = '=dd'
+
+    def __init__(self, path, rate, burst=None):
+        """Create a new rate limiter shared through a file
+
+        :param path: The path of the file holding the bucket, created if it does not exist
+        :type path: ``string``
+
+        :param rate: The number of requests allowed per second
+        :type rate: ``float``
+
+        :param burst: The number of requests that may be sent at once after a quiet period (defaults to rate)
+        :type burst: ``float``
+        """
+
+        if fcntl is None:
+            raise NotImplementedError('File backed rate limits are not supported on this platform')
+
+        SmartwaiverRateLimiter.__init__(self, rate, burst)
+
+        self._path = path
+        self._fd = None
+        self._pid = None
+
+    def reserve(self):
+        """Take a token from the shared bucket without waiting for it. The
+        caller must wait the returned number of seconds before sending the
+        request.
+
+        :return: The number of seconds to wait before the token can be used
+        :rtype: ``float``
+        """
+
+        state_size = struct.calcsize(self._state_format)
+
+        # The thread lock orders threads in this process, the file lock
+        # orders processes
+        with self._lock:
+            fd = self._open()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                # Wall clock time is used as it is comparable between processes
+                now = time.time()
+                state = os.pread(fd, state_size, 0)
+                if len(state) == state_size:
+                    tokens, updated = struct.unpack(self._state_format, state)
+                else:
+                    tokens, updated = self._burst, now
+
+                tokens, updated, delay = self._take(tokens, updated, now)
+                os.pwrite(fd, struct.pack(self._state_format, tokens, updated), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._wait_time += delay
+        return delay
+
+    def release(self, delay=0.0):
+        """Give back a token taken by reserve that will not be used, e.g.
+        because the caller gave up rather than wait for it
+
+        :param delay: The wait reserve returned for the token
+        :type delay: ``float``
+        """
+
+        state_size = struct.calcsize(self._state_format)
+
+        with self._lock:
+            fd = self._open()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                state = os.pread(fd, state_size, 0)
+                if len(state) == state_size:
+                    tokens, updated = struct.unpack(self._state_format, state)
+                    tokens = min(self._burst, tokens + 1)
+                    os.pwrite(fd, struct.pack(self._state_format, tokens, updated), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._wait_time -= delay
+
+    def close(self):
+        """Close the file holding the bucket
+        """
+
+        with self._lock:
+            if self._fd is not None and self._pid == os.getpid():
+                os.close(self._fd)
+            self._fd = None
+
+    def _open(self):
+        """Returns a file descriptor for the bucket file. A new one is opened
+        after a fork, as locks on a shared descriptor would not keep the
+        parent and child apart.
+
+        :return: The file descriptor
+        :rtype: ``integer``
+        """
+
+        if self._fd is None or self._pid != os.getpid():
+            self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+        return self._fd
+
+    @property
+    def path(self):
+        """Returns the path of the file holding the bucket
+
+        :return: The path of the file
+        :rtype: ``string``
+        """
+        return self._path
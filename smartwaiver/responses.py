@@ -12,6 +12,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import json
+
 from smartwaiver import exceptions
 
 
@@ -38,14 +40,30 @@ class SmartwaiverResponse:
         'type'
     ]
 
-    def __init__(self, response):
+    def __init__(self, response, elapsed=None, decoder=None):
+        """Process a response from the API server
+
+        :param response: The HTTP response from the API server
+        :type response: requests.Response
+
+        :param elapsed: The number of seconds the request took, including any retries
+        :type elapsed: ``float``
+
+        :param decoder: A function to decode the raw body with (see :func:`smartwaiver.decoders.get_decoder`), by default the response decodes itself
+        :type decoder: ``callable``
+        """
+
         self._response = response
+        self._elapsed = elapsed
 
         # Try to get the json
         error_message = ''
         contents = {}
         try:
-            contents = response.json()
+            if decoder is None:
+                contents = response.json()
+            else:
+                contents = decoder(response.content)
         except ValueError as err:
             error_message = str(err)
 
@@ -62,6 +80,8 @@ class SmartwaiverResponse:
         self._id = contents['id']
         self._ts = contents['ts']
         self._type = contents['type']
+        self._metadata = SmartwaiverResponseMetadata(self._version, self._id, self._ts, self._type,
+                                                     response.status_code, elapsed)
 
         # Check HTTP response code for problems
         success = [200, 201]
@@ -122,6 +142,25 @@ class SmartwaiverResponse:
         """
         return self._type
 
+    @property
+    def elapsed(self):
+        """Returns how long the request took, including any retries
+
+        :return: The time in seconds, or None if it was not measured
+        :rtype: ``float``
+        """
+        return self._elapsed
+
+    @property
+    def metadata(self):
+        """Returns the general information about this response, without the
+        response data
+
+        :return: The metadata of this response
+        :rtype: smartwaiver.responses.SmartwaiverResponseMetadata
+        """
+        return self._metadata
+
     @property
     def response_data(self):
         """Returns the particular response data according to the type specified
@@ -141,6 +180,96 @@ class SmartwaiverResponse:
         return self._response
 
 
+class SmartwaiverResponseMetadata:
+    """This class holds the general information about a single response from
+    the API server. It is attached to every object created from that response
+    so it can be read without going through the shared last response.
+    """
+
+    def __init__(self, version, id, ts, type, status_code, elapsed=None):
+        """Create the metadata for a response
+
+        :param version: The version of the API the response came from
+        :type version: ``integer``
+
+        :param id: The unique identifier of the response
+        :type id: ``string``
+
+        :param ts: The timestamp of when the response was created
+        :type ts: ``string``
+
+        :param type: The type of the response
+        :type type: ``string``
+
+        :param status_code: The HTTP status code of the response
+        :type status_code: ``integer``
+
+        :param elapsed: The number of seconds the request took, including any retries
+        :type elapsed: ``float``
+        """
+
+        self._version = version
+        self._id = id
+        self._ts = ts
+        self._type = type
+        self._status_code = status_code
+        self._elapsed = elapsed
+
+    @property
+    def version(self):
+        """Returns the version of the API this response came from.
+
+        :return: The API version
+        :rtype: ``integer``
+        """
+        return self._version
+
+    @property
+    def id(self):
+        """Returns a unique identifier of the response, useful for debugging
+
+        :return: The UUID of the request
+        :rtype: ``string``
+        """
+        return self._id
+
+    @property
+    def ts(self):
+        """Returns the timestamp of when the response was created
+
+        :return: The timestamp (ISO 8601 format)
+        :rtype: ``string``
+        """
+        return self._ts
+
+    @property
+    def type(self):
+        """Returns what type of response this is: templates, waiver, webhooks, etc.
+
+        :return: The type of response
+        :rtype: ``string``
+        """
+        return self._type
+
+    @property
+    def status_code(self):
+        """Returns the status code of the HTTP request to the API server
+
+        :return: The status code
+        :rtype: ``integer``
+        """
+        return self._status_code
+
+    @property
+    def elapsed(self):
+        """Returns how long the request took, including any retries
+
+        :return: The time in seconds, or None if it was not measured
+        :rtype: ``float``
+        """
+        return self._elapsed
+
+
 class SmartwaiverRawResponse:
     """This class provides a simple response from the API server containing the
     status code and raw body.
@@ -168,3 +297,99 @@ class SmartwaiverRawResponse:
         :rtype: ``string``
         """
         return self._body
+
+
+class SmartwaiverBulkResult:
+    """This class holds the outcome of fetching one waiver as part of a bulk
+    request. Exactly one of waiver and error is set.
+    """
+
+    def __init__(self, waiver_id, waiver=None, error=None):
+        """Create the result for a single waiver
+
+        :param waiver_id: The unique identifier of the waiver that was requested
+        :type waiver_id: ``string``
+
+        :param waiver: The waiver, if it was fetched successfully
+        :type waiver: smartwaiver.types.SmartwaiverWaiver
+
+        :param error: The exception raised while fetching the waiver, if any
+        :type error: ``Exception``
+        """
+
+        self._waiver_id = waiver_id
+        self._waiver = waiver
+        self._error = error
+
+    @property
+    def waiver_id(self):
+        """Returns the unique identifier of the waiver that was requested
+
+        :return: The unique identifier of the waiver
+        :rtype: ``string``
+        """
+        return self._waiver_id
+
+    @property
+    def waiver(self):
+        """Returns the waiver, or None if it could not be fetched
+
+        :return: The waiver
+        :rtype: smartwaiver.types.SmartwaiverWaiver
+        """
+        return self._waiver
+
+    @property
+    def error(self):
+        """Returns the exception raised while fetching the waiver, or None if
+        it was fetched successfully
+
+        :return: The exception
+        :rtype: ``Exception``
+        """
+        return self._error
+
+    @property
+    def ok(self):
+        """Returns whether the waiver was fetched successfully
+
+        :return: Whether the waiver was fetched
+        :rtype: ``boolean``
+        """
+        return self._error is None
+
+
+class SmartwaiverStoredResponse:
+    """This class holds a response body that was not read straight from the
+    network, such as one read back from a cache, with the parts of an HTTP
+    response that :class:`SmartwaiverResponse` uses.
+    """
+
+    def __init__(self, text, status_code=200, headers=None):
+        """Create a stored response
+
+        :param text: The body of the response
+        :type text: ``string``
+
+        :param status_code: The HTTP status code of the response
+        :type status_code: ``integer``
+
+        :param headers: The headers of the response
+        :type headers: ``dict``
+        """
+
+        self.text = text
+        self.status_code = status_code
+        self.headers = headers if headers is not None else {}
+
+    @property
+    def content(self):
+        """Returns the body of the response encoded as UTF-8
+
+        :return: The body of the response
+        :rtype: ``bytes``
+        """
+        return self.text.encode('utf-8')
+
+    def json(self):
+        return json.loads(self.text)
@@ -0,0 +1,219 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import math
+import random
+import threading
+
+
+class SmartwaiverRetryPolicy:
+    """This class decides whether a failed request to the API server should be
+    retried and how long to wait before doing so. Waits grow exponentially
+    with full jitter, unless the server asks for a specific wait with a
+    Retry-After header.
+    """
+
+    def __init__(self, max_attempts=3, backoff_base=0.5, backoff_cap=30.0,
+                 retry_methods=('GET',), retry_status_codes=(429, 500, 502, 503, 504),
+                 retry_connection_errors=True, max_retry_after=120.0):
+        """Create a new retry policy
+
+        :param max_attempts: The total number of attempts to make for a request (including the first)
+        :type max_attempts: ``integer``
+
+        :param backoff_base: The wait in seconds before the first retry, doubled for each later retry
+        :type backoff_base: ``float``
+
+        :param backoff_cap: The maximum wait in seconds between two attempts, when the server does not ask for one
+        :type backoff_cap: ``float``
+
+        :param retry_methods: The HTTP methods that are safe to retry
+        :type retry_methods: ``tuple``
+
+        :param retry_status_codes: The HTTP status codes that should be retried
+        :type retry_status_codes: ``tuple``
+
+        :param retry_connection_errors: Whether to retry when the server could not be reached
+        :type retry_connection_errors: ``boolean``
+
+        :param max_retry_after: The maximum wait in seconds between two attempts, when the server asks for one
+        :type max_retry_after: ``float``
+        """
+
+        if max_attempts < 1:
+            raise ValueError('Retry policy must allow at least one attempt')
+
+        self._max_attempts = max_attempts
+        self._backoff_base = backoff_base
+        self._backoff_cap = backoff_cap
+        self._retry_methods = tuple(method.upper() for method in retry_methods)
+        self._retry_status_codes = tuple(retry_status_codes)
+        self._retry_connection_errors = retry_connection_errors
+        self._max_retry_after = max_retry_after
+
+    def is_retryable(self, method, status_code=None):
+        """Returns whether a failure of this kind is worth retrying at all
+
+        :param method: The HTTP method of the request
+        :type method: ``string``
+
+        :param status_code: The status code of the response, or None if the server could not be reached
+        :type status_code: ``integer``
+
+        :return: Whether the failure is retryable
+        :rtype: ``boolean``
+        """
+
+        if method.upper() not in self._retry_methods:
+            return False
+
+        if status_code is None:
+            return self._retry_connection_errors
+
+        return status_code in self._retry_status_codes
+
+    def should_retry(self, method, attempt, status_code=None):
+        """Returns whether a request should be sent again
+
+        :param method: The HTTP method of the request
+        :type method: ``string``
+
+        :param attempt: The number of attempts already made (starting at 1)
+        :type attempt: ``integer``
+
+        :param status_code: The status code of the response, or None if the server could not be reached
+        :type status_code: ``integer``
+
+        :return: Whether to retry the request
+        :rtype: ``boolean``
+        """
+
+        return attempt < self._max_attempts and self.is_retryable(method, status_code)
+
+    def backoff(self, attempt, retry_after=None):
+        """Returns how long to wait before the next attempt
+
+        :param attempt: The number of attempts already made (starting at 1)
+        :type attempt: ``integer``
+
+        :param retry_after: The value of the Retry-After header from the server, if any
+        :type retry_after: ``string``
+
+        :return: The number of seconds to wait, at most max_retry_after if the server asked for the wait
+        :rtype: ``float``
+        """
+
+        delay = parse_retry_after(retry_after)
+        if delay is not None:
+            return min(delay, self._max_retry_after)
+
+        return random.uniform(0, min(self._backoff_cap, self._backoff_base * (2 ** (attempt - 1))))
+
+    @property
+    def max_attempts(self):
+        """Returns the total number of attempts made for a request
+
+        :return: The maximum number of attempts
+        :rtype: ``integer``
+        """
+        return self._max_attempts
+
+
+class SmartwaiverRetryStats:
+    """This class counts the retries a client has made and how long it has
+    spent waiting between them. It is safe to update from several threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._retries = 0
+        self._retry_time = 0.0
+        self._exhausted = 0
+
+    def record_retry(self, delay):
+        """Record that a request is about to be retried
+
+        :param delay: The number of seconds that will be waited before the retry
+        :type delay: ``float``
+        """
+        with self._lock:
+            self._retries += 1
+            self._retry_time += delay
+
+    def record_exhausted(self):
+        """Record that a request failed after using all of its attempts
+        """
+        with self._lock:
+            self._exhausted += 1
+
+    @property
+    def retries(self):
+        """Returns the number of times a request has been retried
+
+        :return: The number of retries
+        :rtype: ``integer``
+        """
+        return self._retries
+
+    @property
+    def retry_time(self):
+        """Returns the total time spent waiting before retries
+
+        :return: The time in seconds
+        :rtype: ``float``
+        """
+        return self._retry_time
+
+    @property
+    def exhausted(self):
+        """Returns the number of requests that still failed on their last attempt
+
+        :return: The number of requests that ran out of attempts
+        :rtype: ``integer``
+        """
+        return self._exhausted
+
+
+def parse_retry_after(value):
+    """Parse the value of a Retry-After header
+
+    :param value: The header value, either a number of seconds or an HTTP date
+    :type value: ``string``
+
+    :return: The number of seconds to wait, or None if the value is missing, invalid or not finite
+    :rtype: ``float``
+    """
+
+    if value is None:
+        return None
+
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        if not math.isfinite(seconds):
+            return None
+        return max(0.0, seconds)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,248 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from datetime import datetime, timezone
+import json
+import os
+import tempfile
+
+from smartwaiver import pagination, responses
+
+# The version of the layout of the state file
+STATE_VERSION = 1
+
+
+class SmartwaiverSyncCheckpoint:
+    """This class records how far an incremental sync has got: the createdOn
+    time of the newest waiver processed, and the IDs of the waivers processed
+    at exactly that time. Waivers are processed oldest first, so every waiver
+    before that time has been processed already.
+    """
+
+    def __init__(self, created_on='', waiver_ids=()):
+        """Create a checkpoint
+
+        :param created_on: The createdOn time of the newest waiver processed, or empty if none have been
+        :type created_on: ``string``
+
+        :param waiver_ids: The IDs of the waivers processed that were created at that time
+        :type waiver_ids: ``list``
+        """
+
+        self._created_on = created_on
+        self._waiver_ids = set(waiver_ids)
+
+    @classmethod
+    def load(cls, path):
+        """Load a checkpoint from a state file. A file that does not exist
+        gives an empty checkpoint, so the first sync fetches everything.
+
+        :param path: The path of the state file
+        :type path: ``string``
+
+        :return: The checkpoint
+        :rtype: smartwaiver.sync.SmartwaiverSyncCheckpoint
+        """
+
+        try:
+            with open(path, 'r') as state_file:
+                state = json.load(state_file)
+        except FileNotFoundError:
+            return cls()
+
+        if state.get('version') != STATE_VERSION:
+            raise ValueError('Unsupported sync state version in ' + path + ': ' + str(state.get('version')))
+
+        return cls(state['createdOn'], state['waiverIds'])
+
+    def save(self, path):
+        """Save the checkpoint to a state file. The file is replaced in one
+        step, so a crash while saving leaves the previous checkpoint intact.
+
+        :param path: The path of the state file
+        :type path: ``string``
+        """
+
+        state = {
+            'version': STATE_VERSION,
+            'createdOn': self._created_on,
+            'waiverIds': sorted(self._waiver_ids),
+        }
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.smartwaiver-sync-')
+        try:
+            with os.fdopen(fd, 'w') as temp_file:
+                json.dump(state, temp_file)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def is_new(self, summary):
+        """Returns whether a waiver has not been processed yet
+
+        :param summary: The waiver (or waiver summary) to check
+        :type summary: smartwaiver.types.SmartwaiverWaiverSummary
+
+        :return: Whether the waiver is newer than the checkpoint
+        :rtype: ``boolean``
+        """
+
+        if summary.created_on != self._created_on:
+            return summary.created_on > self._created_on
+        return summary.waiver_id not in self._waiver_ids
+
+    def advance(self, summary):
+        """Move the checkpoint past a waiver that has been processed. Waivers
+        must be passed oldest first.
+
+        :param summary: The waiver (or waiver summary) that was processed
+        :type summary: smartwaiver.types.SmartwaiverWaiverSummary
+        """
+
+        if summary.created_on != self._created_on:
+            self._created_on = summary.created_on
+            self._waiver_ids = set()
+        self._waiver_ids.add(summary.waiver_id)
+
+    @property
+    def created_on(self):
+        """Returns the createdOn time of the newest waiver processed
+
+        :return: The time, or empty if no waivers have been processed
+        :rtype: ``string``
+        """
+        return self._created_on
+
+    @property
+    def waiver_ids(self):
+        """Returns the IDs of the waivers processed at the checkpoint time
+
+        :return: The waiver IDs
+        :rtype: ``frozenset``
+        """
+        return frozenset(self._waiver_ids)
+
+
+class SmartwaiverSync:
+    """This class fetches the waivers signed since it was last run. How far
+    it has got is saved to a state file after each waiver, so each run only
+    fetches waivers that are new, and a run that is stopped part way through
+    carries on from the last waiver processed.
+
+    Waivers are handed out oldest first. The checkpoint moves past a waiver
+    when the next one is asked for, so a waiver being processed when the
+    program stops will be handed out again by the next run.
+    """
+
+    def __init__(self, client, state_path, verified=None, template_id='', from_dts='', pdf=False,
+                 full_waivers=True, max_workers=8):
+        """Create a new sync
+
+        :param client: The client to fetch waivers with
+        :type client: smartwaiver.Smartwaiver
+
+        :param state_path: The path of the file holding the checkpoint, created on the first run
+        :type state_path: ``string``
+
+        :param verified: Limit to waivers verified by email (true) or not verified (false) or both (None).
+        :type verified: ``boolean``
+
+        :param template_id: Limit to signed waivers of the given waiver template ID.
+        :type template_id: ``string``
+
+        :param from_dts: On the first run, only fetch waivers signed at or after this ISO 8601 date
+        :type from_dts: ``string``
+
+        :param pdf: Whether to include the Base64 Encoded PDF of each waiver
+        :type pdf: ``boolean``
+
+        :param full_waivers: Whether to fetch each full waiver, or only hand out the summaries
+        :type full_waivers: ``boolean``
+
+        :param max_workers: The maximum number of full waivers to fetch at the same time
+        :type max_workers: ``integer``
+        """
+
+        self._client = client
+        self._state_path = state_path
+        self._verified = verified
+        self._template_id = template_id
+        self._from_dts = from_dts
+        self._pdf = pdf
+        self._full_waivers = full_waivers
+        self._max_workers = max_workers
+        self._checkpoint = SmartwaiverSyncCheckpoint.load(state_path)
+
+    def run(self):
+        """Fetch the waivers signed since the last run
+
+        :return: :class:`SmartwaiverWaiver` objects (or :class:`SmartwaiverWaiverSummary` objects), oldest first
+        :rtype: ``generator``
+        """
+
+        # The API needs both ends of a date range. Waivers signed during the
+        # run are left for the next one.
+        checkpoint = self._checkpoint
+        from_dts = checkpoint.created_on or self._from_dts or pagination.EARLIEST_DTS
+        to_dts = pagination.format_dts(datetime.now(timezone.utc))
+
+        summaries = [summary for summary in self._client.iter_waiver_summaries(self._verified, self._template_id,
+                                                                                from_dts, to_dts)
+                     if checkpoint.is_new(summary)]
+
+        # The summaries come newest first, and sorting is stable, so waivers
+        # created at the same time keep a fixed order
+        summaries.reverse()
+        summaries.sort(key=lambda summary: summary.created_on)
+
+        batch_size = self._max_workers * 4
+        for start in range(0, len(summaries), batch_size):
+            batch = summaries[start:start + batch_size]
+
+            if self._full_waivers:
+                results = self._client.get_waivers([summary.waiver_id for summary in batch], self._pdf,
+                                                   self._max_workers)
+            else:
+                results = [responses.SmartwaiverBulkResult(summary.waiver_id, waiver=summary) for summary in batch]
+
+            for summary, result in zip(batch, results):
+                # Stop at the first waiver that could not be fetched, the
+                # next run starts again from it
+                if not result.ok:
+                    raise result.error
+                yield result.waiver
+                checkpoint.advance(summary)
+                checkpoint.save(self._state_path)
+
+    @property
+    def checkpoint(self):
+        """Returns how far the sync has got
+
+        :return: The checkpoint
+        :rtype: smartwaiver.sync.SmartwaiverSyncCheckpoint
+        """
+        return self._checkpoint
+
+    @property
+    def state_path(self):
+        """Returns the path of the file holding the checkpoint
+
+        :return: The path of the file
+        :rtype: ``string``
+        """
+        return self._state_path
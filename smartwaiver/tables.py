@@ -0,0 +1,454 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import abc
+import csv
+import json
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from smartwaiver import columnar, types
+
+# The number of rows held in memory before they are written out
+DEFAULT_BATCH_SIZE = 1000
+
+# The columns of a table of summaries, with the type of each
+SUMMARY_SCHEMA = tuple(
+    (name, 'boolean' if name in columnar.BOOLEAN_COLUMNS else 'string') for name in columnar.COLUMNS)
+
+# The columns of a table of waivers, one row per participant, with the type
+# of each. Tags and custom fields are JSON text, so the columns stay the same
+# whatever custom fields each template has.
+WAIVER_SCHEMA = (
+    ('waiver_id', 'string'),
+    ('template_id', 'string'),
+    ('title', 'string'),
+    ('created_on', 'string'),
+    ('expiration_date', 'string'),
+    ('expired', 'boolean'),
+    ('verified', 'boolean'),
+    ('kiosk', 'boolean'),
+    ('first_name', 'string'),
+    ('middle_name', 'string'),
+    ('last_name', 'string'),
+    ('dob', 'string'),
+    ('is_minor', 'boolean'),
+    ('client_ip', 'string'),
+    ('tags', 'string'),
+    ('email', 'string'),
+    ('marketing_allowed', 'boolean'),
+    ('address_line_one', 'string'),
+    ('address_line_two', 'string'),
+    ('address_city', 'string'),
+    ('address_state', 'string'),
+    ('address_zip', 'string'),
+    ('address_country', 'string'),
+    ('emergency_contact_name', 'string'),
+    ('emergency_contact_phone', 'string'),
+    ('insurance_carrier', 'string'),
+    ('insurance_policy_number', 'string'),
+    ('drivers_license_number', 'string'),
+    ('drivers_license_state', 'string'),
+    ('custom_waiver_fields', 'string'),
+    ('guardian_first_name', 'string'),
+    ('guardian_middle_name', 'string'),
+    ('guardian_last_name', 'string'),
+    ('guardian_phone', 'string'),
+    ('guardian_relationship', 'string'),
+    ('participant_index', 'integer'),
+    ('participant_first_name', 'string'),
+    ('participant_middle_name', 'string'),
+    ('participant_last_name', 'string'),
+    ('participant_dob', 'string'),
+    ('participant_is_minor', 'boolean'),
+    ('participant_gender', 'string'),
+    ('participant_phone', 'string'),
+    ('participant_tags', 'string'),
+    ('participant_custom_fields', 'string'),
+)
+
+# The schema of each kind of table, by name
+SCHEMAS = {
+    'summaries': SUMMARY_SCHEMA,
+    'waivers': WAIVER_SCHEMA,
+}
+
+# The columns of each table copied straight from the property of the same name
+_summary_fields = tuple(name for name, column_type in SUMMARY_SCHEMA if name != 'tags')
+_waiver_fields = tuple(name for name, column_type in WAIVER_SCHEMA[:WAIVER_SCHEMA.index(('tags', 'string'))]) + \
+    tuple(name for name, column_type in WAIVER_SCHEMA[WAIVER_SCHEMA.index(('email', 'string')):
+                                                      WAIVER_SCHEMA.index(('custom_waiver_fields', 'string'))])
+_guardian_fields = ('first_name', 'middle_name', 'last_name', 'phone', 'relationship')
+_participant_fields = ('first_name', 'middle_name', 'last_name', 'dob', 'is_minor', 'gender', 'phone')
+
+
+def _boolean(value):
+    """Returns a boolean field as true, false or None. Some fields are sent by
+    the API as the strings 'true' and 'false'.
+    """
+
+    if value is None or isinstance(value, bool):
+        return value
+    if value in ('true', 'false'):
+        return value == 'true'
+    raise ValueError('Expected a boolean value, got: ' + repr(value))
+
+
+def _custom_fields(fields):
+    """Returns custom fields as JSON text, keyed by their unique identifier"""
+    return json.dumps(dict((guid, {'value': field.value, 'displayText': field.display_text})
+                           for guid, field in fields.items()), sort_keys=True)
+
+
+def summary_rows(records):
+    """Flatten waiver summaries into rows of the summary table. Waivers can be
+    given too, as they have every field of a summary.
+
+    :param records: :class:`SmartwaiverWaiverSummary` or :class:`SmartwaiverWaiver` objects, or pages of :class:`SmartwaiverSummaryColumns`
+    :type records: ``iterable``
+
+    :return: One tuple per summary, in the order of SUMMARY_SCHEMA
+    :rtype: ``generator``
+    """
+
+    tags = [name for name, column_type in SUMMARY_SCHEMA].index('tags')
+    for record in records:
+        if isinstance(record, columnar.SmartwaiverSummaryColumns):
+            # Read the columns as they are, without creating the summaries
+            values = record.to_dict()
+            values['tags'] = [json.dumps(value) for value in values['tags']]
+            for row in zip(*[values[name] for name, column_type in SUMMARY_SCHEMA]):
+                yield row
+            continue
+
+        row = [getattr(record, name) for name in _summary_fields]
+        row.insert(tags, json.dumps(record.tags))
+        yield tuple(row)
+
+
+def waiver_rows(waivers):
+    """Flatten waivers into rows of the waiver table, one row per participant.
+    A waiver with no participants still has one row, with empty participant
+    columns.
+
+    :param waivers: :class:`SmartwaiverWaiver` objects
+    :type waivers: ``iterable``
+
+    :return: One tuple per participant, in the order of WAIVER_SCHEMA
+    :rtype: ``generator``
+    """
+
+    tags = [name for name, column_type in WAIVER_SCHEMA].index('tags')
+    for waiver in waivers:
+        if not isinstance(waiver, types.SmartwaiverWaiver):
+            raise ValueError('Only waivers can be written to a waiver table, got: ' + type(waiver).__name__)
+
+        row = [getattr(waiver, name) for name in _waiver_fields]
+        row.insert(tags, json.dumps(waiver.tags))
+        row.append(_custom_fields(waiver.custom_waiver_fields))
+        if waiver.guardian is None:
+            row.extend([None] * len(_guardian_fields))
+        else:
+            row.extend(getattr(waiver.guardian, name) for name in _guardian_fields)
+
+        participants = waiver.participants
+        if not participants:
+            yield tuple(row) + (None,) * (len(WAIVER_SCHEMA) - len(row))
+            continue
+
+        for index, participant in enumerate(participants):
+            yield tuple(row) + (index,) + tuple(getattr(participant, name) for name in _participant_fields) + \
+                (json.dumps(participant.tags), _custom_fields(participant.custom_participant_fields))
+
+
+class SmartwaiverTableWriter(abc.ABC):
+    """This class is the base of the writers that stream waivers or summaries
+    into a table file. Rows are collected into batches of a fixed size and
+    each batch is written out before the next is started, so memory use does
+    not depend on how many records are written. Each writer implements
+    :meth:`_write_batch`.
+    """
+
+    def __init__(self, table='waivers', batch_size=DEFAULT_BATCH_SIZE):
+        """Set up the writer
+
+        :param table: The table to write, 'waivers' (one row per participant) or 'summaries'
+        :type table: ``string``
+
+        :param batch_size: The number of rows held in memory before they are written out
+        :type batch_size: ``integer``
+        """
+
+        if table not in SCHEMAS:
+            raise ValueError('Unknown table: ' + str(table))
+        if batch_size < 1:
+            raise ValueError('Batch size must be at least one')
+
+        self._table = table
+        self._schema = SCHEMAS[table]
+        self._rows = waiver_rows if table == 'waivers' else summary_rows
+        self._batch_size = batch_size
+        self._rows_written = 0
+        self._closed = False
+
+        # The positions of the columns that hold booleans
+        self._booleans = [index for index, (name, column_type) in enumerate(self._schema) if column_type == 'boolean']
+
+    def write(self, records):
+        """Write records to the table. Can be called more than once.
+
+        :param records: Waivers or summaries to write, depending on the table (see :func:`waiver_rows` and :func:`summary_rows`)
+        :type records: ``iterable``
+
+        :return: The number of rows written by this call
+        :rtype: ``integer``
+        """
+
+        if self._closed:
+            raise ValueError('Cannot write to a closed table writer')
+
+        written = 0
+        batch = []
+        for row in self._rows(records):
+            batch.append(row)
+            if len(batch) == self._batch_size:
+                written += self._flush(batch)
+                batch = []
+        if batch:
+            written += self._flush(batch)
+        return written
+
+    def _flush(self, batch):
+        """Write out a batch of rows, with the boolean columns checked"""
+
+        if self._booleans:
+            batch = [list(row) for row in batch]
+            for row in batch:
+                for index in self._booleans:
+                    row[index] = _boolean(row[index])
+
+        self._write_batch(batch)
+        self._rows_written += len(batch)
+        return len(batch)
+
+    @abc.abstractmethod
+    def _write_batch(self, batch):
+        """Write out a batch of rows to the file
+
+        :param batch: The rows, each a list of values in column order
+        :type batch: ``list``
+        """
+
+    def close(self):
+        """Finish the file. A table is not complete until the writer is closed."""
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def table(self):
+        """Returns the name of the table being written
+
+        :return: 'waivers' or 'summaries'
+        :rtype: ``string``
+        """
+        return self._table
+
+    @property
+    def columns(self):
+        """Returns the names of the columns of the table
+
+        :return: The column names, in order
+        :rtype: ``list``
+        """
+        return [name for name, column_type in self._schema]
+
+    @property
+    def batch_size(self):
+        """Returns the number of rows held in memory before they are written out
+
+        :return: The batch size
+        :rtype: ``integer``
+        """
+        return self._batch_size
+
+    @property
+    def rows_written(self):
+        """Returns the number of rows written so far
+
+        :return: The number of rows
+        :rtype: ``integer``
+        """
+        return self._rows_written
+
+
+class SmartwaiverCsvWriter(SmartwaiverTableWriter):
+    """This class streams waivers or summaries into a CSV file with a header
+    row. Booleans are written as 'true' or 'false', and missing values as
+    empty cells.
+    """
+
+    def __init__(self, path_or_fileobj, table='waivers', batch_size=DEFAULT_BATCH_SIZE):
+        """Create a CSV writer
+
+        :param path_or_fileobj: The path of the CSV file to create, or a text file object to write to
+        :type path_or_fileobj: ``string``
+
+        :param table: The table to write, 'waivers' (one row per participant) or 'summaries'
+        :type table: ``string``
+
+        :param batch_size: The number of rows held in memory before they are written out
+        :type batch_size: ``integer``
+        """
+
+        SmartwaiverTableWriter.__init__(self, table, batch_size)
+
+        if hasattr(path_or_fileobj, 'write'):
+            self._file = path_or_fileobj
+            self._owns_file = False
+        else:
+            self._file = open(path_or_fileobj, 'w', newline='', encoding='utf-8')
+            self._owns_file = True
+
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.columns)
+
+    def _write_batch(self, batch):
+        for row in batch:
+            for index in self._booleans:
+                if row[index] is not None:
+                    row[index] = 'true' if row[index] else 'false'
+        self._writer.writerows(batch)
+
+    def close(self):
+        if self._closed:
+            return
+        SmartwaiverTableWriter.close(self)
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class _ArrowTableWriter(SmartwaiverTableWriter):
+    """This class is the base of the writers that stream record batches
+    through pyarrow
+    """
+
+    # The pyarrow type of each column type
+    _arrow_types = {
+        'string': lambda: pyarrow.string(),
+        'boolean': lambda: pyarrow.bool_(),
+        'integer': lambda: pyarrow.int32(),
+    }
+
+    def __init__(self, table, batch_size):
+        if pyarrow is None:
+            raise ImportError(type(self).__name__ + ' requires the pyarrow package')
+
+        SmartwaiverTableWriter.__init__(self, table, batch_size)
+
+        self._arrow_schema = pyarrow.schema([(name, self._arrow_types[column_type]())
+                                             for name, column_type in self._schema])
+
+    def _record_batch(self, batch):
+        """Returns a batch of rows as a pyarrow record batch"""
+
+        return pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(values, type=field.type) for values, field in zip(zip(*batch), self._arrow_schema)],
+            schema=self._arrow_schema)
+
+    @property
+    def schema(self):
+        """Returns the schema of the file
+
+        :return: The pyarrow schema
+        :rtype: ``pyarrow.Schema``
+        """
+        return self._arrow_schema
+
+
+class SmartwaiverParquetWriter(_ArrowTableWriter):
+    """This class streams waivers or summaries into a Parquet file, one row
+    group per batch. It requires the pyarrow package.
+    """
+
+    def __init__(self, path_or_fileobj, table='waivers', batch_size=DEFAULT_BATCH_SIZE, compression='snappy'):
+        """Create a Parquet writer
+
+        :param path_or_fileobj: The path of the Parquet file to create, or a binary file object to write to
+        :type path_or_fileobj: ``string``
+
+        :param table: The table to write, 'waivers' (one row per participant) or 'summaries'
+        :type table: ``string``
+
+        :param batch_size: The number of rows held in memory, and written as one row group
+        :type batch_size: ``integer``
+
+        :param compression: The Parquet compression codec, e.g. 'snappy', 'zstd' or 'none'
+        :type compression: ``string``
+        """
+
+        _ArrowTableWriter.__init__(self, table, batch_size)
+        self._writer = pyarrow.parquet.ParquetWriter(path_or_fileobj, self._arrow_schema, compression=compression)
+
+    def _write_batch(self, batch):
+        self._writer.write_table(pyarrow.Table.from_batches([self._record_batch(batch)]))
+
+    def close(self):
+        if self._closed:
+            return
+        _ArrowTableWriter.close(self)
+        self._writer.close()
+
+
+class SmartwaiverArrowWriter(_ArrowTableWriter):
+    """This class streams waivers or summaries into an Arrow IPC (Feather
+    version 2) file, one record batch per batch. It requires the pyarrow
+    package.
+    """
+
+    def __init__(self, path_or_fileobj, table='waivers', batch_size=DEFAULT_BATCH_SIZE):
+        """Create an Arrow writer
+
+        :param path_or_fileobj: The path of the Arrow file to create, or a binary file object to write to
+        :type path_or_fileobj: ``string``
+
+        :param table: The table to write, 'waivers' (one row per participant) or 'summaries'
+        :type table: ``string``
+
+        :param batch_size: The number of rows held in memory, and written as one record batch
+        :type batch_size: ``integer``
+        """
+
+        _ArrowTableWriter.__init__(self, table, batch_size)
+        self._writer = pyarrow.ipc.new_file(path_or_fileobj, self._arrow_schema)
+
+    def _write_batch(self, batch):
+        self._writer.write_batch(self._record_batch(batch))
+
+    def close(self):
+        if self._closed:
+            return
+        _ArrowTableWriter.close(self)
+        self._writer.close()
@@ -12,13 +12,22 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-from smartwaiver.exceptions import SmartwaiverSDKException
+import base64
 
 
 class SmartwaiverType():
     """Base class for all types of returned objects from the API.
     """
 
+    # Attributes are held in slots rather than a dictionary for each object,
+    # as large reports can hold many thousands of them
+    __slots__ = ('_response_metadata',)
+
+    # For types that can be created lazily, the key of the input each
+    # attribute is loaded from, and of each attribute holding other objects
+    _keys = {}
+    _nested = {}
+
     def __init__(self, input, required_keys, smartwaiver_type):
         """Checks that all the required keys for the given object type exist
 
@@ -32,16 +41,117 @@ class SmartwaiverType():
         :type smartwaiver_type: ``string``
         """
 
+        SmartwaiverType._check_required_keys(input, required_keys, smartwaiver_type)
+
+        # The metadata of the API response this object was created from
+        self._response_metadata = None
+
+    @staticmethod
+    def _check_required_keys(input, required_keys, smartwaiver_type):
+        """Raise a ValueError if any of the required keys is missing"""
+
         # Check that all required key's exist in the given input
         for key in required_keys:
             if not key in input:
                 raise ValueError('Cannot create a ' + smartwaiver_type + ' with missing field: ' + key)
 
+    def __getattr__(self, name):
+        """Load a field of a lazily created object the first time it is used.
+        This is only called for attributes that have not been set yet.
+        """
+
+        if name not in self._keys and name not in self._nested:
+            raise AttributeError(type(self).__name__ + ' object has no attribute ' + name)
+        try:
+            data = object.__getattribute__(self, '_data')
+        except AttributeError:
+            raise AttributeError(type(self).__name__ + ' object has no attribute ' + name) from None
+
+        if name in self._nested:
+            SmartwaiverType._check_required_keys(data, [self._nested[name]], type(self).__name__)
+            value = self._load_nested(name, data)
+            setattr(self, name, value)
+            return value
+
+        # Plain fields are cheap to copy, so they are all loaded together
+        for attr, key in self._keys.items():
+            try:
+                setattr(self, attr, data[key])
+            except KeyError:
+                continue
+
+        try:
+            return object.__getattribute__(self, name)
+        except AttributeError:
+            raise ValueError('Cannot create a ' + type(self).__name__ + ' with missing field: ' +
+                             self._keys[name]) from None
+
+    def validate(self):
+        """Check an object that was created lazily, loading all of its
+        fields. Objects that were not created lazily were checked already.
+
+        :raises ValueError: If a required field is missing or has the wrong type
+        """
+
+        try:
+            data = object.__getattribute__(self, '_data')
+        except AttributeError:
+            return
+
+        SmartwaiverType._check_required_keys(data, self._required_keys, type(self).__name__)
+        for name in self._nested:
+            getattr(self, name)
+        if self._keys:
+            getattr(self, next(iter(self._keys)))
+
+    @property
+    def response_metadata(self):
+        """Returns the metadata (id, timestamp, version, timing) of the API
+        response this object was created from
+
+        :return: The response metadata, or None if this object was not created from an API response
+        :rtype: smartwaiver.responses.SmartwaiverResponseMetadata
+        """
+        return self._response_metadata
+
+    @classmethod
+    def _load(cls, data, *args, string_pool=None, **kwargs):
+        """Create an object of this type from a dictionary, or use the object
+        as it is if it was created while the response was being decoded
+
+        :param data: A dictionary, or an object of this type
+        :type data: ``dict``
+
+        :param string_pool: A pool to share the repeated strings of the dictionary through first
+        :type string_pool: smartwaiver.interning.SmartwaiverStringPool
+
+        :return: The object
+        :rtype: smartwaiver.types.SmartwaiverType
+        """
+
+        if isinstance(data, cls):
+            if args:
+                data._adopt(*args)
+            return data
+        if string_pool is not None:
+            string_pool.intern_payload(data)
+        return cls(data, *args, **kwargs)
+
+    def _adopt(self, response_metadata=None):
+        """Take on the metadata of the response an object was decoded from
+
+        :param response_metadata: The metadata of the API response this object was created from
+        :type response_metadata: smartwaiver.responses.SmartwaiverResponseMetadata
+        """
+        self._response_metadata = response_metadata
+
 
 class SmartwaiverCustomField(SmartwaiverType):
     """This class represents a custom field inside of a signed waiver.
     """
 
+    __slots__ = ('_display_text', '_value')
+
     # The required fields to create this object
     _required_keys = [
         'value',
@@ -86,6 +196,8 @@ class SmartwaiverGuardian(SmartwaiverType):
     """This class represents all the data for the guardian field
     """
 
+    __slots__ = ('_first_name', '_last_name', '_middle_name', '_phone', '_relationship')
+
     # The required fields to create this object
     _required_keys = [
         'firstName',
@@ -163,6 +275,11 @@ class SmartwaiverParticipant(SmartwaiverType):
     """This class represents a single participant on a signed waiver.
     """
 
+    __slots__ = (
+        '_custom_participant_fields', '_dob', '_first_name', '_gender', '_is_minor', '_last_name',
+        '_middle_name', '_phone', '_tags',
+    )
+
     # The required fields to create this object
     _required_keys = [
         'firstName',
@@ -204,7 +321,7 @@ class SmartwaiverParticipant(SmartwaiverType):
 
         # Load the custom participant fields as objects of that type
         for guid in participant['customParticipantFields']:
-            self._custom_participant_fields[guid] = SmartwaiverCustomField(participant['customParticipantFields'][guid])
+            self._custom_participant_fields[guid] = SmartwaiverCustomField._load(participant['customParticipantFields'][guid])
 
     @property
     def first_name(self):
@@ -292,6 +409,8 @@ class SmartwaiverTemplate(SmartwaiverType):
     """This class represents a waiver template response from the API.
     """
 
+    __slots__ = ('_kiosk_url', '_published_on', '_published_version', '_template_id', '_title', '_web_url')
+
     # The required fields to create this object
     _required_keys = [
         'templateId',
@@ -302,16 +421,21 @@ class SmartwaiverTemplate(SmartwaiverType):
         'kioskUrl'
     ]
 
-    def __init__(self, template):
+    def __init__(self, template, response_metadata=None):
         """Checks that all the required keys for the given object type exist
 
         :param template: A dictionary to create the template object from
         :type template: ``dict``
+
+        :param response_metadata: The metadata of the API response this object was created from
+        :type response_metadata: smartwaiver.responses.SmartwaiverResponseMetadata
         """
 
         # Check for required keys
         SmartwaiverType.__init__(self, template, self._required_keys, self.__class__.__name__)
 
+        self._response_metadata = response_metadata
+
         # Load all the information into properties
         self._template_id = template['templateId']
         self._title = template['title']
@@ -379,6 +503,16 @@ class SmartwaiverWaiver(SmartwaiverType):
     """This class represents a waiver response from the API.
     """
 
+    __slots__ = (
+        '_address_city', '_address_country', '_address_line_one', '_address_line_two', '_address_state',
+        '_address_zip', '_client_ip', '_created_on', '_custom_waiver_fields', '_data', '_dob',
+        '_drivers_license_number', '_drivers_license_state', '_email', '_emergency_contact_name',
+        '_emergency_contact_phone', '_expiration_date', '_expired', '_first_name', '_guardian',
+        '_insurance_carrier', '_insurance_policy_number', '_is_minor', '_kiosk', '_last_name',
+        '_marketing_allowed', '_middle_name', '_participants', '_pdf', '_pdf_bytes', '_pdf_loader', '_tags',
+        '_template_id', '_title', '_verified', '_waiver_id',
+    )
+
     # The required fields to create this object
     _required_keys = [
         'waiverId',
@@ -416,17 +550,79 @@ class SmartwaiverWaiver(SmartwaiverType):
         'pdf'
     ]
 
-    def __init__(self, waiver):
+    # The key of the input each attribute is loaded from
+    _keys = {
+        '_waiver_id': 'waiverId',
+        '_template_id': 'templateId',
+        '_title': 'title',
+        '_created_on': 'createdOn',
+        '_expiration_date': 'expirationDate',
+        '_expired': 'expired',
+        '_verified': 'verified',
+        '_kiosk': 'kiosk',
+        '_first_name': 'firstName',
+        '_middle_name': 'middleName',
+        '_last_name': 'lastName',
+        '_dob': 'dob',
+        '_is_minor': 'isMinor',
+        '_client_ip': 'clientIP',
+        '_tags': 'tags',
+        '_email': 'email',
+        '_marketing_allowed': 'marketingAllowed',
+        '_address_line_one': 'addressLineOne',
+        '_address_line_two': 'addressLineTwo',
+        '_address_city': 'addressCity',
+        '_address_state': 'addressState',
+        '_address_zip': 'addressZip',
+        '_address_country': 'addressCountry',
+        '_emergency_contact_name': 'emergencyContactName',
+        '_emergency_contact_phone': 'emergencyContactPhone',
+        '_insurance_carrier': 'insuranceCarrier',
+        '_insurance_policy_number': 'insurancePolicyNumber',
+        '_drivers_license_number': 'driversLicenseNumber',
+        '_drivers_license_state': 'driversLicenseState',
+        '_pdf': 'pdf',
+    }
+
+    # The key of the input each attribute holding other objects is loaded
+    # from, created the first time they are used
+    _nested = {
+        '_participants': 'participants',
+        '_custom_waiver_fields': 'customWaiverFields',
+        '_guardian': 'guardian',
+    }
+
+    def __init__(self, waiver, response_metadata=None, pdf_loader=None, lazy=False):
         """Create a SmartwaiverWaiver object by providing a dictionary with all
         the required keys.
 
         :param waiver:  A dictionary to create the waiver object from
         :type waiver: ``dict``
+
+        :param response_metadata: The metadata of the API response this object was created from
+        :type response_metadata: smartwaiver.responses.SmartwaiverResponseMetadata
+
+        :param pdf_loader: Called with no arguments to fetch the Base64 encoded PDF the first time it is used, if the waiver was fetched without it
+        :type pdf_loader: ``callable``
+
+        :param lazy: Whether to keep the dictionary and only load each field the first time it is used, without checking it (see :meth:`validate`)
+        :type lazy: ``boolean``
         """
 
+        # Decoded from the Base64 PDF the first time it is needed
+        self._pdf_bytes = None
+        self._pdf_loader = pdf_loader
+
+        if lazy:
+            self._response_metadata = response_metadata
+            self._data = waiver
+            return
+
         # Check for required keys
         SmartwaiverType.__init__(self, waiver, self._required_keys, self.__class__.__name__)
 
+        self._response_metadata = response_metadata
+
         # Load the waiver summary into into properties
         self._waiver_id = waiver['waiverId']
         self._template_id = waiver['templateId']
@@ -444,14 +640,7 @@ class SmartwaiverWaiver(SmartwaiverType):
         self._client_ip = waiver['clientIP']
         self._tags = waiver['tags']
 
-        self._participants = []
-        # Check that participants is a list
-        if not isinstance(waiver['participants'], list):
-            raise ValueError('Participants field must be a list')
-
-        # Load the participants
-        for participant in waiver['participants']:
-            self._participants.append(SmartwaiverParticipant(participant))
+        self._participants = self._load_nested('_participants', waiver)
 
         # Load the waiver data
         self._email = waiver['email']
@@ -469,21 +658,76 @@ class SmartwaiverWaiver(SmartwaiverType):
         self._drivers_license_number = waiver['driversLicenseNumber']
         self._drivers_license_state = waiver['driversLicenseState']
 
-        self._custom_waiver_fields = dict()
-        # Check that custom wiver fields is a dictionary
-        if not isinstance(waiver['customWaiverFields'], dict):
-            raise ValueError('Custom waiver fields must be a dictionary')
+        self._custom_waiver_fields = self._load_nested('_custom_waiver_fields', waiver)
+        self._guardian = self._load_nested('_guardian', waiver)
+        self._pdf = waiver['pdf']
 
-        # Load the custom waiver fields as objects of that type
-        for guid in waiver['customWaiverFields']:
-            self._custom_waiver_fields[guid] = SmartwaiverCustomField(waiver['customWaiverFields'][guid])
+    def _load_nested(self, name, data):
+        """Returns the participants, custom fields or guardian loaded from
+        the input as objects
 
-        # Check if there is a guardian field
-        self._guardian = None
-        if waiver['guardian'] is not None:
-            self._guardian = SmartwaiverGuardian(waiver['guardian'])
+        :param name: The name of the attribute
+        :type name: ``string``
 
-        self._pdf = waiver['pdf']
+        :param data: The input dict with all the data
+        :type data: ``dict``
+        """
+
+        if name == '_participants':
+            # Check that participants is a list
+            if not isinstance(data['participants'], list):
+                raise ValueError('Participants field must be a list')
+
+            # Load the participants
+            return [SmartwaiverParticipant._load(participant) for participant in data['participants']]
+
+        if name == '_custom_waiver_fields':
+            # Check that custom wiver fields is a dictionary
+            if not isinstance(data['customWaiverFields'], dict):
+                raise ValueError('Custom waiver fields must be a dictionary')
+
+            # Load the custom waiver fields as objects of that type
+            return {guid: SmartwaiverCustomField._load(field) for guid, field in data['customWaiverFields'].items()}
+
+        if name == '_guardian':
+            # Check if there is a guardian field
+            if data['guardian'] is None:
+                return None
+            return SmartwaiverGuardian._load(data['guardian'])
+
+    def _adopt(self, response_metadata=None, pdf_loader=None):
+        """Take on the metadata of the response the waiver was decoded from,
+        and how to fetch its PDF later
+
+        :param response_metadata: The metadata of the API response this object was created from
+        :type response_metadata: smartwaiver.responses.SmartwaiverResponseMetadata
+
+        :param pdf_loader: Called with no arguments to fetch the Base64 encoded PDF the first time it is used
+        :type pdf_loader: ``callable``
+        """
+
+        self._response_metadata = response_metadata
+        self._pdf_loader = pdf_loader
+
+    def __getstate__(self):
+        """Returns the fields to pickle. The means to fetch the PDF is left
+        out, as it holds the client, so a waiver fetched without its PDF has
+        an empty PDF once unpickled.
+        """
+
+        state = {}
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                try:
+                    state[name] = object.__getattribute__(self, name)
+                except AttributeError:
+                    continue
+        state['_pdf_loader'] = None
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
 
     @property
     def waiver_id(self):
@@ -775,19 +1019,106 @@ class SmartwaiverWaiver(SmartwaiverType):
 
     @property
     def pdf(self):
-        """Returns the list of tags for this participant
+        """Returns the Base64 encoded PDF of the waiver
 
-        :return: The list of tags for this participant
+        :return: The Base64 encoded PDF, empty if it was not requested
         :rtype: ``string``
         """
+
+        self._load_pdf()
+        if self._pdf is None:
+            # The Base64 text was released, encode it again
+            return base64.b64encode(self._pdf_bytes).decode('ascii')
         return self._pdf
 
+    @property
+    def pdf_bytes(self):
+        """Returns the PDF of the waiver, decoded from Base64 the first time
+        it is asked for
+
+        :return: The PDF, empty if it was not requested
+        :rtype: ``bytes``
+        """
+
+        self._load_pdf()
+        if self._pdf_bytes is None:
+            self._pdf_bytes = base64.b64decode(self._pdf)
+        return self._pdf_bytes
+
+    @property
+    def pdf_size(self):
+        """Returns the size of the PDF of the waiver, without decoding it
+
+        :return: The size of the PDF in bytes
+        :rtype: ``integer``
+        """
+
+        self._load_pdf()
+        if self._pdf_bytes is not None:
+            return len(self._pdf_bytes)
+
+        # Every four Base64 characters hold three bytes, less the padding
+        text = self._pdf
+        if '\n' in text or '\r' in text or ' ' in text:
+            return len(self.pdf_bytes)
+        return len(text) // 4 * 3 - (len(text) - len(text.rstrip('=')))
+
+    def write_pdf(self, path):
+        """Write the PDF of the waiver to a file
+
+        :param path: The path of the file to write, or a binary file object
+        :type path: ``string``
+
+        :return: The number of bytes written
+        :rtype: ``integer``
+        """
+
+        if hasattr(path, 'write'):
+            path.write(self.pdf_bytes)
+        else:
+            with open(path, 'wb') as pdf_file:
+                pdf_file.write(self.pdf_bytes)
+        return len(self.pdf_bytes)
+
+    def release_pdf_text(self):
+        """Decode the PDF and drop the Base64 text of it, to free the memory
+        it uses. The :attr:`pdf` property still works, but encodes the PDF
+        again each time.
+        """
+
+        if self._pdf is not None:
+            self.pdf_bytes
+            self._pdf = None
+
+    @property
+    def pdf_loaded(self):
+        """Returns whether the PDF is held by this waiver, rather than still
+        to be fetched the first time it is used
+
+        :return: Whether the PDF is loaded
+        :rtype: ``boolean``
+        """
+        return self._pdf_loader is None
+
+    def _load_pdf(self):
+        """Fetch the PDF if the waiver was fetched without it"""
+
+        if self._pdf_loader is not None and not self._pdf:
+            self._pdf = self._pdf_loader()
+            self._pdf_bytes = None
+        self._pdf_loader = None
+
 
 class SmartwaiverWaiverSummary(SmartwaiverType):
     """This class represents a waiver summary response from the API. These are
     found in the waiver list call.
     """
 
+    __slots__ = (
+        '_created_on', '_data', '_dob', '_expiration_date', '_expired', '_first_name', '_is_minor', '_kiosk',
+        '_last_name', '_middle_name', '_tags', '_template_id', '_title', '_verified', '_waiver_id',
+    )
+
     # The required fields to create this object
     _required_keys = [
         'waiverId',
@@ -806,17 +1137,48 @@ class SmartwaiverWaiverSummary(SmartwaiverType):
         'tags'
     ]
 
-    def __init__(self, waiver_summary):
+    # The key of the input each attribute is loaded from
+    _keys = {
+        '_waiver_id': 'waiverId',
+        '_template_id': 'templateId',
+        '_title': 'title',
+        '_created_on': 'createdOn',
+        '_expiration_date': 'expirationDate',
+        '_expired': 'expired',
+        '_verified': 'verified',
+        '_kiosk': 'kiosk',
+        '_first_name': 'firstName',
+        '_middle_name': 'middleName',
+        '_last_name': 'lastName',
+        '_dob': 'dob',
+        '_is_minor': 'isMinor',
+        '_tags': 'tags',
+    }
+
+    def __init__(self, waiver_summary, response_metadata=None, lazy=False):
         """Create a SmartwaiverWaiverSummary object by providing a dictionary
         with all the required keys.
 
         :param waiver_summary:  A dictionary to create the waiver_summary object from
         :type waiver_summary: ``dict``
+
+        :param response_metadata: The metadata of the API response this object was created from
+        :type response_metadata: smartwaiver.responses.SmartwaiverResponseMetadata
+
+        :param lazy: Whether to keep the dictionary and only load each field the first time it is used, without checking it (see :meth:`validate`)
+        :type lazy: ``boolean``
         """
 
+        if lazy:
+            self._response_metadata = response_metadata
+            self._data = waiver_summary
+            return
+
         # Check for required keys
         SmartwaiverType.__init__(self, waiver_summary, self._required_keys, self.__class__.__name__)
 
+        self._response_metadata = response_metadata
+
         # Load all the information into properties
         self._waiver_id = waiver_summary['waiverId']
         self._template_id = waiver_summary['templateId']
@@ -964,6 +1326,8 @@ class SmartwaiverWebhook(SmartwaiverType):
     """This class represents a a webhook configuration.
     """
 
+    __slots__ = ('_email_validation_required', '_endpoint')
+
     # The required fields to create this object
     _required_keys = [
         'endpoint',
@@ -982,17 +1346,22 @@ class SmartwaiverWebhook(SmartwaiverType):
     # verification has occurred and after
     WEBHOOK_BEFORE_AND_AFTER_EMAIL = 'both'
 
-    def __init__(self, webhook):
+    def __init__(self, webhook, response_metadata=None):
         """Create a SmartwaiverWebhook object by providing a dictionary with
         all the required keys.
 
         :param webhook:  A dictionary to create the webhook object from
         :type webhook: ``dict``
+
+        :param response_metadata: The metadata of the API response this object was created from
+        :type response_metadata: smartwaiver.responses.SmartwaiverResponseMetadata
         """
 
         # Check for required keys
         SmartwaiverType.__init__(self, webhook, self._required_keys, self.__class__.__name__)
 
+        self._response_metadata = response_metadata
+
         # Load all the information into properties
         self._endpoint = webhook['endpoint']
         self._email_validation_required = webhook['emailValidationRequired']
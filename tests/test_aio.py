@@ -0,0 +1,376 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import sys
+sys.path.insert(0, '../')
+
+import smartwaiver
+import factory
+from test_pagination import MockWaiverServer, timestamps
+from test_pdf import api_response_waiver_pdf
+from test_smartwaiver import MockResponse, mock_get_responses, mock_put_responses
+
+
+class MockAsyncResponse:
+
+    def __init__(self, response):
+        self.status = response.status_code
+        self.headers = {'content-type': 'application/json'}
+        self._body = response.text.encode('utf-8')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        pass
+
+    async def read(self):
+        return self._body
+
+
+class MockAsyncStreamResponse(MockAsyncResponse):
+
+    def __init__(self, response, chunk_size=1000):
+        MockAsyncResponse.__init__(self, response)
+        self.content = self
+        self._chunk_size = chunk_size
+
+    async def iter_chunked(self, chunk_size):
+        for i in range(0, len(self._body), self._chunk_size):
+            yield self._body[i:i + self._chunk_size]
+
+
+class MockAsyncSession:
+
+    def __init__(self):
+        self.requests = []
+        self.closed = False
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url))
+        if method == 'GET':
+            return MockAsyncResponse(mock_get_responses(url, **kwargs))
+        elif method == 'PUT':
+            return MockAsyncResponse(mock_put_responses(url, **kwargs))
+        raise Exception('Unexpected HTTP method: ' + method)
+
+    async def close(self):
+        self.closed = True
+
+
+class AsyncSmartwaiverTest(unittest.IsolatedAsyncioTestCase):
+
+    test_api_key = 'TestApiKey'
+
+    def setUp(self):
+        self.session = MockAsyncSession()
+        self.sw = smartwaiver.AsyncSmartwaiver(self.test_api_key, session=self.session)
+
+    async def test_get_waiver_templates(self):
+
+        templates = await self.sw.get_waiver_templates()
+
+        self.assertEqual(3, len(templates))
+        for template in templates:
+            self.assertIs(type(template), smartwaiver.types.SmartwaiverTemplate)
+
+    async def test_get_waiver_template(self):
+
+        template = await self.sw.get_waiver_template('alkagaldeab')
+
+        self.assertIs(type(template), smartwaiver.types.SmartwaiverTemplate)
+
+    async def test_get_waivers(self):
+
+        waiver_summaries = await self.sw.get_waiver_summaries(verified=True)
+
+        self.assertEqual(3, len(waiver_summaries))
+        for waiver_summary in waiver_summaries:
+            self.assertIs(type(waiver_summary), smartwaiver.types.SmartwaiverWaiverSummary)
+
+    async def test_get_waiver(self):
+
+        waiver = await self.sw.get_waiver('6jebdfxzvrdkd', pdf=True)
+
+        self.assertIs(type(waiver), smartwaiver.types.SmartwaiverWaiver)
+        self.assertEqual(factory.waiver()['waiverId'], waiver.waiver_id)
+        self.assertEqual('waiver', self.sw.last_response.type)
+
+    async def test_get_waivers_bulk(self):
+
+        def request(method, url, **kwargs):
+            if 'missing' in url:
+                return MockAsyncResponse(MockResponse(404, factory.api_response_not_found_error()))
+            return MockAsyncSession.request(self.session, method, url.replace('/first', '/6jebdfxzvrdkd'), **kwargs)
+
+        self.session.request = request
+
+        results = await self.sw.get_waivers(['first', 'missing', 'first'], max_workers=2)
+
+        self.assertEqual(['first', 'missing', 'first'], [result.waiver_id for result in results])
+        self.assertEqual([True, False, True], [result.ok for result in results])
+        self.assertEqual(404, results[1].error.status_code)
+
+    async def test_iter_waiver_summaries(self):
+
+        server = MockWaiverServer(timestamps(250, 3))
+        self.session.request = lambda method, url, **kwargs: MockAsyncResponse(server.request(method, url, **kwargs))
+
+        waiver_ids = [summary.waiver_id async for summary in self.sw.iter_waiver_summaries()]
+
+        self.assertEqual(250, len(set(waiver_ids)))
+        self.assertEqual(250, len(waiver_ids))
+
+    async def test_template_cache(self):
+
+        sent = []
+
+        def request(method, url, **kwargs):
+            sent.append(kwargs['headers'])
+            if 'If-None-Match' in kwargs['headers']:
+                return MockAsyncResponse(MockResponse(304, ''))
+            response = MockAsyncResponse(MockResponse(200, factory.api_response_template()))
+            response.headers['ETag'] = '"v1"'
+            return response
+
+        self.session.request = request
+        sw = smartwaiver.AsyncSmartwaiver(self.test_api_key, session=self.session,
+                                          template_cache=smartwaiver.cache.SmartwaiverResponseCache(ttl=0))
+
+        await sw.get_waiver_template('sprswrvh2keeh')
+        template = await sw.get_waiver_template('sprswrvh2keeh')
+
+        self.assertEqual('sprswrvh2keeh', template.template_id)
+        self.assertEqual(2, len(sent))
+        self.assertEqual('"v1"', sent[1]['If-None-Match'])
+        self.assertEqual(1, sw.template_cache.revalidations)
+
+    async def test_waiver_cache(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            sw = smartwaiver.AsyncSmartwaiver(self.test_api_key, session=self.session,
+                                              waiver_cache=smartwaiver.cache.SmartwaiverWaiverCache(directory))
+
+            await sw.get_waiver('6jebdfxzvrdkd', pdf=True)
+            waiver = await sw.get_waiver('6jebdfxzvrdkd', pdf=True)
+
+            self.assertEqual('6jebdfxzvrdkd', waiver.waiver_id)
+            self.assertEqual(1, len(self.session.requests))
+            self.assertEqual(1, sw.waiver_cache.hits)
+
+    async def test_download_waiver_pdf(self):
+
+        pdf = os.urandom(20000)
+        self.session.request = lambda method, url, **kwargs: MockAsyncStreamResponse(
+            MockResponse(200, api_response_waiver_pdf(pdf)))
+
+        out = io.BytesIO()
+        waiver = await self.sw.download_waiver_pdf('6jebdfxzvrdkd', out)
+
+        self.assertEqual(pdf, out.getvalue())
+        self.assertEqual('', waiver.pdf)
+        self.assertEqual('waiver', self.sw.last_response.type)
+
+    async def test_download_waiver_pdf_error(self):
+
+        self.session.request = lambda method, url, **kwargs: MockAsyncStreamResponse(
+            MockResponse(404, factory.api_response_not_found_error()))
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverHTTPException):
+            await self.sw.download_waiver_pdf('6jebdfxzvrdkd', io.BytesIO())
+
+    async def test_backfill_waiver_summaries(self):
+
+        server = MockWaiverServer(timestamps(600, 4))
+        self.session.request = lambda method, url, **kwargs: MockAsyncResponse(server.request(method, url, **kwargs))
+
+        summaries = await self.sw.backfill_waiver_summaries('2017-01-01 00:00:00', '2017-01-01 01:00:00',
+                                                            shards=2, max_workers=3)
+
+        self.assertEqual(600, len(summaries))
+        self.assertEqual(600, len(set(summary.waiver_id for summary in summaries)))
+        self.assertEqual(sorted(s.created_on for s in summaries), [s.created_on for s in summaries])
+
+    async def test_backfill_waiver_summaries_columnar(self):
+
+        server = MockWaiverServer(timestamps(600, 4))
+        self.session.request = lambda method, url, **kwargs: MockAsyncResponse(server.request(method, url, **kwargs))
+
+        columns = await self.sw.backfill_waiver_summaries('2017-01-01 00:00:00', '2017-01-01 01:00:00',
+                                                          shards=2, max_workers=3, columnar=True)
+        pages = [page async for page in self.sw.iter_waiver_summaries(columnar=True)]
+
+        self.assertEqual(600, len(set(columns.column('waiver_id'))))
+        self.assertEqual(sorted(columns.column('created_on')), columns.column('created_on'))
+        self.assertEqual(600, sum(len(page) for page in pages))
+
+    async def test_webhooks(self):
+
+        webhook = await self.sw.get_webhook_config()
+        self.assertIs(type(webhook), smartwaiver.types.SmartwaiverWebhook)
+
+        webhook.email_validation_required = smartwaiver.types.SmartwaiverWebhook.WEBHOOK_BEFORE_AND_AFTER_EMAIL
+        webhook.endpoint = 'http://endpoint.example.org'
+        new_webhook = await self.sw.set_webhook(webhook)
+        self.assertIs(type(new_webhook), smartwaiver.types.SmartwaiverWebhook)
+
+    async def test_raw(self):
+
+        responses = [
+            await self.sw.get_waiver_templates_raw(),
+            await self.sw.get_waiver_template_raw('alkagaldeab'),
+            await self.sw.get_waiver_summaries_raw(),
+            await self.sw.get_waiver_raw('6jebdfxzvrdkd'),
+            await self.sw.get_webhook_config_raw(),
+            await self.sw.set_webhook_config_raw('http://endpoint.example.org',
+                                                 smartwaiver.types.SmartwaiverWebhook.WEBHOOK_BEFORE_AND_AFTER_EMAIL)
+        ]
+
+        for response in responses:
+            self.assertIs(type(response), smartwaiver.responses.SmartwaiverRawResponse)
+        self.assertEqual(201, responses[-1].status_code)
+
+    async def test_http_error(self):
+
+        self.session.request = lambda method, url, **kwargs: MockAsyncResponse(
+            MockResponse(404, factory.api_response_not_found_error()))
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverHTTPException) as cm:
+            await self.sw.get_waiver('6jebdfxzvrdkd')
+
+        self.assertEqual(404, cm.exception.status_code)
+
+    async def test_injected_session_not_closed(self):
+
+        async with self.sw as sw:
+            await sw.get_waiver_templates()
+
+        self.assertFalse(self.session.closed)
+
+    async def test_retry(self):
+
+        failures = [MockResponse(503, factory.api_response_server_error())]
+        session = self.session
+
+        def request(method, url, **kwargs):
+            if failures:
+                return MockAsyncResponse(failures.pop())
+            return MockAsyncSession.request(session, method, url, **kwargs)
+
+        self.session.request = request
+        policy = smartwaiver.retry.SmartwaiverRetryPolicy(backoff_base=0.001)
+        sw = smartwaiver.AsyncSmartwaiver(self.test_api_key, session=self.session, retry_policy=policy)
+
+        templates = await sw.get_waiver_templates()
+
+        self.assertEqual(3, len(templates))
+        self.assertEqual(1, sw.retry_stats.retries)
+
+    async def test_timeout(self):
+
+        def request(method, url, **kwargs):
+            self.assertEqual(2, kwargs['timeout'].sock_read)
+            raise asyncio.TimeoutError()
+
+        self.session.request = request
+        sw = smartwaiver.AsyncSmartwaiver(self.test_api_key, session=self.session, read_timeout=2)
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverTimeoutException) as cm:
+            await sw.get_waiver('6jebdfxzvrdkd')
+
+        self.assertEqual(2, cm.exception.timeout)
+
+    async def test_deadline(self):
+
+        timeouts = []
+
+        def request(method, url, **kwargs):
+            timeouts.append(kwargs['timeout'].total)
+            return MockAsyncSession.request(self.session, method, url, **kwargs)
+
+        self.session.request = request
+
+        with self.sw.with_deadline(3):
+            await self.sw.get_waiver_templates()
+        await self.sw.get_waiver_templates()
+
+        self.assertTrue(2.5 < timeouts[0] <= 3)
+        self.assertIsNone(timeouts[1])
+
+    async def test_deadline_rate_limiter(self):
+
+        limiter = smartwaiver.ratelimit.SmartwaiverRateLimiter(rate=0.1, burst=1)
+        sw = smartwaiver.AsyncSmartwaiver(self.test_api_key, session=self.session, rate_limiter=limiter, deadline=5)
+
+        await sw.get_waiver_templates()
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverTimeoutException) as cm:
+            await sw.get_waiver_templates()
+
+        self.assertEqual(5, cm.exception.timeout)
+        self.assertEqual(1, len(self.session.requests))
+
+    async def test_deadline_rate_limiter_not_retried(self):
+
+        limiter = smartwaiver.ratelimit.SmartwaiverRateLimiter(rate=0.5, burst=1)
+        limiter.acquire()
+        policy = smartwaiver.retry.SmartwaiverRetryPolicy(max_attempts=5, backoff_base=0.001)
+        sw = smartwaiver.AsyncSmartwaiver(self.test_api_key, session=self.session, rate_limiter=limiter,
+                                          retry_policy=policy, deadline=1.0)
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverTimeoutException):
+            await sw.get_waiver_templates()
+
+        self.assertEqual(0, len(self.session.requests))
+        self.assertEqual(0, sw.retry_stats.retries)
+        self.assertEqual(0, sw.retry_stats.exhausted)
+
+    async def test_session_without_aiohttp(self):
+
+        self.session.request = mock.Mock(wraps=self.session.request)
+
+        with mock.patch('smartwaiver.aio.aiohttp', None):
+            sw = smartwaiver.AsyncSmartwaiver(self.test_api_key, session=self.session)
+            templates = await sw.get_waiver_templates()
+
+        self.assertEqual(3, len(templates))
+        self.assertNotIn('timeout', self.session.request.call_args[1])
+
+    async def test_last_response_per_task(self):
+
+        async def fetch():
+            await self.sw.get_waiver_templates()
+            return self.sw.last_response
+
+        last_response = await asyncio.create_task(fetch())
+
+        self.assertEqual('templates', last_response.type)
+        self.assertIsNone(self.sw.last_response)
+
+    def test_parity(self):
+
+        sync_methods = {name for name in dir(smartwaiver.Smartwaiver) if not name.startswith('_')}
+        async_methods = {name for name in dir(smartwaiver.AsyncSmartwaiver) if not name.startswith('_')}
+
+        self.assertEqual(set(), sync_methods - async_methods)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,299 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import sys
+sys.path.insert(0, '../')
+
+import smartwaiver
+import factory
+from test_retry import MockResponse
+
+
+class SmartwaiverResponseCacheTest(unittest.TestCase):
+
+    def test_lru(self):
+
+        cache = smartwaiver.cache.SmartwaiverResponseCache(max_size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.get('a').value)
+        self.assertEqual(3, cache.get('c').value)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.evictions)
+        self.assertEqual(3, cache.misses)
+        self.assertEqual(3, cache.hits)
+
+    @mock.patch('smartwaiver.cache.time.monotonic')
+    def test_ttl(self, monotonic):
+
+        monotonic.return_value = 100.0
+        cache = smartwaiver.cache.SmartwaiverResponseCache(ttl=10)
+        cache.put('a', 1, etag='"v1"', last_modified='Tue, 24 Jan 2017 11:14:25 GMT')
+
+        monotonic.return_value = 109.0
+        self.assertTrue(cache.get('a').is_fresh())
+
+        monotonic.return_value = 111.0
+        entry = cache.get('a')
+        self.assertFalse(entry.is_fresh())
+        self.assertEqual({'If-None-Match': '"v1"', 'If-Modified-Since': 'Tue, 24 Jan 2017 11:14:25 GMT'},
+                         entry.validators())
+        self.assertEqual(1, cache.hits)
+
+        self.assertTrue(cache.revalidate('a').is_fresh())
+        self.assertEqual(1, cache.revalidations)
+        self.assertIsNone(cache.revalidate('b'))
+
+    def test_no_ttl(self):
+
+        cache = smartwaiver.cache.SmartwaiverResponseCache(ttl=None)
+        cache.put('a', 1)
+
+        self.assertTrue(cache.get('a').is_fresh())
+        self.assertEqual({}, cache.get('a').validators())
+
+    def test_invalidate(self):
+
+        cache = smartwaiver.cache.SmartwaiverResponseCache()
+        cache.put('a', 1)
+        cache.put('b', 2)
+
+        cache.invalidate('a')
+        self.assertIsNone(cache.get('a'))
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_invalid_size(self):
+
+        with self.assertRaises(ValueError):
+            smartwaiver.cache.SmartwaiverResponseCache(max_size=0)
+
+
+class SmartwaiverTemplateCacheTest(unittest.TestCase):
+
+    test_api_key = 'TestApiKey'
+
+    def client(self, *responses, **kwargs):
+        session = mock.Mock()
+        session.request.side_effect = list(responses)
+        cache = smartwaiver.cache.SmartwaiverResponseCache(**kwargs)
+        return smartwaiver.Smartwaiver(self.test_api_key, session=session, template_cache=cache), session
+
+    def test_hit(self):
+
+        sw, session = self.client(MockResponse(200, factory.api_response_templates(3)))
+
+        first = sw.get_waiver_templates()
+        second = sw.get_waiver_templates()
+
+        self.assertEqual(3, len(second))
+        self.assertEqual(first[0].template_id, second[0].template_id)
+        self.assertEqual(1, session.request.call_count)
+        self.assertEqual(1, sw.template_cache.hits)
+        self.assertEqual(1, sw.template_cache.misses)
+        self.assertEqual('templates', sw.last_response.type)
+
+    def test_keyed_by_url(self):
+
+        sw, session = self.client(MockResponse(200, factory.api_response_template()),
+                                  MockResponse(200, factory.api_response_templates(2)))
+
+        self.assertIs(type(sw.get_waiver_template('sprswrvh2keeh')), smartwaiver.types.SmartwaiverTemplate)
+        self.assertEqual(2, len(sw.get_waiver_templates()))
+        self.assertIs(type(sw.get_waiver_template('sprswrvh2keeh')), smartwaiver.types.SmartwaiverTemplate)
+        self.assertEqual(2, session.request.call_count)
+
+    def test_revalidate_not_modified(self):
+
+        sw, session = self.client(MockResponse(200, factory.api_response_template(), {'ETag': '"v1"'}),
+                                  MockResponse(304, ''), ttl=0)
+
+        sw.get_waiver_template('sprswrvh2keeh')
+        template = sw.get_waiver_template('sprswrvh2keeh')
+
+        self.assertEqual('sprswrvh2keeh', template.template_id)
+        self.assertEqual('"v1"', session.request.call_args[1]['headers']['If-None-Match'])
+        self.assertEqual(self.test_api_key, session.request.call_args[1]['headers']['sw-api-key'])
+        self.assertEqual(1, sw.template_cache.revalidations)
+        self.assertEqual(1, sw.template_cache.misses)
+
+    def test_revalidate_changed(self):
+
+        sw, session = self.client(MockResponse(200, factory.api_response_template(), {'Last-Modified': 'old'}),
+                                  MockResponse(200, factory.api_response_template(), {'Last-Modified': 'new'}),
+                                  ttl=0)
+
+        sw.get_waiver_template('sprswrvh2keeh')
+        sw.get_waiver_template('sprswrvh2keeh')
+
+        self.assertEqual('old', session.request.call_args[1]['headers']['If-Modified-Since'])
+        self.assertEqual(2, sw.template_cache.misses)
+        self.assertEqual(0, sw.template_cache.revalidations)
+
+    def test_not_cached(self):
+
+        sw, session = self.client(MockResponse(200, factory.api_response_waiver()),
+                                  MockResponse(200, factory.api_response_waiver()))
+
+        sw.get_waiver('6jebdfxzvrdkd')
+        sw.get_waiver('6jebdfxzvrdkd')
+
+        self.assertEqual(2, session.request.call_count)
+        self.assertEqual(0, len(sw.template_cache))
+
+    def test_errors_not_cached(self):
+
+        sw, session = self.client(MockResponse(404, factory.api_response_not_found_error()),
+                                  MockResponse(200, factory.api_response_template()))
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverHTTPException):
+            sw.get_waiver_template('sprswrvh2keeh')
+
+        sw.get_waiver_template('sprswrvh2keeh')
+        self.assertEqual(2, session.request.call_count)
+
+
+class SmartwaiverWaiverCacheTest(unittest.TestCase):
+
+    test_api_key = 'TestApiKey'
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def client(self, *responses, **kwargs):
+        session = mock.Mock()
+        session.request.side_effect = list(responses)
+        cache = smartwaiver.cache.SmartwaiverWaiverCache(self.directory.name, **kwargs)
+        return smartwaiver.Smartwaiver(self.test_api_key, session=session, waiver_cache=cache), session
+
+    def test_put_get(self):
+
+        cache = smartwaiver.cache.SmartwaiverWaiverCache(self.directory.name)
+        cache.put('abc', True, factory.api_response_waiver())
+
+        self.assertIsNone(cache.get('abc', False))
+        entry = cache.get('abc', True)
+        self.assertTrue(entry.is_fresh())
+        self.assertEqual('waiver', cache.load(entry).type)
+
+        # Another cache on the same directory, such as in another process
+        other = smartwaiver.cache.SmartwaiverWaiverCache(self.directory.name)
+        self.assertIsNotNone(other.get('abc', True))
+
+        cache.invalidate('abc')
+        self.assertIsNone(other.get('abc', True))
+        self.assertEqual([], os.listdir(self.directory.name))
+
+    def test_lru_eviction(self):
+
+        text = factory.api_response_waiver()
+        cache = smartwaiver.cache.SmartwaiverWaiverCache(self.directory.name, max_bytes=len(text) * 2 + 100)
+
+        cache.put('a', False, text)
+        cache.put('b', False, text)
+        os.utime(cache._path('a', False), (1000, 1000))
+        os.utime(cache._path('b', False), (2000, 2000))
+        cache.get('a', False)
+        cache.put('c', False, text)
+
+        self.assertIsNotNone(cache.get('a', False))
+        self.assertIsNone(cache.get('b', False))
+        self.assertIsNotNone(cache.get('c', False))
+        self.assertEqual(1, cache.evictions)
+        self.assertEqual(2, len(os.listdir(self.directory.name)))
+
+    def test_hit(self):
+
+        sw, session = self.client(MockResponse(200, factory.api_response_waiver()))
+
+        sw.get_waiver('6jebdfxzvrdkd', pdf=True)
+        waiver = sw.get_waiver('6jebdfxzvrdkd', pdf=True)
+
+        self.assertEqual('6jebdfxzvrdkd', waiver.waiver_id)
+        self.assertEqual(1, session.request.call_count)
+        self.assertEqual(1, sw.waiver_cache.hits)
+        self.assertEqual(1, sw.waiver_cache.misses)
+        self.assertEqual('waiver', sw.last_response.type)
+
+    def test_pdf_flag(self):
+
+        sw, session = self.client(MockResponse(200, factory.api_response_waiver()),
+                                  MockResponse(200, factory.api_response_waiver()))
+
+        sw.get_waiver('6jebdfxzvrdkd', pdf=True)
+        sw.get_waiver('6jebdfxzvrdkd')
+
+        self.assertEqual(2, session.request.call_count)
+
+    def test_refresh_pdf(self):
+
+        pdf_response = json.loads(factory.api_response_waiver())
+        pdf_response['waiver']['pdf'] = 'JVBERi0xLjQK'
+        current = json.loads(factory.api_response_waiver())
+        current['waiver']['verified'] = False
+        current['waiver']['tags'] = ['Red Team']
+
+        sw, session = self.client(MockResponse(200, json.dumps(pdf_response)),
+                                  MockResponse(200, json.dumps(current)), refresh_after=0)
+
+        sw.get_waiver('6jebdfxzvrdkd', pdf=True)
+        waiver = sw.get_waiver('6jebdfxzvrdkd', pdf=True)
+
+        # The status fields were refreshed without downloading the PDF again
+        self.assertEqual('https://api.smartwaiver.com/v4/waivers/6jebdfxzvrdkd?pdf=false',
+                         session.request.call_args[0][1])
+        self.assertEqual('JVBERi0xLjQK', waiver.pdf)
+        self.assertFalse(waiver.verified)
+        self.assertEqual(['Red Team'], waiver.tags)
+        self.assertEqual(1, sw.waiver_cache.refreshes)
+
+        # The waiver without the PDF was stored as well
+        self.assertIsNotNone(sw.waiver_cache.get('6jebdfxzvrdkd', False))
+
+    def test_refresh_no_pdf(self):
+
+        sw, session = self.client(MockResponse(200, factory.api_response_waiver()),
+                                  MockResponse(200, factory.api_response_waiver()), refresh_after=0)
+
+        sw.get_waiver('6jebdfxzvrdkd')
+        sw.get_waiver('6jebdfxzvrdkd')
+
+        self.assertEqual(2, session.request.call_count)
+        self.assertEqual(2, sw.waiver_cache.misses)
+
+    def test_errors_not_cached(self):
+
+        sw, session = self.client(MockResponse(404, factory.api_response_not_found_error()))
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverHTTPException):
+            sw.get_waiver('6jebdfxzvrdkd')
+
+        self.assertEqual([], os.listdir(self.directory.name))
+
+
+if __name__ == "__main__":
+    unittest.main()
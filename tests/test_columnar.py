@@ -0,0 +1,186 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from array import array
+import json
+import unittest
+from unittest import mock
+
+import sys
+sys.path.insert(0, '../')
+
+import smartwaiver
+import factory
+from test_smartwaiver import MockResponse
+
+
+def summaries(count):
+    data = []
+    for i in range(count):
+        summary = factory.waiver_summary()
+        summary['waiverId'] = 'waiver' + str(i)
+        summary['createdOn'] = '2017-01-24 13:12:' + str(10 + i)
+        summary['verified'] = i % 2 == 0
+        data.append(summary)
+    return data
+
+
+class SmartwaiverSummaryColumnsTest(unittest.TestCase):
+
+    def test_from_summaries(self):
+
+        data = summaries(3)
+        columns = smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(data)
+
+        self.assertEqual(3, len(columns))
+        self.assertEqual(smartwaiver.columnar.COLUMNS, columns.columns)
+        self.assertEqual(['waiver0', 'waiver1', 'waiver2'], columns.column('waiver_id'))
+        self.assertEqual([True, False, True], columns.column('verified'))
+        self.assertEqual([data[0]['tags']] * 3, columns.column('tags'))
+        self.assertIsNone(columns.response_metadata)
+
+        # Booleans are stored one byte each
+        self.assertIs(type(columns._columns['verified']), array)
+
+        with self.assertRaises(ValueError):
+            columns.column('pdf')
+
+    def test_rows(self):
+
+        data = summaries(3)
+        metadata = smartwaiver.responses.SmartwaiverResponse(MockResponse(200, factory.api_response_waivers(0))).metadata
+        columns = smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(data, metadata)
+
+        rows = list(columns)
+        self.assertEqual(3, len(rows))
+        for row, summary in zip(rows, data):
+            self.assertIs(type(row), smartwaiver.types.SmartwaiverWaiverSummary)
+            self.assertEqual(summary['waiverId'], row.waiver_id)
+            self.assertEqual(summary['verified'], row.verified)
+            self.assertEqual(summary['isMinor'], row.is_minor)
+            self.assertIs(metadata, row.response_metadata)
+
+        self.assertEqual('waiver2', columns[-1].waiver_id)
+        with self.assertRaises(IndexError):
+            columns[3]
+
+    def test_null_and_other_values(self):
+
+        data = summaries(2)
+        data[0]['expired'] = None
+        data[1]['kiosk'] = 'yes'
+        columns = smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(data)
+
+        self.assertEqual([None, False], columns.column('expired'))
+        self.assertEqual([False, 'yes'], columns.column('kiosk'))
+        self.assertIsNone(columns[0].expired)
+        self.assertEqual('yes', columns[1].kiosk)
+
+    def test_missing_key(self):
+
+        data = summaries(2)
+        del data[1]['isMinor']
+
+        with self.assertRaises(ValueError) as cm:
+            smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(data)
+
+        self.assertEqual('Cannot create a SmartwaiverWaiverSummary with missing field: isMinor', str(cm.exception))
+
+    def test_from_typed_summaries(self):
+
+        data = summaries(2)
+        objects = [smartwaiver.types.SmartwaiverWaiverSummary(summary) for summary in data]
+
+        self.assertEqual(smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(data).to_dict(),
+                         smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(objects).to_dict())
+
+    def test_slice_take_filter(self):
+
+        columns = smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(summaries(5))
+
+        sliced = columns[1:4]
+        self.assertIs(type(sliced), smartwaiver.columnar.SmartwaiverSummaryColumns)
+        self.assertEqual(['waiver1', 'waiver2', 'waiver3'], sliced.column('waiver_id'))
+        self.assertEqual([False, True, False], sliced.column('verified'))
+
+        self.assertEqual(['waiver4', 'waiver0'], columns.take([4, 0]).column('waiver_id'))
+
+        verified = columns.filter(columns.column('verified'))
+        self.assertEqual(['waiver0', 'waiver2', 'waiver4'], verified.column('waiver_id'))
+
+        with self.assertRaises(ValueError):
+            columns.filter([True])
+
+    def test_where(self):
+
+        columns = smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(summaries(5))
+
+        kept = columns.where(verified=True, created_on=lambda dts: dts > '2017-01-24 13:12:10')
+        self.assertEqual(['waiver2', 'waiver4'], kept.column('waiver_id'))
+        self.assertEqual(0, len(columns.where(template_id='other')))
+        self.assertEqual(5, len(columns.where()))
+
+        with self.assertRaises(ValueError):
+            columns.where(pdf='')
+
+    def test_concat(self):
+
+        first = smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(summaries(2))
+        data = summaries(1)
+        data[0]['expired'] = 'no'
+        second = smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(data)
+
+        joined = smartwaiver.columnar.SmartwaiverSummaryColumns.concat([first, second])
+
+        self.assertEqual(3, len(joined))
+        self.assertEqual(['waiver0', 'waiver1', 'waiver0'], joined.column('waiver_id'))
+        self.assertEqual([False, False, 'no'], joined.column('expired'))
+        self.assertEqual([True, False, True], joined.column('verified'))
+        self.assertEqual(0, len(smartwaiver.columnar.SmartwaiverSummaryColumns.concat([])))
+
+    def test_invalid_columns(self):
+
+        columns = smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries(summaries(2)).to_dict()
+        columns['tags'] = []
+
+        with self.assertRaises(ValueError):
+            smartwaiver.columnar.SmartwaiverSummaryColumns(columns)
+
+        del columns['tags']
+        with self.assertRaises(ValueError):
+            smartwaiver.columnar.SmartwaiverSummaryColumns(columns)
+
+
+class SmartwaiverClientColumnarTest(unittest.TestCase):
+
+    test_api_key = 'TestApiKey'
+
+    def test_get_waiver_summaries(self):
+
+        response = json.loads(factory.api_response_waivers(0))
+        response['waivers'] = summaries(4)
+        for decoder in ['json', 'typed']:
+            session = mock.Mock()
+            session.request.return_value = MockResponse(200, json.dumps(response))
+            sw = smartwaiver.Smartwaiver(self.test_api_key, session=session, json_decoder=decoder)
+
+            columns = sw.get_waiver_summaries(4, columnar=True)
+
+            self.assertIs(type(columns), smartwaiver.columnar.SmartwaiverSummaryColumns)
+            self.assertEqual(['waiver0', 'waiver1', 'waiver2', 'waiver3'], columns.column('waiver_id'))
+            self.assertEqual('waivers', columns.response_metadata.type)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import unittest
+from unittest import mock
+
+import sys
+sys.path.insert(0, '../')
+
+import smartwaiver
+import factory
+
+
+def waiver_data(waiver_id='6jebdfxzvrdkd', participants=1):
+    data = factory.waiver()
+    data['waiverId'] = waiver_id
+    data['participants'] = [factory.participant() for _ in range(participants)]
+    return data
+
+
+class SmartwaiverColumnsTest(unittest.TestCase):
+
+    def test_summary_columns(self):
+
+        data = factory.waiver_summary()
+        objects = [smartwaiver.types.SmartwaiverWaiverSummary(data)] * 2
+
+        columns = smartwaiver.dataframes.summary_columns(objects)
+
+        self.assertEqual(list(smartwaiver.columnar.COLUMNS), list(columns.keys()))
+        self.assertEqual(['6jebdfxzvrdkd'] * 2, columns['waiver_id'])
+        self.assertEqual([['Green Team']] * 2, columns['tags'])
+        self.assertEqual(columns, smartwaiver.dataframes.summary_columns([data, data]))
+        self.assertEqual(columns, smartwaiver.dataframes.summary_columns(
+            smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries([data, data])))
+
+    def test_waiver_columns(self):
+
+        data = [waiver_data('first', participants=2), waiver_data('second', participants=0)]
+        data[1]['guardian'] = None
+
+        columns = smartwaiver.dataframes.waiver_columns([smartwaiver.types.SmartwaiverWaiver(d) for d in data])
+
+        self.assertEqual(['first', 'second'], columns['waiver_id'])
+        self.assertEqual([2, 0], columns['participant_count'])
+        self.assertEqual(['Mother', None], columns['guardian_relationship'])
+        self.assertEqual([{'zrmgxh4ft8sqh': 'A friend'}] * 2, columns['custom_waiver_fields'])
+        self.assertNotIn('pdf', columns)
+        self.assertNotIn('participant_first_name', columns)
+        self.assertEqual(columns, smartwaiver.dataframes.waiver_columns(data))
+
+    def test_explode_participants(self):
+
+        data = [waiver_data('first', participants=2), waiver_data('second', participants=0)]
+
+        columns = smartwaiver.dataframes.waiver_columns([smartwaiver.types.SmartwaiverWaiver(d) for d in data],
+                                                        explode_participants=True)
+
+        self.assertEqual(['first', 'first', 'second'], columns['waiver_id'])
+        self.assertEqual([0, 1, None], columns['participant_index'])
+        self.assertEqual(['Kyle', 'Kyle', None], columns['participant_first_name'])
+        self.assertEqual([True, True, None], columns['participant_is_minor'])
+        self.assertEqual([{'w5qe9kkh3bxpe': 'A friend'}] * 2 + [None], columns['participant_custom_fields'])
+        self.assertNotIn('participant_count', columns)
+        self.assertEqual(columns, smartwaiver.dataframes.waiver_columns(data, explode_participants=True))
+
+    def test_template_columns(self):
+
+        columns = smartwaiver.dataframes.template_columns([smartwaiver.types.SmartwaiverTemplate(factory.template())])
+
+        self.assertEqual(['sprswrvh2keeh'], columns['template_id'])
+        self.assertEqual([78015], columns['published_version'])
+        self.assertEqual(columns, smartwaiver.dataframes.template_columns([factory.template()]))
+
+
+def is_datetime(series):
+    return smartwaiver.dataframes.pandas.api.types.is_datetime64_any_dtype(series)
+
+
+@unittest.skipIf(smartwaiver.dataframes.pandas is None, 'pandas is not installed')
+class SmartwaiverDataFrameTest(unittest.TestCase):
+
+    def test_summaries(self):
+
+        data = factory.waiver_summary()
+        data['expired'] = None
+        frame = smartwaiver.dataframes.to_dataframe([smartwaiver.types.SmartwaiverWaiverSummary(data)] * 3)
+
+        self.assertEqual(3, len(frame))
+        self.assertTrue(is_datetime(frame['created_on']))
+        self.assertTrue(is_datetime(frame['dob']))
+        self.assertTrue(frame['expiration_date'].isna().all())
+        self.assertEqual('category', str(frame['template_id'].dtype))
+        self.assertEqual('boolean', str(frame['verified'].dtype))
+        self.assertTrue(frame['expired'].isna().all())
+
+    def test_waivers(self):
+
+        waivers = [smartwaiver.types.SmartwaiverWaiver(waiver_data(participants=3))]
+
+        self.assertEqual(1, len(smartwaiver.dataframes.to_dataframe(waivers)))
+        frame = smartwaiver.dataframes.to_dataframe(waivers, explode_participants=True)
+        self.assertEqual(3, len(frame))
+        self.assertTrue(is_datetime(frame['participant_dob']))
+        self.assertEqual('boolean', str(frame['participant_is_minor'].dtype))
+
+    def test_templates(self):
+
+        frame = smartwaiver.dataframes.to_dataframe([smartwaiver.types.SmartwaiverTemplate(factory.template())])
+
+        self.assertEqual(['sprswrvh2keeh'], list(frame['template_id']))
+        self.assertTrue(is_datetime(frame['published_on']))
+
+    def test_other(self):
+
+        self.assertEqual(0, len(smartwaiver.dataframes.to_dataframe([])))
+
+        with self.assertRaises(ValueError):
+            smartwaiver.dataframes.to_dataframe([smartwaiver.types.SmartwaiverWebhook(factory.webhook())])
+
+
+class SmartwaiverDataFrameMissingTest(unittest.TestCase):
+
+    @mock.patch.object(smartwaiver.dataframes, 'pandas', None)
+    def test_requires_pandas(self):
+
+        with self.assertRaises(ImportError):
+            smartwaiver.dataframes.to_dataframe([smartwaiver.types.SmartwaiverTemplate(factory.template())])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+import sys
+sys.path.insert(0, '../')
+
+import smartwaiver
+import factory
+from test_retry import MockResponse
+
+
+class SmartwaiverDecodersTest(unittest.TestCase):
+
+    def test_available_decoders(self):
+
+        names = smartwaiver.decoders.available_decoders()
+
+        self.assertEqual('json', names[-1])
+        self.assertEqual(smartwaiver.decoders.get_decoder(names[0]), smartwaiver.decoders.get_decoder('auto'))
+
+    def test_decode(self):
+
+        body = factory.api_response_waiver()
+        for name in smartwaiver.decoders.available_decoders():
+            decoder = smartwaiver.decoders.get_decoder(name)
+
+            self.assertEqual(json.loads(body), decoder(body.encode('utf-8')))
+            self.assertEqual(json.loads(body), decoder(body))
+            with self.assertRaises(ValueError):
+                decoder(b'{"version": ')
+
+    def test_stdlib(self):
+
+        self.assertIs(json.loads, smartwaiver.decoders.get_decoder('json'))
+
+    def test_function(self):
+
+        decoder = mock.Mock(return_value={})
+
+        self.assertIs(decoder, smartwaiver.decoders.get_decoder(decoder))
+
+    def test_unknown(self):
+
+        with self.assertRaises(ValueError):
+            smartwaiver.decoders.get_decoder('yaml')
+
+    @mock.patch.dict('sys.modules', {'orjson': None, 'ujson': None, 'simdjson': None})
+    def test_fallback(self):
+
+        self.assertIs(json.loads, smartwaiver.decoders.get_decoder('auto'))
+        self.assertEqual(['json'], smartwaiver.decoders.available_decoders())
+
+        with self.assertRaises(ImportError):
+            smartwaiver.decoders.get_decoder('orjson')
+
+
+class SmartwaiverClientDecoderTest(unittest.TestCase):
+
+    test_api_key = 'TestApiKey'
+
+    def test_decodes_raw_body(self):
+
+        decoder = mock.Mock(side_effect=json.loads)
+        session = mock.Mock()
+        session.request.return_value = MockResponse(200, factory.api_response_template())
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session, json_decoder=decoder)
+
+        template = sw.get_waiver_template('sprswrvh2keeh')
+
+        self.assertEqual('sprswrvh2keeh', template.template_id)
+        self.assertIs(decoder, sw.json_decoder)
+        decoder.assert_called_once_with(factory.api_response_template().encode('utf-8'))
+
+    def test_malformed(self):
+
+        session = mock.Mock()
+        session.request.return_value = MockResponse(200, '{"version": ')
+
+        for name in smartwaiver.decoders.available_decoders():
+            sw = smartwaiver.Smartwaiver(self.test_api_key, session=session, json_decoder=name)
+            with self.assertRaises(smartwaiver.exceptions.SmartwaiverSDKException):
+                sw.get_waiver_template('sprswrvh2keeh')
+
+
+class SmartwaiverTypedDecoderTest(unittest.TestCase):
+
+    test_api_key = 'TestApiKey'
+
+    def client(self, *responses):
+        session = mock.Mock()
+        session.request.side_effect = list(responses)
+        return smartwaiver.Smartwaiver(self.test_api_key, session=session, json_decoder='typed')
+
+    def test_decode_waiver(self):
+
+        contents = smartwaiver.decoders.decode_typed(factory.api_response_waiver().encode('utf-8'))
+        waiver = contents['waiver']
+
+        self.assertEqual('waiver', contents['type'])
+        self.assertIs(type(waiver), smartwaiver.types.SmartwaiverWaiver)
+        self.assertIs(type(waiver.participants[0]), smartwaiver.types.SmartwaiverParticipant)
+        self.assertIs(type(waiver.participants[0].custom_participant_fields['w5qe9kkh3bxpe']),
+                      smartwaiver.types.SmartwaiverCustomField)
+        self.assertIs(type(waiver.custom_waiver_fields['zrmgxh4ft8sqh']), smartwaiver.types.SmartwaiverCustomField)
+        self.assertIs(type(waiver.guardian), smartwaiver.types.SmartwaiverGuardian)
+        self.assertEqual('Mother', waiver.guardian.relationship)
+
+    def test_decode_other_types(self):
+
+        contents = smartwaiver.decoders.decode_typed(factory.api_response_waivers(2))
+        self.assertEqual([smartwaiver.types.SmartwaiverWaiverSummary] * 2, [type(w) for w in contents['waivers']])
+
+        contents = smartwaiver.decoders.decode_typed(factory.api_response_templates(2))
+        self.assertEqual([smartwaiver.types.SmartwaiverTemplate] * 2, [type(t) for t in contents['templates']])
+
+        contents = smartwaiver.decoders.decode_typed(factory.api_response_webhooks())
+        self.assertEqual(json.loads(factory.api_response_webhooks()), contents)
+
+    def test_incomplete_left_as_dict(self):
+
+        response = json.loads(factory.api_response_waiver())
+        del response['waiver']['guardian']['relationship']
+        del response['waiver']['email']
+
+        contents = smartwaiver.decoders.decode_typed(json.dumps(response))
+
+        self.assertIs(type(contents['waiver']), dict)
+        self.assertEqual(response['waiver']['guardian'], contents['waiver']['guardian'])
+        self.assertIs(type(contents['waiver']['participants'][0]), smartwaiver.types.SmartwaiverParticipant)
+
+    def test_client(self):
+
+        sw = self.client(MockResponse(200, factory.api_response_waiver()),
+                         MockResponse(200, factory.api_response_waivers(3)),
+                         MockResponse(200, factory.api_response_templates(2)))
+
+        waiver = sw.get_waiver('6jebdfxzvrdkd')
+        self.assertIs(type(waiver), smartwaiver.types.SmartwaiverWaiver)
+        self.assertEqual('waiver', waiver.response_metadata.type)
+        self.assertFalse(waiver.pdf_loaded)
+
+        summaries = sw.get_waiver_summaries()
+        self.assertEqual(3, len(summaries))
+        self.assertEqual('waivers', summaries[0].response_metadata.type)
+
+        templates = sw.get_waiver_templates()
+        self.assertEqual('templates', templates[1].response_metadata.type)
+
+    def test_client_options(self):
+
+        for options in ({'lazy': True}, {'string_pool': smartwaiver.interning.SmartwaiverStringPool()}):
+            with self.assertRaises(ValueError):
+                smartwaiver.Smartwaiver(self.test_api_key, json_decoder='typed', **options)
+            with self.assertRaises(ValueError):
+                smartwaiver.Smartwaiver(self.test_api_key, json_decoder=smartwaiver.decoders.decode_typed, **options)
+            with self.assertRaises(ValueError):
+                smartwaiver.AsyncSmartwaiver(self.test_api_key, json_decoder='typed', **options)
+
+    def test_waiver_cache_refresh(self):
+
+        pdf_response = json.loads(factory.api_response_waiver())
+        pdf_response['waiver']['pdf'] = 'JVBERi0xLjQK'
+        current = json.loads(factory.api_response_waiver())
+        current['waiver']['verified'] = False
+
+        with tempfile.TemporaryDirectory() as directory:
+            session = mock.Mock()
+            session.request.side_effect = [MockResponse(200, json.dumps(pdf_response)),
+                                           MockResponse(200, json.dumps(current))]
+            cache = smartwaiver.cache.SmartwaiverWaiverCache(directory, refresh_after=0)
+            sw = smartwaiver.Smartwaiver(self.test_api_key, session=session, json_decoder='typed', waiver_cache=cache)
+
+            sw.get_waiver('6jebdfxzvrdkd', pdf=True)
+            waiver = sw.get_waiver('6jebdfxzvrdkd', pdf=True)
+
+        self.assertEqual('JVBERi0xLjQK', waiver.pdf)
+        self.assertFalse(waiver.verified)
+
+    def test_client_error(self):
+
+        response = json.loads(factory.api_response_waiver())
+        response['waiver']['participants'] = ''
+        sw = self.client(MockResponse(200, json.dumps(response)))
+
+        with self.assertRaises(ValueError) as cm:
+            sw.get_waiver('6jebdfxzvrdkd')
+
+        self.assertEqual('Participants field must be a list', str(cm.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
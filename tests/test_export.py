@@ -0,0 +1,205 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import unittest
+import zipfile
+from unittest import mock
+
+import sys
+sys.path.insert(0, '../')
+
+import smartwaiver
+import factory
+from test_pdf import MockStreamResponse, api_response_waiver_pdf
+
+
+class MockPdfServer:
+
+    def __init__(self, pdfs, failing=()):
+        self.pdfs = pdfs
+        self.failing = set(failing)
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        waiver_id = url.split('/')[-1].split('?')[0]
+        with self._lock:
+            self.requests.append(waiver_id)
+        if waiver_id in self.failing or waiver_id not in self.pdfs:
+            return MockStreamResponse(404, factory.api_response_not_found_error())
+        return MockStreamResponse(200, api_response_waiver_pdf(self.pdfs[waiver_id]))
+
+
+class SmartwaiverPdfExporterTest(unittest.TestCase):
+
+    test_api_key = 'TestApiKey'
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pdfs = {'waiver' + str(i): os.urandom(1000 + i) for i in range(5)}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def client(self, failing=()):
+        server = MockPdfServer(self.pdfs, failing)
+        session = mock.Mock()
+        session.request.side_effect = server.request
+        return smartwaiver.Smartwaiver(self.test_api_key, session=session), server
+
+    def test_directory(self):
+
+        sw, server = self.client()
+        destination = os.path.join(self.directory.name, 'pdfs')
+        exporter = smartwaiver.export.SmartwaiverPdfExporter(sw, destination, max_workers=3)
+
+        results = exporter.export(list(self.pdfs) + ['waiver0'])
+
+        self.assertEqual(sorted(self.pdfs), [result.waiver_id for result in results])
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(len(self.pdfs), len(server.requests))
+        for waiver_id, pdf in self.pdfs.items():
+            with open(os.path.join(destination, waiver_id + '.pdf'), 'rb') as pdf_file:
+                self.assertEqual(pdf, pdf_file.read())
+
+        with open(exporter.manifest_path) as manifest:
+            lines = [json.loads(line) for line in manifest]
+        self.assertEqual(len(self.pdfs), len(lines))
+        entry = exporter.entries['waiver1']
+        self.assertEqual(len(self.pdfs['waiver1']), entry.size)
+        self.assertEqual(hashlib.sha256(self.pdfs['waiver1']).hexdigest(), entry.sha256)
+        self.assertEqual('waiver1.pdf', entry.file_name)
+        self.assertEqual([], exporter.verify())
+
+    def test_resume(self):
+
+        sw, server = self.client(failing=['waiver2'])
+        exporter = smartwaiver.export.SmartwaiverPdfExporter(sw, self.directory.name)
+
+        results = exporter.export(self.pdfs)
+        failed = [result for result in results if not result.ok]
+        self.assertEqual(['waiver2'], [result.waiver_id for result in failed])
+        self.assertIsInstance(failed[0].error, smartwaiver.exceptions.SmartwaiverHTTPException)
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, 'waiver2.pdf')))
+
+        # A later run only downloads what is missing, or no longer matches
+        os.remove(os.path.join(self.directory.name, 'waiver3.pdf'))
+        with open(exporter.manifest_path, 'a') as manifest:
+            manifest.write('{"waiverId": "waiv')
+
+        sw, server = self.client()
+        exporter = smartwaiver.export.SmartwaiverPdfExporter(sw, self.directory.name)
+        results = exporter.export(self.pdfs)
+
+        self.assertEqual(['waiver2', 'waiver3'], sorted(server.requests))
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual([], exporter.export(self.pdfs))
+
+    def test_verify(self):
+
+        sw, server = self.client()
+        exporter = smartwaiver.export.SmartwaiverPdfExporter(sw, self.directory.name)
+        exporter.export(self.pdfs)
+
+        with open(os.path.join(self.directory.name, 'waiver1.pdf'), 'r+b') as pdf_file:
+            pdf_file.write(b'x')
+        os.remove(os.path.join(self.directory.name, 'waiver4.pdf'))
+
+        self.assertEqual(['waiver1', 'waiver4'], sorted(exporter.verify()))
+
+    def test_zip(self):
+
+        sw, server = self.client(failing=['waiver0'])
+        destination = os.path.join(self.directory.name, 'export.zip')
+        exporter = smartwaiver.export.SmartwaiverPdfExporter(sw, destination, max_workers=4)
+        exporter.export(self.pdfs)
+
+        self.assertEqual(destination + '.manifest.jsonl', exporter.manifest_path)
+
+        sw, server = self.client()
+        exporter = smartwaiver.export.SmartwaiverPdfExporter(sw, destination)
+        exporter.export(self.pdfs)
+
+        self.assertEqual(['waiver0'], server.requests)
+        with zipfile.ZipFile(destination) as archive:
+            self.assertEqual(sorted(waiver_id + '.pdf' for waiver_id in self.pdfs), sorted(archive.namelist()))
+            for waiver_id, pdf in self.pdfs.items():
+                self.assertEqual(pdf, archive.read(waiver_id + '.pdf'))
+        self.assertEqual([], exporter.verify())
+
+    def test_zip_killed(self):
+
+        sw, server = self.client(failing=['waiver0', 'waiver1'])
+        destination = os.path.join(self.directory.name, 'export.zip')
+        smartwaiver.export.SmartwaiverPdfExporter(sw, destination).export(self.pdfs)
+
+        # Killed after the PDFs are written but before the archive is moved into place
+        sw, server = self.client()
+        exporter = smartwaiver.export.SmartwaiverPdfExporter(sw, destination)
+        with mock.patch('smartwaiver.export.os.replace', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                exporter.export(self.pdfs)
+
+        with zipfile.ZipFile(destination) as archive:
+            self.assertEqual(['waiver2.pdf', 'waiver3.pdf', 'waiver4.pdf'], sorted(archive.namelist()))
+
+        sw, server = self.client()
+        exporter = smartwaiver.export.SmartwaiverPdfExporter(sw, destination)
+        exporter.export(self.pdfs)
+
+        self.assertEqual(['waiver0', 'waiver1'], sorted(server.requests))
+        self.assertFalse(os.path.exists(destination + '.partial'))
+        self.assertEqual([], exporter.verify())
+
+    def test_unsafe_waiver_ids(self):
+
+        sw, server = self.client()
+        destination = os.path.join(self.directory.name, 'pdfs')
+        unsafe = ['../waiver0', 'pdfs/waiver0', '..\\waiver0', '..', '']
+
+        for path in (destination, destination + '.zip'):
+            exporter = smartwaiver.export.SmartwaiverPdfExporter(sw, path)
+            results = exporter.export(unsafe + ['waiver0'])
+
+            self.assertEqual([False] * len(unsafe) + [True], [result.ok for result in results])
+            self.assertIsInstance(results[0].error, ValueError)
+        self.assertEqual(['waiver0', 'waiver0'], server.requests)
+        self.assertEqual(['pdfs', 'pdfs.zip', 'pdfs.zip.manifest.jsonl'], sorted(os.listdir(self.directory.name)))
+
+    def test_summaries(self):
+
+        sw, server = self.client()
+        summary = factory.waiver_summary()
+        summary['waiverId'] = 'waiver3'
+        exporter = smartwaiver.export.SmartwaiverPdfExporter(sw, self.directory.name)
+
+        results = exporter.export([smartwaiver.types.SmartwaiverWaiverSummary(summary)])
+
+        self.assertEqual(['waiver3'], server.requests)
+        self.assertIs(type(results[0].waiver), smartwaiver.types.SmartwaiverWaiver)
+
+    def test_invalid_workers(self):
+
+        sw, server = self.client()
+        with self.assertRaises(ValueError):
+            smartwaiver.export.SmartwaiverPdfExporter(sw, self.directory.name, max_workers=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
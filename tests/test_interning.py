@@ -0,0 +1,147 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import unittest
+from unittest import mock
+
+import sys
+sys.path.insert(0, '../')
+
+import smartwaiver
+import factory
+from test_smartwaiver import MockResponse
+
+
+def copy(value):
+    """Returns an equal string that is a different object"""
+    return ''.join(list(value))
+
+
+class SmartwaiverStringPoolTest(unittest.TestCase):
+
+    def test_intern(self):
+
+        pool = smartwaiver.interning.SmartwaiverStringPool()
+        first = copy('Demo Waiver')
+        second = copy('Demo Waiver')
+        self.assertIsNot(first, second)
+
+        self.assertIs(first, pool.intern(first))
+        self.assertIs(first, pool.intern(second))
+        self.assertEqual(1, len(pool))
+        self.assertEqual(1, pool.hits)
+        self.assertEqual(1, pool.misses)
+
+        pool.clear()
+        self.assertEqual(0, len(pool))
+        self.assertIs(second, pool.intern(second))
+
+    def test_bounded(self):
+
+        pool = smartwaiver.interning.SmartwaiverStringPool(max_size=2)
+        for value in ['a1', 'b2', 'c3']:
+            pool.intern(copy(value))
+
+        self.assertEqual(2, len(pool))
+        self.assertEqual(2, pool.max_size)
+
+        value = copy('c3')
+        self.assertIs(value, pool.intern(value))
+        self.assertEqual(2, len(pool))
+
+        with self.assertRaises(ValueError):
+            smartwaiver.interning.SmartwaiverStringPool(max_size=0)
+
+    def test_intern_payload(self):
+
+        pool = smartwaiver.interning.SmartwaiverStringPool()
+        first = json.loads(factory.api_response_waiver())['waiver']
+        second = json.loads(factory.api_response_waiver())['waiver']
+
+        pool.intern_payload(first)
+        self.assertIs(second, pool.intern_payload(second))
+
+        self.assertEqual(json.loads(factory.api_response_waiver())['waiver'], second)
+        self.assertIs(first['templateId'], second['templateId'])
+        self.assertIs(first['title'], second['title'])
+        self.assertIs(first['tags'][0], second['tags'][0])
+        self.assertIs(first['guardian']['relationship'], second['guardian']['relationship'])
+        self.assertIs(first['participants'][0]['gender'], second['participants'][0]['gender'])
+        self.assertIs(first['participants'][0]['tags'][0], second['participants'][0]['tags'][0])
+        self.assertIs(first['customWaiverFields']['zrmgxh4ft8sqh']['displayText'],
+                      second['customWaiverFields']['zrmgxh4ft8sqh']['displayText'])
+
+        # Unique values are left alone
+        self.assertNotIn(first['email'], pool._strings)
+
+
+class SmartwaiverClientStringPoolTest(unittest.TestCase):
+
+    test_api_key = 'TestApiKey'
+
+    def client(self, pool, *responses):
+        session = mock.Mock()
+        session.request.side_effect = list(responses)
+        return smartwaiver.Smartwaiver(self.test_api_key, session=session, string_pool=pool)
+
+    def test_summaries(self):
+
+        pool = smartwaiver.interning.SmartwaiverStringPool()
+        sw = self.client(pool, MockResponse(200, factory.api_response_waivers(2)),
+                         MockResponse(200, factory.api_response_waivers(2)))
+
+        summaries = sw.get_waiver_summaries(2) + sw.get_waiver_summaries(2)
+
+        self.assertIs(pool, sw.string_pool)
+        for summary in summaries:
+            self.assertIs(summaries[0].template_id, summary.template_id)
+            self.assertIs(summaries[0].tags[0], summary.tags[0])
+
+    def test_columnar_and_lazy(self):
+
+        pool = smartwaiver.interning.SmartwaiverStringPool()
+        session = mock.Mock()
+        session.request.side_effect = [MockResponse(200, factory.api_response_waivers(2)),
+                                       MockResponse(200, factory.api_response_waiver())]
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session, string_pool=pool, lazy=True)
+
+        columns = sw.get_waiver_summaries(2, columnar=True)
+        waiver = sw.get_waiver('6jebdfxzvrdkd')
+
+        self.assertIs(columns.column('title')[0], columns.column('title')[1])
+        self.assertIs(columns.column('title')[0], waiver.title)
+        self.assertIs(columns.column('tags')[0][0], waiver.tags[0])
+
+    def test_templates(self):
+
+        pool = smartwaiver.interning.SmartwaiverStringPool()
+        sw = self.client(pool, MockResponse(200, factory.api_response_templates(3)))
+
+        templates = sw.get_waiver_templates()
+
+        self.assertIs(templates[0].title, templates[2].title)
+
+    def test_without_pool(self):
+
+        sw = self.client(None, MockResponse(200, factory.api_response_waivers(2)))
+
+        summaries = sw.get_waiver_summaries(2)
+
+        self.assertIsNone(sw.string_pool)
+        self.assertEqual(summaries[0].template_id, summaries[1].template_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
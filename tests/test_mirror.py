@@ -0,0 +1,185 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import sys
+sys.path.insert(0, '../')
+
+import smartwaiver
+import factory
+from test_smartwaiver import MockResponse
+
+
+def make_waiver(waiver_id, created_on, **fields):
+    data = factory.waiver()
+    data['waiverId'] = waiver_id
+    data['createdOn'] = created_on
+    data.update(fields)
+    return smartwaiver.types.SmartwaiverWaiver(data)
+
+
+def make_summary(waiver_id, created_on, **fields):
+    data = factory.waiver_summary()
+    data['waiverId'] = waiver_id
+    data['createdOn'] = created_on
+    data.update(fields)
+    return smartwaiver.types.SmartwaiverWaiverSummary(data)
+
+
+class SmartwaiverMirrorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mirror = smartwaiver.mirror.SmartwaiverMirror(':memory:')
+
+    def tearDown(self):
+        self.mirror.close()
+
+    def test_round_trip(self):
+
+        self.mirror.add(smartwaiver.types.SmartwaiverWaiver(factory.waiver()))
+        waiver = self.mirror.get_waiver('6jebdfxzvrdkd')
+
+        self.assertIs(type(waiver), smartwaiver.types.SmartwaiverWaiver)
+        self.assertEqual('sprswrvh2keeh', waiver.template_id)
+        self.assertEqual(['Green Team'], waiver.tags)
+        self.assertIs(False, waiver.expired)
+        self.assertIs(True, waiver.verified)
+        self.assertEqual('kyle@example.com', waiver.email)
+        self.assertEqual('97703', waiver.address_zip)
+
+        self.assertEqual(1, len(waiver.participants))
+        participant = waiver.participants[0]
+        self.assertEqual('Smith', participant.last_name)
+        self.assertEqual(['Beginner'], participant.tags)
+        self.assertEqual('A friend', participant.custom_participant_fields['w5qe9kkh3bxpe'].value)
+
+        self.assertEqual('How did you hear about this company?',
+                         waiver.custom_waiver_fields['zrmgxh4ft8sqh'].display_text)
+        self.assertEqual('Mother', waiver.guardian.relationship)
+
+    def test_pdf_not_fetched(self):
+
+        session = mock.Mock()
+        session.request.side_effect = [MockResponse(200, factory.api_response_waiver())]
+        sw = smartwaiver.Smartwaiver('TestApiKey', session=session)
+
+        waiver = sw.get_waiver('6jebdfxzvrdkd')
+        self.mirror.add(waiver)
+
+        self.assertEqual(1, session.request.call_count)
+        self.assertFalse(waiver.pdf_loaded)
+        self.assertEqual('', self.mirror.get_waiver('6jebdfxzvrdkd').pdf)
+
+    def test_no_guardian(self):
+
+        self.mirror.add(make_waiver('a', '2017-01-01 00:00:00', guardian=None, participants=[]))
+        waiver = self.mirror.get_waiver('a')
+
+        self.assertIsNone(waiver.guardian)
+        self.assertEqual([], waiver.participants)
+
+    def test_replace(self):
+
+        self.mirror.add(make_waiver('a', '2017-01-01 00:00:00'))
+        self.mirror.add(make_waiver('a', '2017-01-01 00:00:00', email='new@example.com', participants=[]))
+
+        waiver = self.mirror.get_waiver('a')
+        self.assertEqual('new@example.com', waiver.email)
+        self.assertEqual([], waiver.participants)
+        self.assertEqual(1, self.mirror.count())
+
+    def test_summaries(self):
+
+        self.mirror.add(make_summary('a', '2017-01-01 00:00:00'))
+
+        self.assertIsNone(self.mirror.get_waiver('a'))
+        self.assertIs(type(self.mirror.get_waiver_summary('a')), smartwaiver.types.SmartwaiverWaiverSummary)
+
+        # A summary does not overwrite the details of a full waiver
+        self.mirror.add(make_waiver('a', '2017-01-01 00:00:00'))
+        self.mirror.add(make_summary('a', '2017-01-01 00:00:00', title='Renamed'))
+
+        waiver = self.mirror.get_waiver('a')
+        self.assertEqual('Renamed', waiver.title)
+        self.assertEqual('kyle@example.com', waiver.email)
+
+    def test_find(self):
+
+        self.mirror.add_all([
+            make_waiver('a', '2017-01-01 00:00:00', templateId='t1', email='A@example.com', lastName='Jones'),
+            make_waiver('b', '2017-01-02 00:00:00', templateId='t1', expirationDate='2018-01-01'),
+            make_waiver('c', '2017-01-03 00:00:00', templateId='t2', verified=False),
+            make_summary('d', '2017-01-04 00:00:00', templateId='t1'),
+        ])
+
+        def ids(waivers):
+            return [waiver.waiver_id for waiver in waivers]
+
+        self.assertEqual(['c', 'b', 'a'], ids(self.mirror.find_waivers()))
+        self.assertEqual(['d', 'c', 'b', 'a'], ids(self.mirror.find_waiver_summaries()))
+        self.assertEqual(['b', 'a'], ids(self.mirror.find_waivers(template_id='t1')))
+        self.assertEqual(['d', 'b'], ids(self.mirror.find_waiver_summaries(template_id='t1', limit=2)))
+        self.assertEqual(['a'], ids(self.mirror.find_waivers(email='a@EXAMPLE.com')))
+        self.assertEqual(['b', 'a'], ids(self.mirror.find_waivers(from_dts='2017-01-01 00:00:00',
+                                                                  to_dts='2017-01-02 00:00:00')))
+        self.assertEqual(['b'], ids(self.mirror.find_waivers(expires_to='2018-06-01')))
+        self.assertEqual([], ids(self.mirror.find_waivers(expires_from='2018-06-01')))
+        self.assertEqual(['c'], ids(self.mirror.find_waivers(verified=False)))
+
+        # The signer of 'a' is Jones, but its participant is Smith
+        self.assertEqual(['a'], ids(self.mirror.find_waivers(last_name='jones')))
+        self.assertEqual(['c', 'b', 'a'], ids(self.mirror.find_waivers(last_name='smith')))
+
+    def test_expiration_indexed(self):
+
+        for bounds in ({'expires_from': '2018-01-01'}, {'expires_to': '2018-01-01'}):
+            sql, params = self.mirror._where(None, None, None, None, None, bounds.get('expires_from'),
+                                             bounds.get('expires_to'), None, 10, ['full = 1'])
+            plan = [row[3] for row in self.mirror._connection.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+
+            self.assertTrue(any(step.startswith('SEARCH waivers USING INDEX waivers_expiration_date')
+                                for step in plan), plan)
+
+    def test_remove(self):
+
+        self.mirror.add(make_waiver('a', '2017-01-01 00:00:00'))
+        self.mirror.remove('a')
+
+        self.assertIsNone(self.mirror.get_waiver_summary('a'))
+        self.assertEqual([], self.mirror.find_waivers(last_name='Smith'))
+
+    def test_wrong_type(self):
+
+        with self.assertRaises(TypeError):
+            self.mirror.add(smartwaiver.types.SmartwaiverTemplate(factory.template()))
+
+    def test_file(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'mirror.db')
+
+            with smartwaiver.mirror.SmartwaiverMirror(path) as mirror:
+                mirror.add(make_waiver('a', '2017-01-01 00:00:00'))
+
+            with smartwaiver.mirror.SmartwaiverMirror(path) as mirror:
+                self.assertEqual('a', mirror.get_waiver('a').waiver_id)
+                self.assertEqual(path, mirror.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
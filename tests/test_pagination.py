@@ -0,0 +1,260 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from datetime import datetime, timedelta
+import json
+import unittest
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import sys
+sys.path.insert(0, '../')
+
+import smartwaiver
+import factory
+from test_smartwaiver import MockResponse
+
+
+class MockWaiverServer:
+    """Answers waiver summary queries the way the API does: the most recent
+    waivers between fromDts and toDts (inclusive), up to the limit.
+    """
+
+    def __init__(self, created_on):
+        self.requests = []
+        self.waiver_requests = []
+        self.waivers = []
+        for i, created in enumerate(created_on):
+            summary = factory.waiver_summary()
+            summary['waiverId'] = 'waiver' + str(i)
+            summary['createdOn'] = created
+            self.waivers.append(summary)
+
+    def request(self, method, url, **kwargs):
+        path = urlparse(url).path
+        if path != '/v4/waivers':
+            return self.waiver(path.rsplit('/', 1)[-1])
+
+        params = {key: value[0] for key, value in parse_qs(urlparse(url).query).items()}
+        self.requests.append(params)
+
+        matching = [waiver for waiver in self.waivers
+                    if params.get('fromDts', '') <= waiver['createdOn'] and
+                    ('toDts' not in params or waiver['createdOn'] <= params['toDts'])]
+        matching.sort(key=lambda waiver: waiver['createdOn'], reverse=True)
+
+        response = factory.api_response_base()
+        response['type'] = 'waivers'
+        response['waivers'] = matching[:int(params['limit'])]
+        return MockResponse(200, json.dumps(response))
+
+    def waiver(self, waiver_id):
+        self.waiver_requests.append(waiver_id)
+        for summary in self.waivers:
+            if summary['waiverId'] == waiver_id:
+                response = factory.api_response_base()
+                response['type'] = 'waiver'
+                response['waiver'] = factory.waiver()
+                response['waiver']['waiverId'] = waiver_id
+                response['waiver']['createdOn'] = summary['createdOn']
+                return MockResponse(200, json.dumps(response))
+        return MockResponse(404, factory.api_response_not_found_error())
+
+    def client(self):
+        session = mock.Mock()
+        session.request.side_effect = self.request
+        return smartwaiver.Smartwaiver('TestApiKey', session=session)
+
+
+def timestamps(count, per_second, start=datetime(2017, 1, 1)):
+    return [smartwaiver.pagination.format_dts(start + timedelta(seconds=i // per_second)) for i in range(count)]
+
+
+class SmartwaiverSummaryPagerTest(unittest.TestCase):
+
+    def test_page_size(self):
+
+        with self.assertRaises(ValueError):
+            smartwaiver.pagination.SmartwaiverSummaryPager(page_size=101)
+
+        with self.assertRaises(ValueError):
+            smartwaiver.pagination.SmartwaiverSummaryPager(page_size=0)
+
+    def test_parse_dts(self):
+
+        self.assertEqual(datetime(2017, 1, 24, 13, 12, 29), smartwaiver.pagination.parse_dts('2017-01-24 13:12:29'))
+        self.assertEqual(datetime(2017, 1, 24, 13, 12, 29), smartwaiver.pagination.parse_dts('2017-01-24T13:12:29'))
+        self.assertEqual('2017-01-24 13:12:29', smartwaiver.pagination.format_dts(datetime(2017, 1, 24, 13, 12, 29)))
+
+
+class SmartwaiverShardTest(unittest.TestCase):
+
+    def test_split_range(self):
+
+        shards = smartwaiver.pagination.split_range('2017-01-01 00:00:00', '2017-01-01 00:00:09', 3)
+
+        self.assertEqual([('2017-01-01 00:00:00', '2017-01-01 00:00:02'),
+                          ('2017-01-01 00:00:03', '2017-01-01 00:00:05'),
+                          ('2017-01-01 00:00:06', '2017-01-01 00:00:09')], shards)
+
+    def test_split_range_short(self):
+
+        shards = smartwaiver.pagination.split_range('2017-01-01T00:00:00', '2017-01-01T00:00:01', 8)
+
+        self.assertEqual([('2017-01-01 00:00:00', '2017-01-01 00:00:00'),
+                          ('2017-01-01 00:00:01', '2017-01-01 00:00:01')], shards)
+
+    def test_split_range_invalid(self):
+
+        with self.assertRaises(ValueError):
+            smartwaiver.pagination.split_range('2017-01-02 00:00:00', '2017-01-01 00:00:00', 2)
+
+        with self.assertRaises(ValueError):
+            smartwaiver.pagination.split_range('2017-01-01 00:00:00', '2017-01-02 00:00:00', 0)
+
+    def test_split_full_page(self):
+
+        server = MockWaiverServer(timestamps(10, 1, datetime(2017, 1, 1, 0, 0, 10)))
+        page = [smartwaiver.types.SmartwaiverWaiverSummary(waiver) for waiver in server.waivers]
+
+        self.assertEqual([], smartwaiver.pagination.split_full_page('2017-01-01 00:00:00', page, 11))
+        self.assertEqual([('2017-01-01 00:00:00', '2017-01-01 00:00:05'),
+                          ('2017-01-01 00:00:06', '2017-01-01 00:00:10')],
+                         smartwaiver.pagination.split_full_page('2017-01-01 00:00:00', page, 10))
+
+        with self.assertWarns(UserWarning):
+            self.assertEqual([], smartwaiver.pagination.split_full_page('2017-01-01 00:00:10', page, 10))
+
+
+class SmartwaiverBackfillTest(unittest.TestCase):
+
+    def test_backfill(self):
+
+        server = MockWaiverServer(timestamps(1000, 3))
+        summaries = server.client().backfill_waiver_summaries('2017-01-01 00:00:00', '2017-01-02 00:00:00',
+                                                              shards=4, max_workers=4)
+
+        self.assertEqual(sorted(waiver['waiverId'] for waiver in server.waivers),
+                         sorted(summary.waiver_id for summary in summaries))
+        self.assertEqual(sorted(s.created_on for s in summaries), [s.created_on for s in summaries])
+
+        # Shards that came back full were split again
+        self.assertTrue(len(server.requests) > 10)
+        for params in server.requests:
+            self.assertEqual('100', params['limit'])
+
+    def test_backfill_range(self):
+
+        server = MockWaiverServer(timestamps(500, 1))
+        summaries = server.client().backfill_waiver_summaries('2017-01-01 00:01:00', '2017-01-01 00:03:19',
+                                                              shards=3)
+
+        self.assertEqual(140, len(summaries))
+        self.assertEqual('2017-01-01 00:01:00', summaries[0].created_on)
+        self.assertEqual('2017-01-01 00:03:19', summaries[-1].created_on)
+
+    def test_backfill_columnar(self):
+
+        server = MockWaiverServer(timestamps(1000, 3))
+        summaries = server.client().backfill_waiver_summaries('2017-01-01 00:00:00', '2017-01-02 00:00:00',
+                                                              shards=4, max_workers=4)
+        columns = server.client().backfill_waiver_summaries('2017-01-01 00:00:00', '2017-01-02 00:00:00',
+                                                            shards=4, max_workers=4, columnar=True)
+
+        self.assertIs(type(columns), smartwaiver.columnar.SmartwaiverSummaryColumns)
+        self.assertEqual(1000, len(columns))
+        self.assertEqual(1000, len(set(columns.column('waiver_id'))))
+        self.assertEqual([s.created_on for s in summaries], columns.column('created_on'))
+
+    def test_backfill_error(self):
+
+        server = MockWaiverServer(timestamps(10, 1))
+        sw = server.client()
+        sw.session.request.side_effect = smartwaiver.requests.exceptions.ConnectionError()
+
+        with self.assertRaises(smartwaiver.requests.exceptions.ConnectionError):
+            sw.backfill_waiver_summaries('2017-01-01 00:00:00', '2017-01-02 00:00:00')
+
+
+class SmartwaiverIterWaiverSummariesTest(unittest.TestCase):
+
+    def test_all_pages(self):
+
+        server = MockWaiverServer(timestamps(350, 1))
+        summaries = list(server.client().iter_waiver_summaries())
+
+        self.assertEqual(350, len(summaries))
+        self.assertEqual(350, len(set(summary.waiver_id for summary in summaries)))
+        self.assertEqual(sorted([s.created_on for s in summaries], reverse=True), [s.created_on for s in summaries])
+        for summary in summaries:
+            self.assertIs(type(summary), smartwaiver.types.SmartwaiverWaiverSummary)
+
+        self.assertEqual(4, len(server.requests))
+        self.assertEqual({'limit': '100'}, server.requests[0])
+        self.assertEqual(smartwaiver.pagination.EARLIEST_DTS, server.requests[1]['fromDts'])
+
+    def test_shared_timestamps(self):
+
+        server = MockWaiverServer(timestamps(500, 7))
+        summaries = list(server.client().iter_waiver_summaries(page_size=20))
+
+        self.assertEqual(sorted(waiver['waiverId'] for waiver in server.waivers),
+                         sorted(summary.waiver_id for summary in summaries))
+
+    def test_date_range(self):
+
+        server = MockWaiverServer(timestamps(300, 2))
+        summaries = list(server.client().iter_waiver_summaries(from_dts='2017-01-01 00:00:10',
+                                                               to_dts='2017-01-01 00:01:00', page_size=25))
+
+        self.assertEqual(102, len(summaries))
+        self.assertEqual('2017-01-01 00:01:00', summaries[0].created_on)
+        self.assertEqual('2017-01-01 00:00:10', summaries[-1].created_on)
+        for params in server.requests:
+            self.assertEqual('2017-01-01 00:00:10', params['fromDts'])
+
+    def test_too_many_at_one_timestamp(self):
+
+        server = MockWaiverServer(timestamps(10, 1) + timestamps(30, 30, datetime(2017, 1, 2)))
+
+        with self.assertWarns(UserWarning):
+            summaries = list(server.client().iter_waiver_summaries(page_size=20))
+
+        self.assertEqual(30, len(summaries))
+        self.assertEqual(30, len(set(summary.waiver_id for summary in summaries)))
+
+    def test_columnar(self):
+
+        server = MockWaiverServer(timestamps(500, 7))
+        pages = list(server.client().iter_waiver_summaries(page_size=20, columnar=True))
+
+        waiver_ids = [waiver_id for page in pages for waiver_id in page.column('waiver_id')]
+        self.assertEqual(sorted(waiver['waiverId'] for waiver in server.waivers), sorted(waiver_ids))
+        for page in pages:
+            self.assertIs(type(page), smartwaiver.columnar.SmartwaiverSummaryColumns)
+            self.assertTrue(0 < len(page) <= 20)
+            self.assertEqual(sorted(page.column('created_on'), reverse=True), page.column('created_on'))
+
+    def test_lazy(self):
+
+        server = MockWaiverServer(timestamps(250, 1))
+        summaries = server.client().iter_waiver_summaries()
+
+        self.assertEqual(0, len(server.requests))
+        next(summaries)
+        self.assertEqual(1, len(server.requests))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,285 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import base64
+import io
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+import sys
+sys.path.insert(0, '../')
+
+import smartwaiver
+import factory
+from test_retry import MockResponse
+
+
+def api_response_waiver_pdf(pdf, escape_slashes=False):
+    response = json.loads(factory.api_response_waiver())
+    response['waiver']['pdf'] = base64.b64encode(pdf).decode('ascii')
+    # A custom field that looks like the PDF field, inside a string
+    response['waiver']['customWaiverFields']['zrmgxh4ft8sqh']['value'] = '{"pdf": "AAAA"}'
+    text = json.dumps(response)
+    return text.replace('/', '\\/') if escape_slashes else text
+
+
+class MockStreamResponse:
+
+    def __init__(self, status_code, text, chunk_size=1000):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.headers = {}
+        self.closed = False
+        self._chunk_size = chunk_size
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size):
+        body = self.text.encode('utf-8')
+        for i in range(0, len(body), self._chunk_size):
+            yield body[i:i + self._chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class SmartwaiverPdfDecoderTest(unittest.TestCase):
+
+    def decode(self, text, chunk_size):
+        out = io.BytesIO()
+        decoder = smartwaiver.pdf.SmartwaiverPdfDecoder(out)
+        body = text.encode('utf-8')
+        for i in range(0, len(body), chunk_size):
+            decoder.feed(body[i:i + chunk_size])
+        return out.getvalue(), decoder.close(), decoder
+
+    def test_chunk_sizes(self):
+
+        pdf = os.urandom(5000)
+        for escape_slashes in (False, True):
+            text = api_response_waiver_pdf(pdf, escape_slashes)
+            for chunk_size in (1, 2, 3, 5, 64, 4096, len(text)):
+                decoded, skeleton, decoder = self.decode(text, chunk_size)
+
+                self.assertEqual(pdf, decoded)
+                self.assertEqual(len(pdf), decoder.written)
+                self.assertTrue(decoder.pdf_found)
+
+                waiver = json.loads(skeleton)['waiver']
+                self.assertEqual('', waiver['pdf'])
+                self.assertEqual('{"pdf": "AAAA"}', waiver['customWaiverFields']['zrmgxh4ft8sqh']['value'])
+
+    def test_empty_pdf(self):
+
+        decoded, skeleton, decoder = self.decode(factory.api_response_waiver(), 7)
+
+        self.assertEqual(b'', decoded)
+        self.assertTrue(decoder.pdf_found)
+        self.assertEqual(json.loads(factory.api_response_waiver()), json.loads(skeleton))
+
+    def test_no_pdf(self):
+
+        decoded, skeleton, decoder = self.decode(factory.api_response_not_found_error(), 10)
+
+        self.assertFalse(decoder.pdf_found)
+        self.assertEqual(json.loads(factory.api_response_not_found_error()), json.loads(skeleton))
+
+    def test_malformed(self):
+
+        text = api_response_waiver_pdf(os.urandom(100)).replace('"pdf": "', '"pdf": "!!')
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverSDKException):
+            self.decode(text, 16)
+
+    def test_truncated(self):
+
+        text = api_response_waiver_pdf(os.urandom(100))
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverSDKException):
+            self.decode(text[:text.index('"pdf": "') + 50], 16)
+
+
+class SmartwaiverDownloadPdfTest(unittest.TestCase):
+
+    test_api_key = 'TestApiKey'
+
+    def client(self, response):
+        session = mock.Mock()
+        session.request.return_value = response
+        return smartwaiver.Smartwaiver(self.test_api_key, session=session), session
+
+    def test_download(self):
+
+        pdf = os.urandom(20000)
+        response = MockStreamResponse(200, api_response_waiver_pdf(pdf))
+        sw, session = self.client(response)
+
+        out = io.BytesIO()
+        waiver = sw.download_waiver_pdf('6jebdfxzvrdkd', out)
+
+        self.assertEqual(pdf, out.getvalue())
+        self.assertIs(type(waiver), smartwaiver.types.SmartwaiverWaiver)
+        self.assertEqual('', waiver.pdf)
+        self.assertEqual('waiver', sw.last_response.type)
+        self.assertTrue(response.closed)
+        self.assertEqual('https://api.smartwaiver.com/v4/waivers/6jebdfxzvrdkd?pdf=true', session.request.call_args[0][1])
+        self.assertTrue(session.request.call_args[1]['stream'])
+
+    @mock.patch('smartwaiver.time.sleep')
+    def test_retried_response_closed(self, sleep):
+
+        pdf = os.urandom(100)
+        failed = MockStreamResponse(503, factory.api_response_server_error())
+        session = mock.Mock()
+        session.request.side_effect = [failed, MockStreamResponse(200, api_response_waiver_pdf(pdf))]
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session,
+                                     retry_policy=smartwaiver.retry.SmartwaiverRetryPolicy())
+
+        out = io.BytesIO()
+        sw.download_waiver_pdf('6jebdfxzvrdkd', out)
+
+        self.assertEqual(pdf, out.getvalue())
+        self.assertTrue(failed.closed)
+        self.assertEqual(1, sleep.call_count)
+
+    def test_read_timeout_mid_body(self):
+
+        response = MockStreamResponse(200, api_response_waiver_pdf(os.urandom(20000)))
+        response.iter_content = mock.Mock(side_effect=smartwaiver.requests.exceptions.ConnectionError(
+            smartwaiver.urllib3.exceptions.ReadTimeoutError(None, None, 'Read timed out.')))
+        sw, session = self.client(response)
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverTimeoutException) as cm:
+            sw.download_waiver_pdf('6jebdfxzvrdkd', io.BytesIO())
+
+        self.assertEqual(60, cm.exception.timeout)
+        self.assertTrue(response.closed)
+
+    def test_error(self):
+
+        sw, session = self.client(MockStreamResponse(404, factory.api_response_not_found_error()))
+
+        out = io.BytesIO()
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverHTTPException):
+            sw.download_waiver_pdf('6jebdfxzvrdkd', out)
+
+        self.assertEqual(b'', out.getvalue())
+
+    def test_missing_pdf(self):
+
+        response = json.loads(factory.api_response_waiver())
+        del response['waiver']['pdf']
+        sw, session = self.client(MockStreamResponse(200, json.dumps(response)))
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverSDKException):
+            sw.download_waiver_pdf('6jebdfxzvrdkd', io.BytesIO())
+
+
+class SmartwaiverDeferredPdfTest(unittest.TestCase):
+
+    test_api_key = 'TestApiKey'
+
+    def client(self, *responses, **kwargs):
+        session = mock.Mock()
+        session.request.side_effect = list(responses)
+        return smartwaiver.Smartwaiver(self.test_api_key, session=session, **kwargs), session
+
+    def test_fetched_on_first_use(self):
+
+        pdf = os.urandom(1000)
+        sw, session = self.client(MockResponse(200, factory.api_response_waiver()),
+                                  MockResponse(200, api_response_waiver_pdf(pdf)))
+
+        waiver = sw.get_waiver('6jebdfxzvrdkd')
+        self.assertFalse(waiver.pdf_loaded)
+        self.assertEqual(1, session.request.call_count)
+
+        self.assertEqual(pdf, waiver.pdf_bytes)
+        self.assertEqual(len(pdf), waiver.pdf_size)
+        self.assertEqual(base64.b64encode(pdf).decode('ascii'), waiver.pdf)
+        self.assertTrue(waiver.pdf_loaded)
+        self.assertEqual(2, session.request.call_count)
+        self.assertEqual('https://api.smartwaiver.com/v4/waivers/6jebdfxzvrdkd?pdf=true',
+                         session.request.call_args[0][1])
+
+    def test_last_response_kept(self):
+
+        sw, session = self.client(MockResponse(200, factory.api_response_waiver()),
+                                  MockResponse(200, factory.api_response_templates(1)),
+                                  MockResponse(200, api_response_waiver_pdf(os.urandom(100))))
+
+        waiver = sw.get_waiver('6jebdfxzvrdkd')
+        sw.get_waiver_templates()
+        waiver.pdf_bytes
+
+        self.assertEqual(3, session.request.call_count)
+        self.assertEqual('templates', sw.last_response.type)
+
+    def test_pickle(self):
+
+        for lazy in (False, True):
+            sw, session = self.client(MockResponse(200, factory.api_response_waiver()), lazy=lazy)
+            waiver = pickle.loads(pickle.dumps(sw.get_waiver('6jebdfxzvrdkd')))
+
+            self.assertEqual(factory.waiver()['waiverId'], waiver.waiver_id)
+            self.assertEqual('Kyle', waiver.participants[0].first_name)
+            self.assertTrue(waiver.pdf_loaded)
+            self.assertEqual('', waiver.pdf)
+            self.assertEqual(1, session.request.call_count)
+
+    def test_requested_up_front(self):
+
+        sw, session = self.client(MockResponse(200, factory.api_response_waiver()))
+
+        waiver = sw.get_waiver('6jebdfxzvrdkd', pdf=True)
+
+        self.assertTrue(waiver.pdf_loaded)
+        self.assertEqual('', waiver.pdf)
+        self.assertEqual(1, session.request.call_count)
+
+    def test_error_retried_on_next_use(self):
+
+        pdf = os.urandom(100)
+        sw, session = self.client(MockResponse(200, factory.api_response_waiver()),
+                                  MockResponse(404, factory.api_response_not_found_error()),
+                                  MockResponse(200, api_response_waiver_pdf(pdf)))
+
+        waiver = sw.get_waiver('6jebdfxzvrdkd')
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverHTTPException):
+            waiver.pdf_bytes
+
+        self.assertFalse(waiver.pdf_loaded)
+        self.assertEqual(pdf, waiver.pdf_bytes)
+
+    def test_waiver_cache(self):
+
+        pdf = os.urandom(100)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = smartwaiver.cache.SmartwaiverWaiverCache(directory)
+            sw, session = self.client(MockResponse(200, factory.api_response_waiver()),
+                                      MockResponse(200, api_response_waiver_pdf(pdf)), waiver_cache=cache)
+
+            self.assertEqual(pdf, sw.get_waiver('6jebdfxzvrdkd').pdf_bytes)
+            self.assertEqual(pdf, sw.get_waiver('6jebdfxzvrdkd').pdf_bytes)
+            self.assertEqual(2, session.request.call_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
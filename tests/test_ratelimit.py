@@ -0,0 +1,204 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import multiprocessing
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import sys
+sys.path.insert(0, '../')
+
+import smartwaiver
+import factory
+from test_smartwaiver import MockResponse
+
+
+def reserve_from_file(path, count, queue):
+    limiter = smartwaiver.ratelimit.SmartwaiverFileRateLimiter(path, rate=10, burst=5)
+    queue.put([limiter.reserve() for _ in range(count)])
+    limiter.close()
+
+
+class SmartwaiverRateLimiterTest(unittest.TestCase):
+
+    def test_invalid(self):
+
+        with self.assertRaises(ValueError):
+            smartwaiver.ratelimit.SmartwaiverRateLimiter(0)
+
+        with self.assertRaises(ValueError):
+            smartwaiver.ratelimit.SmartwaiverRateLimiter(5, burst=0.5)
+
+    @mock.patch('smartwaiver.ratelimit.time.monotonic', mock.Mock(return_value=100.0))
+    def test_burst_then_spaced(self):
+
+        limiter = smartwaiver.ratelimit.SmartwaiverRateLimiter(rate=10, burst=3)
+
+        delays = [limiter.reserve() for _ in range(6)]
+
+        self.assertEqual([0, 0, 0], delays[:3])
+        for expected, delay in zip([0.1, 0.2, 0.3], delays[3:]):
+            self.assertAlmostEqual(expected, delay)
+        self.assertAlmostEqual(0.6, limiter.wait_time)
+
+    def test_refill(self):
+
+        with mock.patch('smartwaiver.ratelimit.time.monotonic') as monotonic:
+            monotonic.return_value = 100.0
+            limiter = smartwaiver.ratelimit.SmartwaiverRateLimiter(rate=2, burst=1)
+
+            self.assertEqual(0, limiter.reserve())
+            self.assertAlmostEqual(0.5, limiter.reserve())
+
+            # Refill never goes over the burst size
+            monotonic.return_value = 200.0
+            self.assertEqual(0, limiter.reserve())
+            self.assertAlmostEqual(0.5, limiter.reserve())
+
+    @mock.patch('smartwaiver.ratelimit.time.monotonic', mock.Mock(return_value=100.0))
+    def test_threads(self):
+
+        limiter = smartwaiver.ratelimit.SmartwaiverRateLimiter(rate=100, burst=10)
+        delays = []
+
+        def worker():
+            for _ in range(25):
+                delays.append(limiter.reserve())
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Every reservation gets its own slot in the schedule
+        self.assertEqual(10, delays.count(0))
+        self.assertAlmostEqual(0.9, max(delays))
+        self.assertEqual(91, len(set(round(delay, 6) for delay in delays)))
+
+    @mock.patch('smartwaiver.ratelimit.time.sleep')
+    def test_client(self, sleep):
+
+        session = mock.Mock()
+        session.request.return_value = MockResponse(200, factory.api_response_templates(1))
+        limiter = smartwaiver.ratelimit.SmartwaiverRateLimiter(rate=1, burst=1)
+
+        sw = smartwaiver.Smartwaiver('TestApiKey', session=session, rate_limiter=limiter)
+        sw.get_waiver_templates()
+        sw.get_waiver_templates()
+
+        self.assertEqual(1, sleep.call_count)
+        self.assertEqual(2, session.request.call_count)
+
+    @mock.patch('smartwaiver.ratelimit.time.sleep')
+    @mock.patch('smartwaiver.ratelimit.time.monotonic', mock.Mock(return_value=100.0))
+    def test_acquire_timeout(self, sleep):
+
+        limiter = smartwaiver.ratelimit.SmartwaiverRateLimiter(rate=1, burst=1)
+
+        self.assertEqual(0, limiter.acquire(timeout=0.5))
+        self.assertIsNone(limiter.acquire(timeout=0.5))
+        self.assertEqual(0, sleep.call_count)
+        self.assertEqual(0, limiter.wait_time)
+
+        # The token given back is the next one handed out
+        self.assertEqual(1, limiter.acquire(timeout=1))
+        sleep.assert_called_once_with(1)
+
+    @mock.patch('smartwaiver.ratelimit.time.sleep')
+    def test_client_deadline(self, sleep):
+
+        session = mock.Mock()
+        session.request.return_value = MockResponse(200, factory.api_response_templates(1))
+        limiter = smartwaiver.ratelimit.SmartwaiverRateLimiter(rate=0.1, burst=1)
+
+        sw = smartwaiver.Smartwaiver('TestApiKey', session=session, rate_limiter=limiter, deadline=5)
+        sw.get_waiver_templates()
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverTimeoutException) as cm:
+            sw.get_waiver_templates()
+
+        self.assertEqual(5, cm.exception.timeout)
+        self.assertEqual(0, sleep.call_count)
+        self.assertEqual(1, session.request.call_count)
+
+
+    @mock.patch('smartwaiver.time.sleep')
+    def test_client_deadline_not_retried(self, sleep):
+
+        session = mock.Mock()
+        limiter = smartwaiver.ratelimit.SmartwaiverRateLimiter(rate=0.5, burst=1)
+        limiter.acquire()
+        policy = smartwaiver.retry.SmartwaiverRetryPolicy(max_attempts=5)
+
+        sw = smartwaiver.Smartwaiver('TestApiKey', session=session, rate_limiter=limiter, retry_policy=policy,
+                                     deadline=1.0)
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverTimeoutException):
+            sw.get_waiver_templates()
+
+        self.assertEqual(0, session.request.call_count)
+        self.assertEqual(0, sw.retry_stats.retries)
+        self.assertEqual(0, sw.retry_stats.exhausted)
+        self.assertEqual(0, sleep.call_count)
+
+@unittest.skipIf(smartwaiver.ratelimit.fcntl is None, 'fcntl is not available')
+class SmartwaiverFileRateLimiterTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    @mock.patch('smartwaiver.ratelimit.time.time', mock.Mock(return_value=1000.0))
+    def test_shared_state(self):
+
+        first = smartwaiver.ratelimit.SmartwaiverFileRateLimiter(self.path, rate=10, burst=2)
+        second = smartwaiver.ratelimit.SmartwaiverFileRateLimiter(self.path, rate=10, burst=2)
+
+        self.assertEqual(0, first.reserve())
+        self.assertEqual(0, second.reserve())
+        self.assertAlmostEqual(0.1, first.reserve())
+        self.assertAlmostEqual(0.2, second.reserve())
+
+        # A token given back by one is seen by the other
+        second.release(0.2)
+        self.assertAlmostEqual(0.2, first.reserve())
+
+        first.close()
+        second.close()
+
+    def test_processes(self):
+
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        processes = [context.Process(target=reserve_from_file, args=(self.path, 10, queue)) for _ in range(3)]
+        for process in processes:
+            process.start()
+        delays = sorted(sum([queue.get(timeout=10) for _ in processes], []))
+        for process in processes:
+            process.join()
+
+        # 5 requests fit in the burst, the other 25 are spread out at 10/second
+        self.assertEqual(30, len(delays))
+        self.assertTrue(2.0 <= delays[-1] <= 2.6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import json
+import unittest
+from unittest import mock
+
+import sys
+sys.path.insert(0, '../')
+
+import requests
+
+import smartwaiver
+import factory
+
+
+class MockResponse:
+
+    def __init__(self, status_code, text, headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.headers = headers if headers is not None else {}
+        self.closed = False
+
+    def json(self):
+        return json.loads(self.text)
+
+    def close(self):
+        self.closed = True
+
+
+class SmartwaiverRetryPolicyTest(unittest.TestCase):
+
+    def test_should_retry(self):
+
+        policy = smartwaiver.retry.SmartwaiverRetryPolicy(max_attempts=3)
+
+        self.assertTrue(policy.should_retry('GET', 1, 500))
+        self.assertTrue(policy.should_retry('get', 2, 429))
+        self.assertTrue(policy.should_retry('GET', 1))
+        self.assertFalse(policy.should_retry('GET', 3, 500))
+        self.assertFalse(policy.should_retry('GET', 1, 404))
+        self.assertFalse(policy.should_retry('PUT', 1, 500))
+
+    def test_retry_methods(self):
+
+        policy = smartwaiver.retry.SmartwaiverRetryPolicy(retry_methods=('GET', 'PUT'), retry_connection_errors=False)
+
+        self.assertTrue(policy.should_retry('PUT', 1, 503))
+        self.assertFalse(policy.should_retry('PUT', 1))
+
+    def test_invalid_attempts(self):
+
+        with self.assertRaises(ValueError):
+            smartwaiver.retry.SmartwaiverRetryPolicy(max_attempts=0)
+
+    def test_backoff_jitter(self):
+
+        policy = smartwaiver.retry.SmartwaiverRetryPolicy(backoff_base=1, backoff_cap=5)
+
+        for _ in range(100):
+            self.assertTrue(0 <= policy.backoff(1) <= 1)
+            self.assertTrue(0 <= policy.backoff(3) <= 4)
+            self.assertTrue(0 <= policy.backoff(10) <= 5)
+
+    def test_backoff_retry_after(self):
+
+        policy = smartwaiver.retry.SmartwaiverRetryPolicy(backoff_cap=1)
+
+        self.assertEqual(7, policy.backoff(1, '7'))
+
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+        self.assertTrue(50 < policy.backoff(1, format_datetime(retry_at, usegmt=True)) <= 60)
+
+    def test_backoff_retry_after_capped(self):
+
+        policy = smartwaiver.retry.SmartwaiverRetryPolicy(backoff_base=1, backoff_cap=5, max_retry_after=60)
+
+        self.assertEqual(60, policy.backoff(1, '86400'))
+
+        retry_at = datetime.now(timezone.utc) + timedelta(days=1)
+        self.assertEqual(60, policy.backoff(1, format_datetime(retry_at, usegmt=True)))
+
+        # A wait that is not a finite number falls back to the usual backoff
+        for value in ['inf', '-inf', 'nan']:
+            self.assertTrue(0 <= policy.backoff(1, value) <= 1)
+
+    def test_parse_retry_after(self):
+
+        self.assertIsNone(smartwaiver.retry.parse_retry_after(None))
+        self.assertIsNone(smartwaiver.retry.parse_retry_after('soon'))
+        self.assertEqual(0, smartwaiver.retry.parse_retry_after('-3'))
+        self.assertIsNone(smartwaiver.retry.parse_retry_after('inf'))
+        self.assertIsNone(smartwaiver.retry.parse_retry_after('NaN'))
+        self.assertEqual(0, smartwaiver.retry.parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'))
+
+
+@mock.patch('smartwaiver.time.sleep')
+class SmartwaiverRetryTest(unittest.TestCase):
+
+    test_api_key = 'TestApiKey'
+
+    def client(self, *responses, **kwargs):
+        session = mock.Mock()
+        session.request.side_effect = list(responses)
+        policy = smartwaiver.retry.SmartwaiverRetryPolicy(**kwargs)
+        return smartwaiver.Smartwaiver(self.test_api_key, session=session, retry_policy=policy), session
+
+    def test_retry_then_success(self, sleep):
+
+        sw, session = self.client(MockResponse(500, factory.api_response_server_error()),
+                                  MockResponse(429, factory.api_response_server_error(), {'Retry-After': '2'}),
+                                  MockResponse(200, factory.api_response_template()))
+
+        template = sw.get_waiver_template('alkagaldeab')
+
+        self.assertIs(type(template), smartwaiver.types.SmartwaiverTemplate)
+        self.assertEqual(3, session.request.call_count)
+        self.assertEqual(2, sw.retry_stats.retries)
+        self.assertEqual(0, sw.retry_stats.exhausted)
+        self.assertEqual(2, sleep.call_count)
+        self.assertEqual(mock.call(2.0), sleep.call_args)
+        self.assertTrue(2 <= sw.retry_stats.retry_time <= 2.5)
+
+    def test_retry_after_bounded(self, sleep):
+
+        sw, session = self.client(MockResponse(429, factory.api_response_server_error(), {'Retry-After': 'inf'}),
+                                  MockResponse(429, factory.api_response_server_error(), {'Retry-After': '86400'}),
+                                  MockResponse(200, factory.api_response_template()),
+                                  backoff_base=1, max_retry_after=60)
+
+        sw.get_waiver_template('alkagaldeab')
+
+        self.assertTrue(0 <= sleep.call_args_list[0][0][0] <= 1)
+        self.assertEqual(mock.call(60), sleep.call_args_list[1])
+
+    def test_retry_exhausted(self, sleep):
+
+        sw, session = self.client(*[MockResponse(500, factory.api_response_server_error())] * 2, max_attempts=2)
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverHTTPException) as cm:
+            sw.get_waiver('6jebdfxzvrdkd')
+
+        self.assertEqual(500, cm.exception.status_code)
+        self.assertEqual(2, session.request.call_count)
+        self.assertEqual(1, sw.retry_stats.retries)
+        self.assertEqual(1, sw.retry_stats.exhausted)
+
+    def test_connection_error(self, sleep):
+
+        sw, session = self.client(requests.exceptions.ConnectionError(),
+                                  MockResponse(200, factory.api_response_templates(2)))
+
+        self.assertEqual(2, len(sw.get_waiver_templates()))
+        self.assertEqual(1, sw.retry_stats.retries)
+
+    def test_put_not_retried(self, sleep):
+
+        sw, session = self.client(MockResponse(500, factory.api_response_server_error()))
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverHTTPException):
+            sw.set_webhook_config('http://endpoint.example.org', 'both')
+
+        self.assertEqual(1, session.request.call_count)
+        self.assertEqual(0, sw.retry_stats.retries)
+        sleep.assert_not_called()
+
+    def test_client_error_not_retried(self, sleep):
+
+        sw, session = self.client(MockResponse(404, factory.api_response_not_found_error()))
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverHTTPException):
+            sw.get_waiver('6jebdfxzvrdkd')
+
+        self.assertEqual(1, session.request.call_count)
+        self.assertEqual(0, sw.retry_stats.exhausted)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,8 +12,11 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from concurrent.futures import ThreadPoolExecutor
 import json
 from platform import python_version
+import random
+import time
 from urllib.parse import urlencode
 import unittest
 from unittest import mock
@@ -34,11 +37,22 @@ class MockResponse:
     def __init__(self, status_code, text):
         self.status_code = status_code
         self.text = text
+        self.content = text.encode('utf-8')
 
     def json(self):
         return json.loads(self.text)
 
 
+def mock_request_responses(*args, **kwargs):
+
+    if args[0] == 'GET':
+        return mock_get_responses(*args[1:], **kwargs)
+    elif args[0] == 'PUT':
+        return mock_put_responses(*args[1:], **kwargs)
+    else:
+        raise Exception('Unexpected HTTP method: ' + args[0])
+
+
 def mock_get_responses(*args, **kwargs):
 
     if kwargs['headers'] != headers:
@@ -89,8 +103,7 @@ def mock_put_responses(*args, **kwargs):
         raise Exception('Unexpected PUT URL: ' + args[0])
 
 
-@mock.patch('smartwaiver.requests.get', mock.Mock(side_effect=mock_get_responses))
-@mock.patch('smartwaiver.requests.put', mock.Mock(side_effect=mock_put_responses))
+@mock.patch('smartwaiver.requests.Session.request', mock.Mock(side_effect=mock_request_responses))
 class SmartwaiverTest(unittest.TestCase):
 
     test_api_key = 'TestApiKey'
@@ -140,6 +153,19 @@ class SmartwaiverTest(unittest.TestCase):
         waiver = sw.get_waiver('6jebdfxzvrdkd', pdf=True)
         self.assertIs(type(waiver), smartwaiver.types.SmartwaiverWaiver)
 
+    def test_lazy(self):
+
+        sw = smartwaiver.Smartwaiver(self.test_api_key, lazy=True)
+
+        waiver = sw.get_waiver('6jebdfxzvrdkd')
+        self.assertEqual('6jebdfxzvrdkd', waiver.waiver_id)
+        self.assertEqual('waiver', waiver.response_metadata.type)
+        self.assertEqual('Smith', waiver.participants[0].last_name)
+
+        summaries = sw.get_waiver_summaries()
+        self.assertEqual(3, len(summaries))
+        self.assertEqual('Kyle', summaries[0].first_name)
+
     def test_get_webhook_config(self):
 
         sw = smartwaiver.Smartwaiver(self.test_api_key)
@@ -203,6 +229,269 @@ class SmartwaiverTest(unittest.TestCase):
 
         self.assertIs(type(response), smartwaiver.responses.SmartwaiverRawResponse)
 
+    def test_session_reused(self):
+
+        sw = smartwaiver.Smartwaiver(self.test_api_key)
+        session = sw.session
+
+        sw.get_waiver_templates()
+        sw.get_waiver('6jebdfxzvrdkd')
+
+        self.assertIs(session, sw.session)
+        self.assertIsInstance(session, smartwaiver.requests.Session)
+
+    def test_pool_size(self):
+
+        sw = smartwaiver.Smartwaiver(self.test_api_key, pool_connections=3, pool_maxsize=7)
+        adapter = sw.session.get_adapter('https://api.smartwaiver.com')
+
+        self.assertEqual(3, adapter._pool_connections)
+        self.assertEqual(7, adapter._pool_maxsize)
+
+    def test_keep_alive_disabled(self):
+
+        session = mock.Mock()
+        session.request.return_value = MockResponse(200, factory.api_response_templates(3))
+
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session, keep_alive=False)
+        sw.get_waiver_templates()
+
+        self.assertEqual('close', session.request.call_args[1]['headers']['connection'])
+
+    def test_injected_session(self):
+
+        session = mock.Mock()
+        session.request.return_value = MockResponse(200, factory.api_response_templates(3))
+
+        with smartwaiver.Smartwaiver(self.test_api_key, session=session) as sw:
+            sw.get_waiver_templates()
+
+        session.request.assert_called_once_with('GET', 'https://api.smartwaiver.com/v4/templates', headers=headers,
+                                                timeout=(10.0, 60.0))
+        session.close.assert_not_called()
+
+    def test_close(self):
+
+        with mock.patch('smartwaiver.requests.Session.close') as close:
+            with smartwaiver.Smartwaiver(self.test_api_key):
+                pass
+
+        close.assert_called_once_with()
+
+
+class SmartwaiverConcurrencyTest(unittest.TestCase):
+
+    test_api_key = 'TestApiKey'
+
+    @staticmethod
+    def mock_request(method, url, **kwargs):
+        # Give each response the ID of the waiver requested so callers can tell them apart
+        waiver_id = url.split('/')[-1].split('?')[0]
+        time.sleep(random.random() / 1000)
+
+        response = json.loads(factory.api_response_waiver())
+        response['id'] = waiver_id
+        response['waiver']['waiverId'] = waiver_id
+        return MockResponse(200, json.dumps(response))
+
+    def test_last_response_per_thread(self):
+
+        session = mock.Mock()
+        session.request.side_effect = self.mock_request
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session)
+
+        def fetch(waiver_id):
+            waiver = sw.get_waiver(waiver_id)
+            time.sleep(random.random() / 1000)
+            return waiver, sw.last_response
+
+        waiver_ids = ['waiver' + str(i) for i in range(500)]
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(fetch, waiver_ids))
+
+        for waiver_id, (waiver, last_response) in zip(waiver_ids, results):
+            self.assertEqual(waiver_id, waiver.waiver_id)
+            self.assertEqual(waiver_id, waiver.response_metadata.id)
+            self.assertEqual(waiver_id, last_response.id)
+            self.assertIs(waiver.response_metadata, last_response.metadata)
+
+        self.assertIsNone(sw.last_response)
+
+    def test_response_metadata(self):
+
+        session = mock.Mock()
+        session.request.return_value = MockResponse(200, factory.api_response_waivers(3))
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session)
+
+        summaries = sw.get_waiver_summaries()
+        metadata = summaries[0].response_metadata
+
+        self.assertEqual(4, metadata.version)
+        self.assertEqual('a0256461ca244278b412ab3238f5efd2', metadata.id)
+        self.assertEqual('2017-01-23T09:15:45.645Z', metadata.ts)
+        self.assertEqual('waivers', metadata.type)
+        self.assertEqual(200, metadata.status_code)
+        self.assertTrue(metadata.elapsed >= 0)
+        for summary in summaries:
+            self.assertIs(metadata, summary.response_metadata)
+
+
+class SmartwaiverBulkTest(unittest.TestCase):
+
+    test_api_key = 'TestApiKey'
+
+    def test_get_waivers(self):
+
+        session = mock.Mock()
+        session.request.side_effect = SmartwaiverConcurrencyTest.mock_request
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session)
+
+        waiver_ids = ['waiver' + str(i) for i in range(50)]
+        results = sw.get_waivers(waiver_ids, max_workers=4)
+
+        self.assertEqual(waiver_ids, [result.waiver_id for result in results])
+        for waiver_id, result in zip(waiver_ids, results):
+            self.assertTrue(result.ok)
+            self.assertIsNone(result.error)
+            self.assertEqual(waiver_id, result.waiver.waiver_id)
+
+    def test_get_waivers_pdf(self):
+
+        session = mock.Mock()
+        session.request.side_effect = SmartwaiverConcurrencyTest.mock_request
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session)
+
+        sw.get_waivers(['6jebdfxzvrdkd'], pdf=True)
+
+        self.assertEqual('https://api.smartwaiver.com/v4/waivers/6jebdfxzvrdkd?pdf=true', session.request.call_args[0][1])
+
+    def test_get_waivers_failures(self):
+
+        def mock_request(method, url, **kwargs):
+            if 'missing' in url:
+                return MockResponse(404, factory.api_response_not_found_error())
+            if 'offline' in url:
+                raise smartwaiver.requests.exceptions.ConnectionError()
+            return SmartwaiverConcurrencyTest.mock_request(method, url, **kwargs)
+
+        session = mock.Mock()
+        session.request.side_effect = mock_request
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session)
+
+        results = sw.get_waivers(['first', 'missing', 'offline', 'last'])
+
+        self.assertEqual([True, False, False, True], [result.ok for result in results])
+        self.assertIsNone(results[1].waiver)
+        self.assertIsInstance(results[1].error, smartwaiver.exceptions.SmartwaiverHTTPException)
+        self.assertEqual(404, results[1].error.status_code)
+        self.assertIsInstance(results[2].error, smartwaiver.requests.exceptions.ConnectionError)
+        self.assertEqual('last', results[3].waiver.waiver_id)
+
+    def test_get_waivers_duplicates(self):
+
+        session = mock.Mock()
+        session.request.side_effect = SmartwaiverConcurrencyTest.mock_request
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session)
+
+        results = sw.get_waivers(['a', 'b', 'a'])
+
+        self.assertEqual(['a', 'b', 'a'], [result.waiver.waiver_id for result in results])
+        self.assertEqual(2, session.request.call_count)
+        self.assertEqual([], sw.get_waivers([]))
+
+
+class SmartwaiverTimeoutTest(unittest.TestCase):
+
+    test_api_key = 'TestApiKey'
+
+    def test_timeouts_passed(self):
+
+        session = mock.Mock()
+        session.request.return_value = MockResponse(200, factory.api_response_templates(1))
+
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session, connect_timeout=2, read_timeout=None)
+        sw.get_waiver_templates()
+
+        self.assertEqual((2, None), session.request.call_args[1]['timeout'])
+
+    def test_timeout_exception(self):
+
+        session = mock.Mock()
+        session.request.side_effect = smartwaiver.requests.exceptions.ReadTimeout()
+
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session, read_timeout=5)
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverTimeoutException) as cm:
+            sw.get_waiver('6jebdfxzvrdkd')
+
+        self.assertIsInstance(cm.exception, smartwaiver.exceptions.SmartwaiverSDKException)
+        self.assertEqual(5, cm.exception.timeout)
+        self.assertTrue(cm.exception.elapsed >= 0)
+        self.assertIsNone(cm.exception.response)
+
+    def test_read_timeout_mid_body(self):
+
+        session = mock.Mock()
+        session.request.side_effect = smartwaiver.requests.exceptions.ConnectionError(
+            smartwaiver.urllib3.exceptions.ReadTimeoutError(None, None, 'Read timed out.'))
+
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session, read_timeout=5)
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverTimeoutException) as cm:
+            sw.get_waiver('6jebdfxzvrdkd')
+
+        self.assertEqual(5, cm.exception.timeout)
+        self.assertIsNone(cm.exception.response)
+
+    def test_connect_timeout_exception(self):
+
+        session = mock.Mock()
+        session.request.side_effect = smartwaiver.requests.exceptions.ConnectTimeout()
+
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session, connect_timeout=3)
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverTimeoutException) as cm:
+            sw.get_waiver_templates()
+
+        self.assertEqual(3, cm.exception.timeout)
+
+    def test_deadline_limits_timeouts(self):
+
+        session = mock.Mock()
+        session.request.return_value = MockResponse(200, factory.api_response_templates(1))
+
+        sw = smartwaiver.Smartwaiver(self.test_api_key, session=session, connect_timeout=10, read_timeout=60)
+        with sw.with_deadline(4):
+            sw.get_waiver_templates()
+
+        connect_timeout, read_timeout = session.request.call_args[1]['timeout']
+        self.assertTrue(3.5 < connect_timeout <= 4)
+        self.assertTrue(3.5 < read_timeout <= 4)
+
+        # The deadline only applies inside the with block
+        sw.get_waiver_templates()
+        self.assertEqual((10, 60), session.request.call_args[1]['timeout'])
+
+    @mock.patch('smartwaiver.time.sleep')
+    def test_deadline_bounds_retries(self, sleep):
+
+        session = mock.Mock()
+        session.request.side_effect = smartwaiver.requests.exceptions.ConnectionError()
+        policy = smartwaiver.retry.SmartwaiverRetryPolicy(max_attempts=10)
+
+        with mock.patch('smartwaiver.time.monotonic') as monotonic:
+            monotonic.side_effect = [100.0, 100.0, 100.5, 101.0, 102.0, 103.0]
+            sw = smartwaiver.Smartwaiver(self.test_api_key, session=session, retry_policy=policy, deadline=4)
+            policy.backoff = mock.Mock(return_value=1.5)
+
+            with self.assertRaises(smartwaiver.exceptions.SmartwaiverTimeoutException) as cm:
+                sw.get_waiver_templates()
+
+        self.assertEqual(4, cm.exception.timeout)
+        self.assertEqual(3.0, cm.exception.elapsed)
+        self.assertEqual(2, session.request.call_count)
+        self.assertEqual(1, sw.retry_stats.retries)
+
 
 class SmartwaiverRoutesTest(unittest.TestCase):
 
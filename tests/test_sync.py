@@ -0,0 +1,157 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from datetime import datetime
+import json
+import os
+import tempfile
+import unittest
+
+import sys
+sys.path.insert(0, '../')
+
+import smartwaiver
+from test_pagination import MockWaiverServer, timestamps
+
+
+class SmartwaiverSyncCheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'state.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_missing_file(self):
+
+        checkpoint = smartwaiver.sync.SmartwaiverSyncCheckpoint.load(self.path)
+
+        self.assertEqual('', checkpoint.created_on)
+        self.assertEqual(frozenset(), checkpoint.waiver_ids)
+
+    def test_save_load(self):
+
+        checkpoint = smartwaiver.sync.SmartwaiverSyncCheckpoint('2017-01-01 00:00:00', ['b', 'a'])
+        checkpoint.save(self.path)
+
+        loaded = smartwaiver.sync.SmartwaiverSyncCheckpoint.load(self.path)
+        self.assertEqual('2017-01-01 00:00:00', loaded.created_on)
+        self.assertEqual(frozenset(['a', 'b']), loaded.waiver_ids)
+        self.assertEqual(['state.json'], os.listdir(self.directory.name))
+
+    def test_bad_version(self):
+
+        with open(self.path, 'w') as state_file:
+            json.dump({'version': 99}, state_file)
+
+        with self.assertRaises(ValueError):
+            smartwaiver.sync.SmartwaiverSyncCheckpoint.load(self.path)
+
+    def test_advance(self):
+
+        server = MockWaiverServer(['2017-01-01 00:00:00', '2017-01-01 00:00:00', '2017-01-01 00:00:01'])
+        first, second, third = [smartwaiver.types.SmartwaiverWaiverSummary(waiver) for waiver in server.waivers]
+        checkpoint = smartwaiver.sync.SmartwaiverSyncCheckpoint()
+
+        checkpoint.advance(first)
+        self.assertFalse(checkpoint.is_new(first))
+        self.assertTrue(checkpoint.is_new(second))
+
+        checkpoint.advance(second)
+        self.assertEqual(frozenset(['waiver0', 'waiver1']), checkpoint.waiver_ids)
+
+        checkpoint.advance(third)
+        self.assertEqual('2017-01-01 00:00:01', checkpoint.created_on)
+        self.assertEqual(frozenset(['waiver2']), checkpoint.waiver_ids)
+        self.assertFalse(checkpoint.is_new(first))
+
+
+class SmartwaiverSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'state.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_first_run(self):
+
+        server = MockWaiverServer(timestamps(150, 3))
+        waivers = list(smartwaiver.sync.SmartwaiverSync(server.client(), self.path).run())
+
+        self.assertEqual(150, len(waivers))
+        self.assertEqual(smartwaiver.pagination.EARLIEST_DTS, server.requests[0]['fromDts'])
+        for waiver in waivers:
+            self.assertIs(type(waiver), smartwaiver.types.SmartwaiverWaiver)
+        self.assertEqual(sorted(w.created_on for w in waivers), [w.created_on for w in waivers])
+
+        checkpoint = smartwaiver.sync.SmartwaiverSyncCheckpoint.load(self.path)
+        self.assertEqual('2017-01-01 00:00:49', checkpoint.created_on)
+        self.assertEqual(frozenset(['waiver147', 'waiver148', 'waiver149']), checkpoint.waiver_ids)
+
+    def test_only_new_waivers(self):
+
+        server = MockWaiverServer(timestamps(50, 2))
+        list(smartwaiver.sync.SmartwaiverSync(server.client(), self.path).run())
+
+        # One more waiver at the last timestamp, and some after it
+        server = MockWaiverServer(timestamps(51, 2) + timestamps(10, 1, datetime(2017, 1, 2)))
+        waivers = list(smartwaiver.sync.SmartwaiverSync(server.client(), self.path).run())
+
+        self.assertEqual(['waiver50'] + ['waiver' + str(i) for i in range(51, 61)], [w.waiver_id for w in waivers])
+        self.assertEqual(11, len(server.waiver_requests))
+        self.assertEqual('2017-01-01 00:00:24', server.requests[0]['fromDts'])
+
+        # Nothing new
+        server.waiver_requests = []
+        self.assertEqual([], list(smartwaiver.sync.SmartwaiverSync(server.client(), self.path).run()))
+        self.assertEqual([], server.waiver_requests)
+
+    def test_resume_after_crash(self):
+
+        server = MockWaiverServer(timestamps(100, 4))
+        sync = smartwaiver.sync.SmartwaiverSync(server.client(), self.path, full_waivers=False)
+
+        processed = []
+        for summary in sync.run():
+            if len(processed) == 42:
+                break
+            processed.append(summary.waiver_id)
+
+        # The waiver being processed when the run stopped is fetched again
+        resumed = [summary.waiver_id for summary in
+                   smartwaiver.sync.SmartwaiverSync(server.client(), self.path, full_waivers=False).run()]
+
+        self.assertEqual(58, len(resumed))
+        self.assertEqual(sorted(waiver['waiverId'] for waiver in server.waivers), sorted(processed + resumed))
+
+    def test_fetch_error(self):
+
+        server = MockWaiverServer(timestamps(5, 1))
+        sync = smartwaiver.sync.SmartwaiverSync(server.client(), self.path)
+
+        # The server fails to return one of the waivers
+        fetch = server.waiver
+        server.waiver = lambda waiver_id: fetch(waiver_id if waiver_id != 'waiver3' else 'missing')
+
+        with self.assertRaises(smartwaiver.exceptions.SmartwaiverHTTPException):
+            list(sync.run())
+
+        self.assertEqual('2017-01-01 00:00:02', smartwaiver.sync.SmartwaiverSyncCheckpoint.load(self.path).created_on)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+# Copyright 2017 Smartwaiver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import sys
+sys.path.insert(0, '../')
+
+import smartwaiver
+import factory
+
+
+def waiver(waiver_id='6jebdfxzvrdkd', participants=1):
+    data = factory.waiver()
+    data['waiverId'] = waiver_id
+    data['participants'] = [factory.participant() for _ in range(participants)]
+    return smartwaiver.types.SmartwaiverWaiver(data)
+
+
+class RecordingWriter(smartwaiver.tables.SmartwaiverTableWriter):
+
+    def __init__(self, table='waivers', batch_size=smartwaiver.tables.DEFAULT_BATCH_SIZE):
+        smartwaiver.tables.SmartwaiverTableWriter.__init__(self, table, batch_size)
+        self.batches = []
+
+    def _write_batch(self, batch):
+        self.batches.append(batch)
+
+
+class SmartwaiverTableRowsTest(unittest.TestCase):
+
+    def test_waiver_rows(self):
+
+        rows = list(smartwaiver.tables.waiver_rows([waiver(participants=2)]))
+
+        self.assertEqual(2, len(rows))
+        for index, row in enumerate(rows):
+            values = dict(zip([name for name, column_type in smartwaiver.tables.WAIVER_SCHEMA], row))
+            self.assertEqual(len(smartwaiver.tables.WAIVER_SCHEMA), len(row))
+            self.assertEqual('6jebdfxzvrdkd', values['waiver_id'])
+            self.assertEqual('kyle@example.com', values['email'])
+            self.assertEqual(['Green Team'], json.loads(values['tags']))
+            self.assertEqual('Mother', values['guardian_relationship'])
+            self.assertEqual(index, values['participant_index'])
+            self.assertEqual('Kyle', values['participant_first_name'])
+            self.assertEqual(['Beginner'], json.loads(values['participant_tags']))
+            self.assertEqual({'w5qe9kkh3bxpe': factory.custom_field()}, json.loads(values['participant_custom_fields']))
+            self.assertEqual({'zrmgxh4ft8sqh': factory.custom_field()}, json.loads(values['custom_waiver_fields']))
+
+    def test_waiver_without_participants_or_guardian(self):
+
+        data = factory.waiver()
+        data['participants'] = []
+        data['guardian'] = None
+
+        rows = list(smartwaiver.tables.waiver_rows([smartwaiver.types.SmartwaiverWaiver(data)]))
+
+        self.assertEqual(1, len(rows))
+        self.assertEqual(len(smartwaiver.tables.WAIVER_SCHEMA), len(rows[0]))
+        self.assertEqual('6jebdfxzvrdkd', rows[0][0])
+        self.assertEqual([None] * 15, list(rows[0][-15:]))
+
+    def test_summary_rows(self):
+
+        summary = smartwaiver.types.SmartwaiverWaiverSummary(factory.waiver_summary())
+        columns = smartwaiver.columnar.SmartwaiverSummaryColumns.from_summaries([factory.waiver_summary()] * 2)
+
+        rows = list(smartwaiver.tables.summary_rows([summary, waiver(), columns]))
+
+        self.assertEqual(4, len(rows))
+        for row in rows:
+            self.assertEqual(rows[0], row)
+        self.assertEqual('["Green Team"]', rows[0][-1])
+
+    def test_summaries_in_waiver_table(self):
+
+        summary = smartwaiver.types.SmartwaiverWaiverSummary(factory.waiver_summary())
+
+        with self.assertRaises(ValueError):
+            list(smartwaiver.tables.waiver_rows([summary]))
+
+
+class SmartwaiverTableWriterTest(unittest.TestCase):
+
+    def test_batches(self):
+
+        writer = RecordingWriter(batch_size=4)
+        records = (waiver('waiver' + str(i), participants=1) for i in range(10))
+
+        self.assertEqual(10, writer.write(records))
+        self.assertEqual([4, 4, 2], [len(batch) for batch in writer.batches])
+        self.assertEqual(10, writer.rows_written)
+
+        self.assertEqual(3, writer.write([waiver(participants=3)]))
+        self.assertEqual(13, writer.rows_written)
+
+    def test_abstract(self):
+
+        class IncompleteWriter(smartwaiver.tables.SmartwaiverTableWriter):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteWriter()
+
+    def test_booleans(self):
+
+        writer = RecordingWriter()
+        writer.write([waiver()])
+
+        values = dict(zip(writer.columns, writer.batches[0][0]))
+        self.assertIs(True, values['participant_is_minor'])
+        self.assertIs(True, values['is_minor'])
+
+        data = factory.waiver()
+        data['verified'] = 'maybe'
+        with self.assertRaises(ValueError):
+            writer.write([smartwaiver.types.SmartwaiverWaiver(data)])
+
+    def test_invalid(self):
+
+        with self.assertRaises(ValueError):
+            RecordingWriter(table='templates')
+
+        with self.assertRaises(ValueError):
+            RecordingWriter(batch_size=0)
+
+        writer = RecordingWriter()
+        writer.close()
+        with self.assertRaises(ValueError):
+            writer.write([waiver()])
+
+
+class SmartwaiverCsvWriterTest(unittest.TestCase):
+
+    def test_write_file(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'waivers.csv')
+            with smartwaiver.tables.SmartwaiverCsvWriter(path, batch_size=2) as writer:
+                writer.write(waiver('waiver' + str(i), participants=2) for i in range(3))
+
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+
+        self.assertEqual(6, len(rows))
+        self.assertEqual([name for name, column_type in smartwaiver.tables.WAIVER_SCHEMA], list(rows[0].keys()))
+        self.assertEqual(['waiver0', 'waiver0', 'waiver1', 'waiver1', 'waiver2', 'waiver2'],
+                         [row['waiver_id'] for row in rows])
+        self.assertEqual('true', rows[0]['verified'])
+        self.assertEqual('false', rows[0]['expired'])
+        self.assertEqual('1', rows[1]['participant_index'])
+
+    def test_write_summaries(self):
+
+        data = factory.waiver_summary()
+        data['expired'] = None
+        out = io.StringIO()
+        writer = smartwaiver.tables.SmartwaiverCsvWriter(out, table='summaries')
+        writer.write([smartwaiver.types.SmartwaiverWaiverSummary(data)])
+        writer.close()
+
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+
+        self.assertEqual(1, len(rows))
+        self.assertEqual(list(smartwaiver.columnar.COLUMNS), list(rows[0].keys()))
+        self.assertEqual('', rows[0]['expired'])
+        self.assertFalse(out.closed)
+
+
+@unittest.skipIf(smartwaiver.tables.pyarrow is None, 'pyarrow is not installed')
+class SmartwaiverArrowWritersTest(unittest.TestCase):
+
+    def test_parquet(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'waivers.parquet')
+            with smartwaiver.tables.SmartwaiverParquetWriter(path, batch_size=2) as writer:
+                writer.write(waiver('waiver' + str(i)) for i in range(5))
+
+            table = smartwaiver.tables.pyarrow.parquet.read_table(path)
+            metadata = smartwaiver.tables.pyarrow.parquet.ParquetFile(path).metadata
+
+        self.assertEqual(writer.columns, table.schema.names)
+        self.assertEqual(5, table.num_rows)
+        self.assertEqual(3, metadata.num_row_groups)
+        self.assertEqual(['waiver0', 'waiver1', 'waiver2', 'waiver3', 'waiver4'], table.column('waiver_id').to_pylist())
+
+    def test_arrow(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'summaries.arrow')
+            with smartwaiver.tables.SmartwaiverArrowWriter(path, table='summaries', batch_size=2) as writer:
+                writer.write([smartwaiver.types.SmartwaiverWaiverSummary(factory.waiver_summary())] * 3)
+
+            reader = smartwaiver.tables.pyarrow.ipc.open_file(path)
+            self.assertEqual(2, reader.num_record_batches)
+            table = reader.read_all()
+
+        self.assertEqual(3, table.num_rows)
+        self.assertEqual([True] * 3, table.column('verified').to_pylist())
+
+
+class SmartwaiverArrowMissingTest(unittest.TestCase):
+
+    @mock.patch.object(smartwaiver.tables, 'pyarrow', None)
+    def test_requires_pyarrow(self):
+
+        with self.assertRaises(ImportError):
+            smartwaiver.tables.SmartwaiverParquetWriter(io.BytesIO())
+
+        with self.assertRaises(ImportError):
+            smartwaiver.tables.SmartwaiverArrowWriter(io.BytesIO())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,10 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import base64
+import io
+import os
+import tempfile
 import unittest
 
 import sys
@@ -136,6 +140,24 @@ class SmartwaiverTypeTest(unittest.TestCase):
 
         self.assertEqual('Cannot create a SmartwaiverType with missing field: key2', str(cm.exception))
 
+    def test_slots(self):
+
+        objects = [
+            smartwaiver.types.SmartwaiverCustomField(factory.custom_field()),
+            smartwaiver.types.SmartwaiverGuardian(factory.guardian()),
+            smartwaiver.types.SmartwaiverParticipant(factory.participant()),
+            smartwaiver.types.SmartwaiverTemplate(factory.template()),
+            smartwaiver.types.SmartwaiverWaiver(factory.waiver()),
+            smartwaiver.types.SmartwaiverWaiverSummary(factory.waiver_summary()),
+            smartwaiver.types.SmartwaiverWebhook(factory.webhook()),
+        ]
+
+        for obj in objects:
+            self.assertFalse(hasattr(obj, '__dict__'), type(obj).__name__)
+            self.assertIsNone(obj.response_metadata)
+            with self.assertRaises(AttributeError):
+                obj.unknown_attribute = 1
+
 
 class SmartwaiverWaiverSummaryTest(unittest.TestCase):
 
@@ -170,6 +192,33 @@ class SmartwaiverWaiverSummaryTest(unittest.TestCase):
         self.assertEqual(waiver_summary_data['isMinor'], waiver_summary.is_minor)
         self.assertEqual(waiver_summary_data['tags'], waiver_summary.tags)
 
+    def test_lazy(self):
+
+        waiver_summary_data = factory.waiver_summary()
+        waiver_summary = smartwaiver.types.SmartwaiverWaiverSummary(waiver_summary_data, lazy=True)
+
+        with self.assertRaises(AttributeError):
+            object.__getattribute__(waiver_summary, '_title')
+
+        self.assertEqual(waiver_summary_data['title'], waiver_summary.title)
+        self.assertEqual(waiver_summary_data['title'], object.__getattribute__(waiver_summary, '_title'))
+        self.assertEqual(waiver_summary_data['tags'], waiver_summary.tags)
+
+    def test_lazy_validate(self):
+
+        waiver_summary_data = factory.waiver_summary()
+        waiver_summary_data.pop('dob')
+        waiver_summary = smartwaiver.types.SmartwaiverWaiverSummary(waiver_summary_data, lazy=True)
+
+        self.assertEqual(waiver_summary_data['waiverId'], waiver_summary.waiver_id)
+        with self.assertRaises(ValueError) as cm:
+            waiver_summary.validate()
+
+        self.assertEqual('Cannot create a SmartwaiverWaiverSummary with missing field: dob', str(cm.exception))
+
+        # Objects that were not created lazily were checked already
+        smartwaiver.types.SmartwaiverWaiverSummary(factory.waiver_summary()).validate()
+
 
 class SmartwaiverWaiverTest(unittest.TestCase):
 
@@ -230,6 +279,104 @@ class SmartwaiverWaiverTest(unittest.TestCase):
         self.assertIs(type(waiver.guardian), smartwaiver.types.SmartwaiverGuardian)
         self.assertEqual(waiver_data['pdf'], waiver.pdf)
 
+    def test_pdf_bytes(self):
+
+        pdf = os.urandom(1000)
+        waiver_data = factory.waiver()
+        waiver_data['pdf'] = base64.b64encode(pdf).decode('ascii')
+        waiver = smartwaiver.types.SmartwaiverWaiver(waiver_data)
+
+        self.assertEqual(len(pdf), waiver.pdf_size)
+        self.assertIsNone(waiver._pdf_bytes)
+        self.assertEqual(pdf, waiver.pdf_bytes)
+        self.assertIs(waiver.pdf_bytes, waiver.pdf_bytes)
+
+        out = io.BytesIO()
+        self.assertEqual(len(pdf), waiver.write_pdf(out))
+        self.assertEqual(pdf, out.getvalue())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'waiver.pdf')
+            waiver.write_pdf(path)
+            with open(path, 'rb') as pdf_file:
+                self.assertEqual(pdf, pdf_file.read())
+
+    def test_pdf_size(self):
+
+        for size in range(6):
+            waiver_data = factory.waiver()
+            waiver_data['pdf'] = base64.b64encode(b'x' * size).decode('ascii')
+            waiver = smartwaiver.types.SmartwaiverWaiver(waiver_data)
+            self.assertEqual(size, waiver.pdf_size)
+            self.assertIsNone(waiver._pdf_bytes)
+
+        waiver_data['pdf'] = base64.encodebytes(b'x' * 100).decode('ascii')
+        self.assertEqual(100, smartwaiver.types.SmartwaiverWaiver(waiver_data).pdf_size)
+
+    def test_release_pdf_text(self):
+
+        pdf = os.urandom(100)
+        waiver_data = factory.waiver()
+        waiver_data['pdf'] = base64.b64encode(pdf).decode('ascii')
+        waiver = smartwaiver.types.SmartwaiverWaiver(waiver_data)
+
+        waiver.release_pdf_text()
+
+        self.assertIsNone(waiver._pdf)
+        self.assertEqual(pdf, waiver.pdf_bytes)
+        self.assertEqual(waiver_data['pdf'], waiver.pdf)
+        self.assertEqual(len(pdf), waiver.pdf_size)
+
+    def test_lazy(self):
+
+        waiver_data = factory.waiver()
+        waiver_data['participants'] = [factory.participant(), factory.participant()]
+        waiver = smartwaiver.types.SmartwaiverWaiver(waiver_data, lazy=True)
+
+        self.assertEqual(waiver_data['waiverId'], waiver.waiver_id)
+        self.assertEqual(waiver_data['email'], waiver.email)
+        for name in ('_participants', '_custom_waiver_fields', '_guardian'):
+            with self.assertRaises(AttributeError):
+                object.__getattribute__(waiver, name)
+
+        self.assertEqual(2, len(waiver.participants))
+        self.assertIs(waiver.participants, waiver.participants)
+        self.assertIs(type(waiver.participants[0]), smartwaiver.types.SmartwaiverParticipant)
+        self.assertIs(type(waiver.custom_waiver_fields['zrmgxh4ft8sqh']), smartwaiver.types.SmartwaiverCustomField)
+        self.assertEqual('Mother', waiver.guardian.relationship)
+        self.assertEqual('', waiver.pdf)
+
+        with self.assertRaises(AttributeError):
+            waiver.unknown_attribute
+
+    def test_lazy_validate(self):
+
+        waiver_data = factory.waiver()
+        waiver_data['participants'] = ''
+        waiver = smartwaiver.types.SmartwaiverWaiver(waiver_data, lazy=True)
+
+        self.assertEqual(waiver_data['email'], waiver.email)
+        with self.assertRaises(ValueError) as cm:
+            waiver.validate()
+
+        self.assertEqual('Participants field must be a list', str(cm.exception))
+
+    def test_lazy_missing_nested(self):
+
+        for key, attr in [('participants', 'participants'), ('customWaiverFields', 'custom_waiver_fields'),
+                          ('guardian', 'guardian')]:
+            waiver_data = factory.waiver()
+            waiver_data.pop(key)
+            waiver = smartwaiver.types.SmartwaiverWaiver(waiver_data, lazy=True)
+
+            self.assertEqual(waiver_data['email'], waiver.email)
+            with self.assertRaises(ValueError) as cm:
+                getattr(waiver, attr)
+            self.assertEqual('Cannot create a SmartwaiverWaiver with missing field: ' + key, str(cm.exception))
+
+            with self.assertRaises(ValueError):
+                waiver.validate()
+
     def test_participant_not_list(self):
 
         waiver_data = factory.waiver()